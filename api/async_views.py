@@ -0,0 +1,121 @@
+from functools import update_wrapper
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404
+from django.shortcuts import aget_object_or_404
+from rest_framework.response import Response
+
+DEFAULTS = {
+    # Opt-in: Django 5.2 runs every async query on a thread, so the async
+    # views only pay off when requests mostly wait on clients
+    'ENABLED': False,
+}
+
+
+def get_async_settings():
+    return {**DEFAULTS, **getattr(settings, 'API_ASYNC_VIEWS', {})}
+
+
+class AsyncReadViewSetMixin:
+    """
+    Serve list and retrieve from native async views.
+
+    With API_ASYNC_VIEWS enabled, as_view() returns a coroutine view. GET and
+    HEAD requests for async_actions run alist() or aretrieve(), so a request
+    only holds a thread while its queries run. Every list and retrieve mixin
+    provides the async twin of its sync method, and each step that queries
+    (validators, cache lookup, page, facets) runs its queries in a single
+    sync_to_async call, since every handoff to a thread costs CPU. Other
+    actions run the sync view through sync_to_async, as Django does for any
+    sync view. Serializers for the async actions must render without
+    queries, as the denormalized read serializers do.
+    """
+    async_actions = ('list', 'retrieve')
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if not get_async_settings()['ENABLED'] or not set(cls.async_actions) & set(view.actions.values()):
+            return view
+
+        actions = view.actions
+        if 'get' in actions and 'head' not in actions:
+            actions['head'] = actions['get']
+        sync_view = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            if actions.get(request.method.lower()) not in cls.async_actions:
+                return await sync_view(request, *args, **kwargs)
+
+            # The setup ViewSetMixin.as_view() does for the sync view
+            self = cls(**initkwargs)
+            self.action_map = actions
+            for method, action in actions.items():
+                setattr(self, method, getattr(self, action))
+            self.request, self.args, self.kwargs = request, args, kwargs
+            return await self.adispatch(request, *args, **kwargs)
+
+        # Keeps cls, initkwargs, actions and csrf_exempt for the router and middleware
+        return update_wrapper(async_view, view)
+
+    async def adispatch(self, request, *args, **kwargs):
+        """APIView.dispatch() awaiting the async twin of the action"""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # Authentication, permissions and throttling may query the database
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            response = await getattr(self, f'a{self.action}')(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def afilter_queryset(self, queryset):
+        # Filter backends mostly just build the query, but the in-process
+        # search index refreshes itself from the database
+        return await sync_to_async(self.filter_queryset)(queryset)
+
+    async def aget_filtered_queryset(self):
+        """get_filtered_queryset(), only handing over to a thread the first time"""
+        if self._filtered_queryset is None:
+            await sync_to_async(self.get_filtered_queryset)()
+        return self._filtered_queryset
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        # The COUNT and the page in one sync_to_async call
+        return await sync_to_async(self.paginator.paginate_queryset)(queryset, self.request, view=self)
+
+    async def aget_object(self):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await aget_object_or_404(queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (TypeError, ValueError, DjangoValidationError):
+            raise Http404
+        await sync_to_async(self.check_object_permissions)(self.request, obj)
+        return obj
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = await self.aget_filtered_queryset()
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer([obj async for obj in queryset], many=True)
+        return Response(serializer.data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
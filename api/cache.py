@@ -0,0 +1,186 @@
+import hashlib
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.http import parse_http_date_safe
+
+from .conditional import is_not_modified
+
+KEY_PREFIX = 'api:response'
+HITS_KEY = f'{KEY_PREFIX}:hits'
+MISSES_KEY = f'{KEY_PREFIX}:misses'
+BYPASS_HEADER = 'HTTP_X_CACHE_BYPASS'
+# Stored with each entry, so a hit answers conditional requests by itself
+VALIDATOR_HEADERS = ('ETag', 'Last-Modified')
+
+DEFAULTS = {
+    'ENABLED': True,
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+
+
+def get_cache_settings():
+    return {**DEFAULTS, **getattr(settings, 'API_RESPONSE_CACHE', {})}
+
+
+def get_cache():
+    return caches[get_cache_settings()['ALIAS']]
+
+
+def version_key(model):
+    return f'{KEY_PREFIX}:version:{model._meta.label_lower}'
+
+
+def _increment(cache, key):
+    # add() is a no-op when the key exists; incr() then moves it on atomically
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The key was evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
+
+
+def bump_versions(*models):
+    """Invalidate every cached response that depends on any of the given models"""
+    cache = get_cache()
+    for model in models:
+        _increment(cache, version_key(model))
+
+
+def invalidate(*models):
+    """Bump cache versions now and again on commit"""
+    # The immediate bump covers reads inside the writing transaction; the
+    # on-commit bump discards anything cached from the pre-commit state
+    bump_versions(*models)
+    transaction.on_commit(lambda: bump_versions(*models))
+
+
+def get_cache_stats():
+    """Return response cache hit/miss counters"""
+    values = get_cache().get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = values.get(HITS_KEY, 0), values.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+def reset_cache_stats():
+    get_cache().delete_many([HITS_KEY, MISSES_KEY])
+
+
+class CachedResponseMixin:
+    """
+    Cache rendered list/retrieve responses keyed on path and normalized query params.
+
+    Keys embed a version per model in cache_dependencies; the api.signals
+    receivers bump those versions on writes, so stale entries are never read
+    again and simply expire. Send X-Cache-Bypass: 1 or Cache-Control: no-cache
+    to skip the lookup. Responses carry X-Cache: HIT, MISS or BYPASS.
+
+    Put it before ConditionalGetMixin: entries keep the ETag and Last-Modified
+    the response was rendered with, and a hit answers If-None-Match and
+    If-Modified-Since from those without running the validator queries.
+    """
+    cache_dependencies = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        return await self.acached_response(super().alist, request, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self.acached_response(super().aretrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        options = get_cache_settings()
+        if not options['ENABLED']:
+            return handler(request, *args, **kwargs)
+
+        if self.should_bypass_cache(request):
+            response = handler(request, *args, **kwargs)
+            response['X-Cache'] = 'BYPASS'
+            return response
+
+        cache = get_cache()
+        key, cached = self.lookup_response(request, cache)
+        if cached is not None:
+            return self.cached_hit(request, cached)
+        return self.cache_on_render(handler(request, *args, **kwargs), cache, key, options['TIMEOUT'])
+
+    async def acached_response(self, handler, request, *args, **kwargs):
+        options = get_cache_settings()
+        if not options['ENABLED']:
+            return await handler(request, *args, **kwargs)
+
+        if self.should_bypass_cache(request):
+            response = await handler(request, *args, **kwargs)
+            response['X-Cache'] = 'BYPASS'
+            return response
+
+        cache = get_cache()
+        # Versions, entry and counter take several cache calls; Django's
+        # backends run each async one through sync_to_async, so make one call
+        key, cached = await sync_to_async(self.lookup_response)(request, cache)
+        if cached is not None:
+            return self.cached_hit(request, cached)
+        return self.cache_on_render(await handler(request, *args, **kwargs), cache, key, options['TIMEOUT'])
+
+    def lookup_response(self, request, cache):
+        """Return the cache key and the cached response, if any, counting the hit or miss"""
+        key = self.get_response_cache_key(request, cache)
+        cached = cache.get(key)
+        _increment(cache, HITS_KEY if cached is not None else MISSES_KEY)
+        return key, cached
+
+    def cached_hit(self, request, cached):
+        status_code, content_type, content, validators = cached
+        last_modified = parse_http_date_safe(validators.get('Last-Modified', ''))
+        if validators and is_not_modified(request, validators.get('ETag'), last_modified):
+            response = HttpResponse(status=304)
+        else:
+            response = HttpResponse(content, content_type=content_type, status=status_code)
+        for header, value in validators.items():
+            response[header] = value
+        response['X-Cache'] = 'HIT'
+        return response
+
+    def cache_on_render(self, response, cache, key, timeout):
+        response['X-Cache'] = 'MISS'
+        if response.status_code == 200:
+            def store(rendered):
+                validators = {header: rendered[header] for header in VALIDATOR_HEADERS if rendered.has_header(header)}
+                cache.set(key, (rendered.status_code, rendered['Content-Type'], rendered.content, validators), timeout)
+            response.add_post_render_callback(store)
+        return response
+
+    def should_bypass_cache(self, request):
+        if request.META.get(BYPASS_HEADER, '').lower() in ('1', 'true', 'yes'):
+            return True
+        return 'no-cache' in request.META.get('HTTP_CACHE_CONTROL', '').lower()
+
+    def get_response_cache_key(self, request, cache):
+        version_keys = [version_key(model) for model in self.cache_dependencies]
+        versions = cache.get_many(version_keys)
+        query = urlencode(sorted(
+            (key, value) for key in request.query_params for value in request.query_params.getlist(key)
+        ))
+        raw = '|'.join([
+            request.path,
+            query,
+            request.accepted_media_type or '',
+            *(f'{key}={versions.get(key, 0)}' for key in version_keys),
+        ])
+        return f'{KEY_PREFIX}:{hashlib.md5(raw.encode()).hexdigest()}'
@@ -0,0 +1,161 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Count, Max
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import Tombstone
+
+
+def record_deletion(model, when):
+    """
+    Remember the latest delete so the validators move on when rows disappear.
+
+    Stored in the database rather than the cache, so every worker sees it,
+    and written in the deleting transaction, so it commits with the delete.
+    """
+    Tombstone.objects.bulk_create(
+        [Tombstone(model=model._meta.label_lower, deleted_at=when)],
+        update_conflicts=True,
+        unique_fields=['model'],
+        update_fields=['deleted_at'],
+    )
+
+
+def deletion_times(models):
+    """Return {model: timestamp of its latest delete} with one query"""
+    labels = {model._meta.label_lower: model for model in models}
+    return {
+        labels[label]: deleted_at.timestamp()
+        for label, deleted_at in Tombstone.objects.filter(model__in=labels).values_list('model', 'deleted_at')
+    }
+
+
+def is_not_modified(request, etag, last_modified):
+    """Whether the request's If-None-Match or If-Modified-Since header matches the validators"""
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return '*' in etags or etag in etags
+
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return last_modified is not None and if_modified_since is not None and last_modified <= if_modified_since
+
+
+class ConditionalGetMixin:
+    """
+    Strong ETag and Last-Modified validators for list and retrieve.
+
+    Validators come from a COUNT/MAX(updated_at) aggregate over the filtered
+    queryset, plus MAX(updated_at) for each model in validator_dependencies
+    (whose names appear in the response), so nothing is serialized to answer a
+    conditional request. Keyset pages skip the COUNT and take MAX(updated_at)
+    over the whole table instead. Matching If-None-Match or If-Modified-Since headers get
+    a 304 Not Modified.
+    """
+    validator_dependencies = ()
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_filtered_queryset()
+        # Keyset pages avoid COUNT(*); see get_validators() for what replaces it
+        count = not self.uses_keyset_pagination(request)
+        return self.conditional_response(super().list, queryset, request, *args, count=count, **kwargs)
+
+    def uses_keyset_pagination(self, request):
+        is_keyset_request = getattr(self.paginator, 'is_keyset_request', None)
+        return is_keyset_request is not None and is_keyset_request(request)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.get_queryset().filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+        except (TypeError, ValueError, DjangoValidationError):
+            # Malformed lookups fall through to get_object(), which answers 404
+            return super().retrieve(request, *args, **kwargs)
+        # A deleted object answers 404, so only deleted dependencies matter
+        return self.conditional_response(super().retrieve, queryset, request, *args, own_deletions=False, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        count = not self.uses_keyset_pagination(request)
+        return await self.aconditional_response(
+            super().alist, self.get_filtered_queryset, request, *args, count=count, **kwargs
+        )
+
+    async def aretrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.get_queryset().filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+        except (TypeError, ValueError, DjangoValidationError):
+            return await super().aretrieve(request, *args, **kwargs)
+        return await self.aconditional_response(
+            super().aretrieve, lambda: queryset, request, *args, own_deletions=False, **kwargs
+        )
+
+    def conditional_response(self, handler, queryset, request, *args, count=True, own_deletions=True, **kwargs):
+        etag, last_modified = self.get_validators(queryset, request, count=count, own_deletions=own_deletions)
+
+        if is_not_modified(request, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+        return self.add_validators(response, etag, last_modified)
+
+    async def aconditional_response(self, handler, get_queryset, request, *args, count=True, own_deletions=True,
+                                    **kwargs):
+        def get_validators():
+            return self.get_validators(get_queryset(), request, count=count, own_deletions=own_deletions)
+
+        # Filtering and one aggregate per model; a single sync_to_async call
+        # costs less than one per step
+        etag, last_modified = await sync_to_async(get_validators)()
+
+        if is_not_modified(request, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = await handler(request, *args, **kwargs)
+        return self.add_validators(response, etag, last_modified)
+
+    def add_validators(self, response, etag, last_modified):
+        if response.status_code not in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            return response
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def get_validators(self, queryset, request, count=True, own_deletions=True):
+        parts = [request.get_full_path()]
+        timestamps = []
+
+        # Without a COUNT, a row updated out of the filter would move neither
+        # value over the filtered rows, so the table's latest change stands in
+        primary = queryset if count else queryset.model._default_manager.all()
+        sources = [(queryset.model, primary, count)]
+        # Dependencies only contribute names, so renames (updated_at) and the
+        # deletion tombstone cover them without a COUNT
+        sources += [(model, model.objects.all(), False) for model in self.get_validator_dependencies()]
+        deletions = deletion_times(
+            model for model, _, _ in sources if model is not queryset.model or own_deletions
+        )
+
+        for model, aggregated, with_count in sources:
+            aggregates = {'changed': Max('updated_at')}
+            if with_count:
+                aggregates['count'] = Count('pk')
+            state = aggregated.order_by().aggregate(**aggregates)
+            deleted = deletions.get(model)
+            changed = state['changed'].isoformat() if state['changed'] else None
+            parts.append(f"{model._meta.label_lower}:{state.get('count')}:{changed}:{deleted}")
+            if state['changed'] is not None:
+                timestamps.append(state['changed'].timestamp())
+            if deleted is not None:
+                timestamps.append(deleted)
+
+        etag = quote_etag(hashlib.sha1('|'.join(parts).encode()).hexdigest())
+        return etag, int(max(timestamps)) if timestamps else None
+
+    def get_validator_dependencies(self):
+        return self.validator_dependencies
@@ -0,0 +1,107 @@
+import csv
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+from .renderers import dumps, fast_json_available
+from .serializers import PlanetReadSerializer
+
+# Rows fetched per round trip while streaming
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FIELDS = ['id', 'name', 'population', 'terrains', 'climates']
+
+_read_serializer = PlanetReadSerializer()
+
+
+def planet_row(planet):
+    """Flatten a planet into an export row"""
+    return _read_serializer.to_representation(planet)
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+class NDJSONRenderer(BaseRenderer):
+    """One JSON document per line"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(self.render_row(row) for row in rows).encode(self.charset)
+
+    def render_row(self, row):
+        if fast_json_available():
+            return dumps(row).decode() + '\n'
+        return json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+    def stream(self, rows):
+        for row in rows:
+            yield self.render_row(row)
+
+    async def astream(self, rows):
+        async for row in rows:
+            yield self.render_row(row)
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    Comma separated values with a header line.
+
+    List values are joined with ", ", the same format fetch_planets reads.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        fields = list(rows[0]) if rows else []
+        return ''.join(self.stream(rows, fields)).encode(self.charset)
+
+    def stream(self, rows, fields=EXPORT_FIELDS):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow([self.render_value(row.get(field)) for field in fields])
+
+    async def astream(self, rows, fields=EXPORT_FIELDS):
+        writer = csv.writer(_Echo())
+        yield writer.writerow(fields)
+        async for row in rows:
+            yield writer.writerow([self.render_value(row.get(field)) for field in fields])
+
+    def render_value(self, value):
+        if isinstance(value, (list, tuple)):
+            return ', '.join(value)
+        return '' if value is None else value
+
+
+def iter_planet_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield export rows without materializing the queryset.
+
+    iterator() uses a server-side cursor where the database supports one and
+    relation names come from the denormalized columns, so memory stays bounded
+    by chunk_size no matter how many planets are exported.
+    """
+    for planet in queryset.iterator(chunk_size=chunk_size):
+        yield planet_row(planet)
+
+
+async def aiter_planet_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    iter_planet_rows for ASGI servers.
+
+    Under ASGI, Django reads a sync iterator to the end before sending any of
+    it. This one streams, and only holds a thread while a chunk is fetched,
+    not while a slow client reads.
+    """
+    async for planet in queryset.aiterator(chunk_size=chunk_size):
+        yield planet_row(planet)
@@ -0,0 +1,76 @@
+from asgiref.sync import sync_to_async
+from django.db.models import Count
+from rest_framework.exceptions import ValidationError
+
+from .models import Planet
+
+# Planet relations that can be faceted
+FACET_FIELDS = ('terrains', 'climates')
+FACETS_QUERY_PARAM = 'facets'
+
+
+def facet_rows(planets, field_name):
+    """
+    Count planets per related terrain or climate with one grouped query.
+
+    The aggregate runs over the through table, restricted to the given planet
+    queryset as a subquery, so any filters and search applied to the planets
+    carry over. Related rows without matching planets are left out.
+    """
+    field = Planet._meta.get_field(field_name)
+    through = field.remote_field.through
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+
+    return (
+        through.objects
+        .filter(**{f'{source}__in': planets.order_by().values('pk')})
+        .values_list(f'{target}_id', f'{target}__name')
+        .annotate(count=Count('pk'))
+        .order_by('-count', f'{target}__name')
+    )
+
+
+def facet_counts(planets, field_name):
+    return [{'id': pk, 'name': name, 'count': count} for pk, name, count in facet_rows(planets, field_name)]
+
+
+def get_requested_facets(request):
+    """Return the facet names in ?facets=, rejecting unknown ones"""
+    value = request.query_params.get(FACETS_QUERY_PARAM, '')
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in names if name not in FACET_FIELDS]
+    if unknown:
+        raise ValidationError({
+            FACETS_QUERY_PARAM: [f"Unknown facet '{name}'. Choose from: {', '.join(FACET_FIELDS)}." for name in unknown]
+        })
+    return list(dict.fromkeys(names))
+
+
+class FacetedListMixin:
+    """
+    Attach facet counts for the filtered queryset to list responses when ?facets= is given.
+
+    The counts reuse the queryset the list was filtered with (see
+    filters.FilteredListMixin), so each facet adds one grouped query and the
+    filter backends are not run again.
+    """
+
+    def list(self, request, *args, **kwargs):
+        facets = get_requested_facets(request)
+        response = super().list(request, *args, **kwargs)
+        if facets and response.status_code == 200:
+            response.data['facets'] = self.get_facets(facets)
+        return response
+
+    async def alist(self, request, *args, **kwargs):
+        facets = get_requested_facets(request)
+        response = await super().alist(request, *args, **kwargs)
+        if facets and response.status_code == 200:
+            # All facet queries in one sync_to_async call rather than one each
+            response.data['facets'] = await sync_to_async(self.get_facets)(facets)
+        return response
+
+    def get_facets(self, facets):
+        queryset = self.get_filtered_queryset()
+        return {name: facet_counts(queryset, name) for name in facets}
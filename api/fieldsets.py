@@ -0,0 +1,91 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_QUERY_PARAM = 'fields'
+OMIT_QUERY_PARAM = 'omit'
+
+
+def _split(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def get_requested_fields(request, available):
+    """
+    Return the names in available kept by ?fields= and ?omit=, in their original order.
+
+    None means the response is not sparse: there is no API request, it is a
+    write, or neither parameter was given. Unknown names are rejected.
+    """
+    params = getattr(request, 'query_params', None)
+    if params is None or request.method not in SAFE_METHODS:
+        return None
+    if FIELDS_QUERY_PARAM not in params and OMIT_QUERY_PARAM not in params:
+        return None
+
+    included = _split(params.get(FIELDS_QUERY_PARAM, ''))
+    omitted = _split(params.get(OMIT_QUERY_PARAM, ''))
+    errors = {}
+    for param, names in ((FIELDS_QUERY_PARAM, included), (OMIT_QUERY_PARAM, omitted)):
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            errors[param] = [
+                f"Unknown field '{name}'. Choose from: {', '.join(available)}." for name in unknown
+            ]
+    if errors:
+        raise ValidationError(errors)
+
+    return [
+        name for name in available
+        if (not included or name in included) and name not in omitted
+    ]
+
+
+class SparseFieldsetSerializerMixin:
+    """ModelSerializer mixin that drops the fields left out by ?fields= and ?omit= on reads"""
+    selected_fields = None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        self.selected_fields = get_requested_fields(self.context.get('request'), list(fields))
+        if self.selected_fields is None:
+            return fields
+        return {name: fields[name] for name in self.selected_fields}
+
+    def selected_sources(self):
+        """Model attributes read by the selected fields, or None when the response is not sparse"""
+        fields = self.fields
+        if self.selected_fields is None:
+            return None
+        return [getattr(field, 'names_attr', None) or field.source for field in fields.values()]
+
+
+def only_selected_columns(queryset, serializer):
+    """
+    Defer the columns a sparse serializer will not read.
+
+    Falls back to the full queryset when the serializer is not sparse or reads
+    anything other than concrete model fields.
+    """
+    sources = serializer.selected_sources()
+    if sources is None:
+        return queryset
+    try:
+        fields = [queryset.model._meta.get_field(source) for source in sources]
+    except FieldDoesNotExist:
+        return queryset
+    if any(not field.concrete or field.many_to_many for field in fields):
+        return queryset
+    # only() always keeps the primary key
+    return queryset.only(*[field.name for field in fields] or ['pk'])
+
+
+class SparseFieldsetMixin:
+    """Load only the columns the list or retrieve serializer renders"""
+    sparse_fieldset_actions = ('list', 'retrieve')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in self.sparse_fieldset_actions:
+            queryset = only_selected_columns(queryset, self.get_serializer())
+        return queryset
@@ -0,0 +1,144 @@
+import django_filters
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Exists, OuterRef, Q
+from rest_framework.response import Response
+from .models import RELATION_NAME_FIELDS, Planet
+
+
+class ValueListFilter(django_filters.BaseCSVFilter, django_filters.CharFilter):
+    """Comma separated values, e.g. ?terrains=desert,mountains"""
+
+
+def related_match(relation, value, using=DEFAULT_DB_ALIAS):
+    """
+    Match planets linked to a terrain or climate given by id or name.
+
+    Digit-only values are treated as ids, anything else as a name. Names are
+    matched by containment on the denormalized names column where the
+    database supports it (a GIN index backs it on PostgreSQL); ids, and names
+    elsewhere, use an EXISTS subquery on the through table. Neither duplicates
+    planet rows, so no DISTINCT is needed.
+    """
+    through = relation.remote_field.through
+    target = relation.m2m_reverse_field_name()
+    values = value if isinstance(value, (list, tuple)) else [value]
+    # str.isdigit() also accepts digits such as '²' that int() rejects
+    ids = [int(item) for item in values if item.isascii() and item.isdigit()]
+    names = [item for item in values if not (item.isascii() and item.isdigit())]
+
+    condition = Q()
+    if names and connections[using].features.supports_json_field_contains:
+        names_column = RELATION_NAME_FIELDS[relation.name]
+        for name in names:
+            condition |= Q(**{f'{names_column}__contains': [name]})
+        names = []
+
+    exists = Q()
+    if ids:
+        exists |= Q(**{f'{target}_id__in': ids})
+    if names:
+        exists |= Q(**{f'{target}__name__in': names})
+    if exists:
+        condition |= Q(Exists(through.objects.filter(exists, **{relation.m2m_field_name(): OuterRef('pk')})))
+    return condition
+
+
+class FilteredListMixin:
+    """
+    Filter the list queryset once per request.
+
+    get_filtered_queryset() runs the filter backends, search index refresh
+    included, on its first call and returns the same queryset afterwards, so
+    list() and the mixins wrapping it (validators, facets) share one pass.
+    Pages, counts and aggregates clone the queryset, so sharing it is safe.
+    """
+    _filtered_queryset = None
+
+    def get_filtered_queryset(self):
+        if self._filtered_queryset is None:
+            self._filtered_queryset = self.filter_queryset(self.get_queryset())
+        return self._filtered_queryset
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_filtered_queryset()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+
+class PlanetFilter(django_filters.FilterSet):
+    """Filters for the planet list endpoint"""
+
+    terrains = ValueListFilter(
+        method='filter_any',
+        help_text="Planets with any of these terrains (comma separated names or ids)"
+    )
+    terrains_all = ValueListFilter(
+        field_name='terrains',
+        method='filter_all',
+        help_text="Planets with all of these terrains (comma separated names or ids)"
+    )
+    climates = ValueListFilter(
+        method='filter_any',
+        help_text="Planets with any of these climates (comma separated names or ids)"
+    )
+    climates_all = ValueListFilter(
+        field_name='climates',
+        method='filter_all',
+        help_text="Planets with all of these climates (comma separated names or ids)"
+    )
+    population_min = django_filters.NumberFilter(
+        field_name='population_count',
+        lookup_expr='gte',
+        help_text="Minimum population (inclusive)"
+    )
+    population_max = django_filters.NumberFilter(
+        field_name='population_count',
+        lookup_expr='lte',
+        help_text="Maximum population (inclusive)"
+    )
+    created_after = django_filters.IsoDateTimeFilter(
+        field_name='created_at',
+        lookup_expr='gte',
+        help_text="Created at or after this ISO 8601 timestamp"
+    )
+    created_before = django_filters.IsoDateTimeFilter(
+        field_name='created_at',
+        lookup_expr='lt',
+        help_text="Created before this ISO 8601 timestamp"
+    )
+    updated_after = django_filters.IsoDateTimeFilter(
+        field_name='updated_at',
+        lookup_expr='gte',
+        help_text="Updated at or after this ISO 8601 timestamp"
+    )
+    updated_before = django_filters.IsoDateTimeFilter(
+        field_name='updated_at',
+        lookup_expr='lt',
+        help_text="Updated before this ISO 8601 timestamp"
+    )
+
+    class Meta:
+        model = Planet
+        fields = [
+            'terrains', 'terrains_all', 'climates', 'climates_all',
+            'population_min', 'population_max',
+            'created_after', 'created_before', 'updated_after', 'updated_before',
+        ]
+
+    def filter_any(self, queryset, name, value):
+        values = [item.strip() for item in value if item.strip()]
+        if not values:
+            return queryset
+        return queryset.filter(related_match(Planet._meta.get_field(name), values, queryset.db))
+
+    def filter_all(self, queryset, name, value):
+        # One EXISTS per value; each is answered from the through table indexes
+        relation = Planet._meta.get_field(name)
+        for item in dict.fromkeys(item.strip() for item in value if item.strip()):
+            queryset = queryset.filter(related_match(relation, item, queryset.db))
+        return queryset
@@ -0,0 +1,190 @@
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from django.db import transaction
+
+from .models import Climate, Planet, Terrain, parse_population
+from .services import refresh_relation_names, replace_relations, resolve_names
+from .cache import invalidate
+
+BATCH_SIZE = 1000
+
+
+def clean_field(value):
+    """Clean and validate scalar field values"""
+    if value is None or value == 'unknown' or value == 'n/a':
+        return None
+    return str(value).strip()
+
+
+def process_array_field(value):
+    """Process array fields (terrains, climates)"""
+    if not value or value == 'unknown':
+        return None
+
+    # If it's already a list, return it
+    if isinstance(value, list):
+        return [item.strip() for item in value if item and item.strip()]
+
+    # If it's a string, try to split it
+    if isinstance(value, str):
+        # Split by common delimiters
+        items = []
+        for delimiter in [',', ';', '|']:
+            if delimiter in value:
+                items = [item.strip() for item in value.split(delimiter)]
+                break
+        else:
+            items = [value.strip()]
+
+        return [item for item in items if item and item != 'unknown']
+
+    return None
+
+
+def prepare_planet_data(planet_data):
+    """Prepare scalar planet fields for database storage"""
+    population = clean_field(planet_data.get('population'))
+    return {
+        'population': population,
+        # bulk_create skips Planet.save, so the numeric copy is filled in here
+        'population_count': parse_population(population),
+    }
+
+
+def chunked(items, size=BATCH_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+@dataclass
+class ImportResult:
+    created: list = field(default_factory=list)
+    updated: list = field(default_factory=list)
+    skipped: int = 0
+    total: int = 0
+    timings: dict = field(default_factory=dict)
+
+
+class PlanetImporter:
+    """
+    Import raw planet records with a fixed number of bulk statements per batch.
+
+    The whole payload is normalized in memory first. Terrains and climates are
+    then resolved with one bulk upsert each, planets are upserted on their
+    unique name, and the through tables of the written planets are rewritten
+    with bulk DELETE/INSERT statements.
+    """
+
+    def __init__(self, update=False, batch_size=BATCH_SIZE):
+        self.update = update
+        self.batch_size = batch_size
+
+    def run(self, planets_data):
+        result = ImportResult(total=len(planets_data))
+
+        with self._phase(result, 'normalize'):
+            records = self.normalize(planets_data)
+            result.skipped += len(planets_data) - len(records)
+
+        with transaction.atomic():
+            with self._phase(result, 'lookup'):
+                existing = self._existing_names(records)
+                to_write = {}
+                for name, record in records.items():
+                    if name not in existing:
+                        result.created.append(name)
+                        to_write[name] = record
+                    elif self.update:
+                        result.updated.append(name)
+                        to_write[name] = record
+                    else:
+                        result.skipped += 1
+
+            with self._phase(result, 'relations'):
+                terrains = self._resolve(Terrain, to_write.values(), 'terrains')
+                climates = self._resolve(Climate, to_write.values(), 'climates')
+
+            with self._phase(result, 'planets'):
+                planet_ids = self._upsert_planets(to_write.values())
+
+            with self._phase(result, 'links'):
+                self._write_links('terrains', to_write.values(), planet_ids, terrains, existing)
+                self._write_links('climates', to_write.values(), planet_ids, climates, existing)
+                # Bulk link writes send no m2m_changed, so the names columns are rebuilt here
+                refresh_relation_names(planet_ids.values(), batch_size=self.batch_size)
+
+            # Bulk writes send no model signals, so invalidate cached responses here
+            if to_write:
+                invalidate(Planet, Terrain, Climate)
+
+        return result
+
+    def normalize(self, planets_data):
+        """Return cleaned records keyed by planet name, dropping unnamed planets"""
+        records = {}
+        for planet_data in planets_data:
+            name = (planet_data.get('name') or '').strip()
+            if not name or name.lower() == 'unknown':
+                continue
+            records[name] = {
+                'name': name,
+                'fields': prepare_planet_data(planet_data),
+                'terrains': process_array_field(planet_data.get('terrains')),
+                'climates': process_array_field(planet_data.get('climates')),
+            }
+        return records
+
+    def _existing_names(self, records):
+        existing = set()
+        for names in chunked(records, self.batch_size):
+            existing.update(Planet.objects.filter(name__in=names).values_list('name', flat=True))
+        return existing
+
+    def _resolve(self, model, records, key):
+        names = {name for record in records for name in record[key] or ()}
+        return {obj.name: obj.pk for obj in resolve_names(model, sorted(names))}
+
+    def _upsert_planets(self, records):
+        records = list(records)
+        if not records:
+            return {}
+
+        planets = [Planet(name=record['name'], **record['fields']) for record in records]
+        Planet.objects.bulk_create(
+            planets,
+            batch_size=self.batch_size,
+            update_conflicts=True,
+            unique_fields=['name'],
+            update_fields=[*records[0]['fields'], 'updated_at'],
+        )
+
+        if all(planet.pk for planet in planets):
+            return {planet.name: planet.pk for planet in planets}
+
+        # Backends that cannot return upserted rows need one lookup per batch
+        planet_ids = {}
+        for names in chunked([planet.name for planet in planets], self.batch_size):
+            planet_ids.update(Planet.objects.filter(name__in=names).values_list('name', 'pk'))
+        return planet_ids
+
+    def _write_links(self, field_name, records, planet_ids, target_ids, existing):
+        # Matching the per-planet import, an empty relation leaves stored links alone
+        linked = [record for record in records if record[field_name]]
+        replace_relations(
+            Planet,
+            field_name,
+            {planet_ids[record['name']]: [target_ids[name] for name in record[field_name]] for record in linked},
+            clear=[planet_ids[record['name']] for record in linked if record['name'] in existing],
+            batch_size=self.batch_size,
+        )
+
+    @contextmanager
+    def _phase(self, result, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            result.timings[name] = time.perf_counter() - start
@@ -0,0 +1,237 @@
+import heapq
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+# The RequestMetrics being filled in the current context. sync_to_async runs
+# its function in a copy of the caller's context, so queries the async ORM
+# runs on another thread are recorded too.
+_active_metrics = ContextVar('api_active_metrics', default=())
+
+SERVER_TIMING_HEADER = 'Server-Timing'
+
+DEFAULTS = {
+    'ENABLED': False,
+    # Requests slower than this, or running more queries, are logged
+    'SLOW_REQUEST_MS': 500,
+    'MAX_QUERIES': 50,
+    # Slowest statements included in the log entry
+    'SLOWEST_QUERIES': 3,
+}
+
+
+def get_instrumentation_settings():
+    return {**DEFAULTS, **getattr(settings, 'API_INSTRUMENTATION', {})}
+
+
+class RequestMetrics:
+    """Query count, DB time and the slowest statements seen while tracking, in milliseconds"""
+
+    def __init__(self, keep_slowest=DEFAULTS['SLOWEST_QUERIES']):
+        self.queries = 0
+        self.db_ms = 0.0
+        self.keep_slowest = keep_slowest
+        self._slowest = []
+        # Filled in by InstrumentationMiddleware for rendered (DRF) responses
+        self.view_ms = None
+        self.view_db_ms = 0.0
+        self.render_ms = None
+        self._view_started = None
+
+    def record(self, sql, duration_ms):
+        self.queries += 1
+        self.db_ms += duration_ms
+        if self.keep_slowest:
+            # Min-heap of the slowest statements; the counter breaks ties without comparing SQL
+            entry = (duration_ms, self.queries, sql)
+            if len(self._slowest) < self.keep_slowest:
+                heapq.heappush(self._slowest, entry)
+            elif duration_ms > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    @property
+    def slowest(self):
+        """(duration_ms, sql) pairs, slowest first"""
+        return [(duration, sql) for duration, _, sql in sorted(self._slowest, reverse=True)]
+
+
+def record_queries(execute, sql, params, many, context):
+    """Execute wrapper timing each query for the RequestMetrics active in the context"""
+    active = _active_metrics.get()
+    if not active:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        for metrics in active:
+            metrics.record(sql, duration_ms)
+
+
+def query_recording_enabled():
+    from .metrics import get_metrics_settings
+
+    return get_instrumentation_settings()['ENABLED'] or get_metrics_settings()['ENABLED']
+
+
+def install_query_recorder(connection):
+    # Wrapping each connection once means tracking a block needs no access
+    # to the connections themselves, which may belong to another thread
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_queries)
+
+
+@receiver(connection_created)
+def add_query_recorder(sender, connection, **kwargs):
+    # With instrumentation and metrics both off, queries run unwrapped
+    # unless the connection is opened inside a track_queries() block
+    if _active_metrics.get() or query_recording_enabled():
+        install_query_recorder(connection)
+
+
+@receiver(setting_changed)
+def update_query_recorders(setting, **kwargs):
+    # For override_settings; this thread's open connections predate the change
+    if setting in ('API_INSTRUMENTATION', 'API_METRICS') and query_recording_enabled():
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+
+
+@contextmanager
+def track_queries(metrics=None):
+    """
+    Record every query run on any database connection inside the block.
+
+    Works in sync and async code alike, except for connections another thread
+    opened while API_INSTRUMENTATION and API_METRICS were both off. Yields the RequestMetrics being filled, so tests can assert
+    query budgets:
+
+        with track_queries() as metrics:
+            client.get(url)
+        assert metrics.queries <= 3
+    """
+    metrics = metrics if metrics is not None else RequestMetrics()
+    for connection in connections.all(initialized_only=True):
+        install_query_recorder(connection)
+    token = _active_metrics.set(_active_metrics.get() + (metrics,))
+    try:
+        yield metrics
+    finally:
+        _active_metrics.reset(token)
+
+
+class InstrumentationMiddleware:
+    """
+    Measure query count, DB time, view and render time per request.
+
+    The numbers are sent in a Server-Timing header and kept on
+    response.metrics; requests over API_INSTRUMENTATION's thresholds are logged
+    with their slowest SQL. "serialize" is the time spent in the view outside
+    the database, which for list and retrieve is mostly serialization. Queries
+    run while a streaming response is consumed are not counted. When disabled
+    the middleware only reads its settings.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django would otherwise call the sync hooks through sync_to_async
+            self.process_view = self.aprocess_view
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        options = get_instrumentation_settings()
+        if not options['ENABLED']:
+            return self.get_response(request)
+
+        metrics = RequestMetrics(keep_slowest=options['SLOWEST_QUERIES'])
+        request.metrics = metrics
+        start = time.perf_counter()
+        with track_queries(metrics):
+            response = self.get_response(request)
+        return self.finish(request, response, metrics, options, start)
+
+    async def __acall__(self, request):
+        options = get_instrumentation_settings()
+        if not options['ENABLED']:
+            return await self.get_response(request)
+
+        metrics = RequestMetrics(keep_slowest=options['SLOWEST_QUERIES'])
+        request.metrics = metrics
+        start = time.perf_counter()
+        with track_queries(metrics):
+            response = await self.get_response(request)
+        return self.finish(request, response, metrics, options, start)
+
+    def finish(self, request, response, metrics, options, start):
+        total_ms = (time.perf_counter() - start) * 1000
+
+        timings = [('db', metrics.db_ms, f'{metrics.queries} queries')]
+        if metrics.view_ms is not None:
+            timings.append(('serialize', max(metrics.view_ms - metrics.view_db_ms, 0.0), None))
+        if metrics.render_ms is not None:
+            timings.append(('render', metrics.render_ms, None))
+        timings.append(('total', total_ms, None))
+
+        response[SERVER_TIMING_HEADER] = ', '.join(
+            f'{name};dur={duration:.2f}' + (f';desc="{desc}"' if desc else '')
+            for name, duration, desc in timings
+        )
+        response.metrics = metrics
+
+        if total_ms > options['SLOW_REQUEST_MS'] or metrics.queries > options['MAX_QUERIES']:
+            self.log_slow_request(request, metrics, total_ms)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = getattr(request, 'metrics', None)
+        if metrics is not None:
+            metrics._view_started = (time.perf_counter(), metrics.db_ms)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        return InstrumentationMiddleware.process_view(self, request, view_func, view_args, view_kwargs)
+
+    async def aprocess_template_response(self, request, response):
+        return InstrumentationMiddleware.process_template_response(self, request, response)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after this hook returns
+        metrics = getattr(request, 'metrics', None)
+        if metrics is None or metrics._view_started is None:
+            return response
+        started = metrics._view_started
+        metrics.view_ms = (time.perf_counter() - started[0]) * 1000
+        metrics.view_db_ms = metrics.db_ms - started[1]
+
+        render_started = time.perf_counter()
+
+        def finished_rendering(rendered):
+            metrics.render_ms = (time.perf_counter() - render_started) * 1000
+
+        response.add_post_render_callback(finished_rendering)
+        return response
+
+    def log_slow_request(self, request, metrics, total_ms):
+        slowest = '\n'.join(f'  {duration:.2f}ms {sql}' for duration, sql in metrics.slowest)
+        logger.warning(
+            "Slow request %s %s: %.2fms total, %d queries, %.2fms in the database\n%s",
+            request.method, request.get_full_path(), total_ms, metrics.queries, metrics.db_ms, slowest,
+        )
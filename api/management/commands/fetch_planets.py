@@ -1,12 +1,12 @@
 from django.core.management.base import BaseCommand
-from django.db import transaction
 import requests
 import json
 import random
 import time
 
 import requests.adapters
-from api.models import Climate, Planet, Terrain
+from api.importers import PlanetImporter, clean_field, prepare_planet_data, process_array_field
+from api.metrics import record_import
 from urllib3.util.retry import Retry
 
 class Command(BaseCommand):
@@ -49,63 +49,46 @@ class Command(BaseCommand):
 
             if not data:
                 self.stdout.write(self.style.ERROR("Failed to fetch data after all retry attempts"))
+                record_import(None)
                 return
             
             planets_data = data['data']['allPlanets']['planets']
             self.stdout.write(f"Retrieved {len(planets_data)} planets")
             
-            # Process and save planets
-            created_count = 0
-            updated_count = 0
-            skipped_count = 0
-            
-            with transaction.atomic():
-                for planet_data in planets_data:
-                    planet_name = planet_data.get('name', '').strip()
-                    
-                    if not planet_name or planet_name.lower() == 'unknown':
-                        skipped_count += 1
-                        continue
-                    
-                    # Check if planet exists
-                    planet, created = Planet.objects.get_or_create(
-                        name=planet_name,
-                        defaults=self._prepare_planet_data(planet_data)
-                    )
-                    
-                    if created:
-                        created_count += 1
-                        self.stdout.write(f"Created: {planet_name}")
-                        self._set_planet_relationships(planet, planet_data)
-                    elif options['update']:
-                        # Update existing planet
-                        for field, value in self._prepare_planet_data(planet_data).items():
-                            setattr(planet, field, value)
-                        planet.save()
-                        self._set_planet_relationships(planet, planet_data)
-                        updated_count += 1
-                        self.stdout.write(f"Updated: {planet_name}")
-                    else:
-                        skipped_count += 1
+            # Normalize the payload and write it with bulk statements
+            result = PlanetImporter(update=options['update']).run(planets_data)
+
+        except requests.RequestException as e:
+            record_import(None)
+            self.stdout.write(
+                self.style.ERROR(f"Network error: {e}")
+            )
+        except Exception as e:
+            record_import(None)
+            self.stdout.write(
+                self.style.ERROR(f"Unexpected error: {e}")
+            )
+        else:
+            # Outside the try, so a run is recorded as succeeded or failed, never both
+            record_import(result)
+
+            for planet_name in result.created:
+                self.stdout.write(f"Created: {planet_name}")
+            for planet_name in result.updated:
+                self.stdout.write(f"Updated: {planet_name}")
             
             # Print summary
             self.stdout.write(
                 self.style.SUCCESS(
                     f"\nSummary:\n"
-                    f"Created: {created_count}\n"
-                    f"Updated: {updated_count}\n"
-                    f"Skipped: {skipped_count}\n"
-                    f"Total processed: {len(planets_data)}"
+                    f"Created: {len(result.created)}\n"
+                    f"Updated: {len(result.updated)}\n"
+                    f"Skipped: {result.skipped}\n"
+                    f"Total processed: {result.total}"
                 )
             )
-            
-        except requests.RequestException as e:
-            self.stdout.write(
-                self.style.ERROR(f"Network error: {e}")
-            )
-        except Exception as e:
             self.stdout.write(
-                self.style.ERROR(f"Unexpected error: {e}")
+                "Timings: " + ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in result.timings.items())
             )
 
     def _make_request_with_retry(self, url, retries=3, timeout=30):
@@ -176,33 +159,11 @@ class Command(BaseCommand):
     
     def _prepare_planet_data(self, planet_data):
         """Prepare planet data for database storage"""
-        return {
-            'population': self._clean_field(planet_data.get('population'))
-        }
-    
-    def _set_planet_relationships(self, planet, planet_data):
-
-        terrains = self._process_array_field(planet_data.get('terrains'))
-        if terrains:
-            terrain_objects = []
-            for terrain_name in terrains:
-                terrain, _ = Terrain.objects.get_or_create(name=terrain_name)
-                terrain_objects.append(terrain)
-            planet.terrains.set(terrain_objects)
-
-        climates = self._process_array_field(planet_data.get('climates'))
-        if climates:
-            climate_objects = []
-            for climate_name in climates:
-                climate, _ = Climate.objects.get_or_create(name=climate_name)
-                climate_objects.append(climate)
-            planet.climates.set(climate_objects)
+        return prepare_planet_data(planet_data)
     
     def _clean_field(self, value):
         """Clean and validate field values"""
-        if value is None or value == 'unknown' or value == 'n/a':
-            return None
-        return str(value).strip()
+        return clean_field(value)
     
     def _wait_with_backoff(self, attempt):
         wait_time = (2 ** attempt) + random.uniform(0.1, 0.5)  # Exponential backoff
@@ -219,24 +180,4 @@ class Command(BaseCommand):
     
     def _process_array_field(self, value):
         """Process array fields (terrains, climates)"""
-        if not value or value == 'unknown':
-            return None
-        
-        # If it's already a list, return it
-        if isinstance(value, list):
-            return [item.strip() for item in value if item and item.strip()]
-        
-        # If it's a string, try to split it
-        if isinstance(value, str):
-            # Split by common delimiters
-            items = []
-            for delimiter in [',', ';', '|']:
-                if delimiter in value:
-                    items = [item.strip() for item in value.split(delimiter)]
-                    break
-            else:
-                items = [value.strip()]
-            
-            return [item for item in items if item and item != 'unknown']
-        
-        return None
\ No newline at end of file
+        return process_array_field(value)
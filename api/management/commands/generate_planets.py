@@ -0,0 +1,214 @@
+import csv
+import io
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from api.cache import invalidate
+from api.importers import BATCH_SIZE, PlanetImporter
+from api.models import Climate, Planet, Terrain, sorted_names
+from api.services import replace_relations, resolve_names
+
+# Relative weights, roughly following how often SWAPI uses each name
+TERRAINS = {
+    'desert': 10, 'mountains': 9, 'grasslands': 8, 'forests': 6, 'plains': 5, 'oceans': 5,
+    'jungle': 4, 'hills': 4, 'lakes': 4, 'swamp': 3, 'tundra': 3, 'rainforests': 3, 'barren': 3,
+    'ice caves': 2, 'rocky islands': 2, 'gas giant': 2, 'cityscape': 2, 'volcanoes': 2,
+    'savannas': 2, 'canyons': 2, 'caves': 1, 'cliffs': 1, 'reefs': 1, 'glaciers': 1,
+}
+CLIMATES = {
+    'temperate': 12, 'arid': 6, 'tropical': 5, 'frozen': 4, 'hot': 3, 'murky': 2, 'humid': 2,
+    'windy': 2, 'artificial temperate': 1, 'polluted': 1, 'superheated': 1, 'subarctic': 1,
+    'moist': 1, 'frigid': 1,
+}
+# How many terrains/climates a planet gets, by weight
+TERRAIN_COUNTS = {1: 45, 2: 35, 3: 20}
+CLIMATE_COUNTS = {1: 75, 2: 25}
+UNKNOWN_POPULATION_RATE = 0.1
+
+CHUNK_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = 'Generate a reproducible synthetic planet dataset for load and scale testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('count', type=int, help='Number of planets to create')
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed; the same seed and count always produce the same planets (default: 0)'
+        )
+        parser.add_argument(
+            '--prefix',
+            default='Synthetic',
+            help='Planet names are "<prefix> <n>" (default: Synthetic)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CHUNK_SIZE,
+            help=f'Planets generated and written per transaction (default: {CHUNK_SIZE})'
+        )
+        parser.add_argument(
+            '--method',
+            choices=['auto', 'bulk', 'copy'],
+            default='auto',
+            help='bulk inserts, or PostgreSQL COPY; auto picks COPY on PostgreSQL (default: auto)'
+        )
+
+    def handle(self, *args, **options):
+        count, prefix, chunk_size = options['count'], options['prefix'], options['chunk_size']
+        if count < 1 or chunk_size < 1:
+            raise CommandError('count and --chunk-size must be positive')
+
+        connection = connections[router.db_for_write(Planet)]
+        method = options['method']
+        if method == 'auto':
+            method = 'copy' if connection.vendor == 'postgresql' else 'bulk'
+        if method == 'copy' and connection.vendor != 'postgresql':
+            raise CommandError('--method copy requires PostgreSQL')
+
+        if Planet.objects.filter(name__startswith=f'{prefix} ').exists():
+            raise CommandError(f'Planets named "{prefix} <n>" already exist; pass another --prefix')
+
+        terrain_ids = {obj.name: obj.pk for obj in resolve_names(Terrain, sorted(TERRAINS))}
+        climate_ids = {obj.name: obj.pk for obj in resolve_names(Climate, sorted(CLIMATES))}
+        write = self.write_copy if method == 'copy' else self.write_bulk
+
+        rng = random.Random(options['seed'])
+        importer = PlanetImporter()
+        self.stdout.write(f"Generating {count} planets with {method} writes...")
+        start = time.perf_counter()
+
+        for offset in range(0, count, chunk_size):
+            raw = [self.raw_planet(rng, f'{prefix} {n}') for n in range(offset + 1, min(offset + chunk_size, count) + 1)]
+            # The same cleaning fetch_planets applies to SWAPI data
+            records = list(importer.normalize(raw).values())
+            with transaction.atomic(using=connection.alias):
+                write(connection, records, terrain_ids, climate_ids)
+
+            written = offset + len(records)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"  {written}/{count} planets ({written / elapsed:.0f}/s)")
+
+        invalidate(Planet, Terrain, Climate)
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {count} planets in {time.perf_counter() - start:.1f}s"
+        ))
+
+    def raw_planet(self, rng, name):
+        """A planet shaped like a SWAPI record, with comma separated terrains and climates"""
+        if rng.random() < UNKNOWN_POPULATION_RATE:
+            population = 'unknown'
+        else:
+            # Log-uniform between a thousand and a trillion
+            population = str(int(10 ** rng.uniform(3, 12)))
+        return {
+            'name': name,
+            'population': population,
+            'terrains': ', '.join(self.pick(rng, TERRAINS, TERRAIN_COUNTS)),
+            'climates': ', '.join(self.pick(rng, CLIMATES, CLIMATE_COUNTS)),
+        }
+
+    def pick(self, rng, weights, counts):
+        wanted = rng.choices(list(counts), weights=list(counts.values()))[0]
+        names = {}
+        while len(names) < wanted:
+            names[rng.choices(list(weights), weights=list(weights.values()))[0]] = None
+        return list(names)
+
+    def write_bulk(self, connection, records, terrain_ids, climate_ids):
+        planets = [
+            Planet(
+                name=record['name'],
+                terrain_names=sorted_names(record['terrains'] or ()),
+                climate_names=sorted_names(record['climates'] or ()),
+                **record['fields'],
+            )
+            for record in records
+        ]
+        Planet.objects.using(connection.alias).bulk_create(planets, batch_size=BATCH_SIZE)
+
+        if not all(planet.pk for planet in planets):
+            # Backends that cannot return inserted ids
+            planet_ids = dict(
+                Planet.objects.using(connection.alias)
+                .filter(name__in=[planet.name for planet in planets])
+                .values_list('name', 'pk')
+            )
+            for planet in planets:
+                planet.pk = planet_ids[planet.name]
+
+        self.write_links(records, [planet.pk for planet in planets], terrain_ids, climate_ids)
+
+    def write_copy(self, connection, records, terrain_ids, climate_ids):
+        table = Planet._meta.db_table
+        now = timezone.now().isoformat()
+        with connection.cursor() as cursor:
+            # Reserve ids up front so the link rows can be copied too
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+                [table, len(records)],
+            )
+            planet_ids = [row[0] for row in cursor.fetchall()]
+
+            self.copy(cursor, table, (
+                'id', 'name', 'population', 'population_count', 'terrain_names', 'climate_names',
+                'created_at', 'updated_at',
+            ), (
+                (
+                    pk, record['name'], record['fields']['population'], record['fields']['population_count'],
+                    json.dumps(sorted_names(record['terrains'] or ())), json.dumps(sorted_names(record['climates'] or ())),
+                    now, now,
+                )
+                for pk, record in zip(planet_ids, records)
+            ))
+
+            for field_name, target_ids in (('terrains', terrain_ids), ('climates', climate_ids)):
+                field = Planet._meta.get_field(field_name)
+                self.copy(
+                    cursor,
+                    field.remote_field.through._meta.db_table,
+                    (field.m2m_column_name(), field.m2m_reverse_name()),
+                    (
+                        (pk, target_ids[name])
+                        for pk, record in zip(planet_ids, records)
+                        for name in dict.fromkeys(record[field_name] or ())
+                    ),
+                )
+
+    def copy(self, cursor, table, columns, rows):
+        """COPY rows into table as CSV, where an unquoted empty value is NULL"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows(rows)
+        quote_name = cursor.db.ops.quote_name
+        sql = 'COPY {} ({}) FROM STDIN WITH (FORMAT csv)'.format(
+            quote_name(table), ', '.join(quote_name(column) for column in columns)
+        )
+        buffer.seek(0)
+        if hasattr(cursor.cursor, 'copy_expert'):
+            # psycopg2
+            cursor.cursor.copy_expert(sql, buffer)
+        else:
+            # psycopg 3
+            with cursor.cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+    def write_links(self, records, planet_ids, terrain_ids, climate_ids):
+        for field_name, target_ids in (('terrains', terrain_ids), ('climates', climate_ids)):
+            replace_relations(
+                Planet,
+                field_name,
+                {
+                    pk: [target_ids[name] for name in record[field_name] or ()]
+                    for pk, record in zip(planet_ids, records)
+                },
+                batch_size=BATCH_SIZE,
+            )
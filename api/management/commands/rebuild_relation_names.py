@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from api.importers import BATCH_SIZE
+from api.models import Planet
+from api.services import refresh_relation_names
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized terrain/climate names stored on every planet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Planets rewritten per batch (default: {BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        planet_ids = list(Planet.objects.order_by('pk').values_list('pk', flat=True))
+        self.stdout.write(f"Rebuilding relation names for {len(planet_ids)} planets...")
+
+        refresh_relation_names(planet_ids, batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt relation names for {len(planet_ids)} planets"))
@@ -0,0 +1,295 @@
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .cache import get_cache_stats
+from .instrumentation import RequestMetrics, track_queries
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULTS = {
+    'ENABLED': False,
+    # Shared directory for multi-worker deployments; every process writes its
+    # own snapshot there and a scrape merges them
+    'MULTIPROCESS_DIR': None,
+    # Longest a worker's updates wait before reaching its snapshot
+    'FLUSH_INTERVAL': 1.0,
+}
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name: (type, help, histogram buckets)
+METRICS = {
+    'api_requests_total': (
+        'counter', 'Requests served, by view, method and status code.', None),
+    'api_request_duration_seconds': (
+        'histogram', 'Request latency in seconds, by view and method.', LATENCY_BUCKETS),
+    'api_db_queries_total': (
+        'counter', 'Database queries run while serving requests, by view and method.', None),
+    'api_db_duration_seconds_total': (
+        'counter', 'Seconds spent in the database while serving requests, by view and method.', None),
+    'api_import_runs_total': (
+        'counter', 'fetch_planets runs, by status.', None),
+    'api_import_planets_total': (
+        'counter', 'Planets processed by fetch_planets, by outcome.', None),
+    'api_import_phase_seconds_total': (
+        'counter', 'Seconds spent in each fetch_planets import phase.', None),
+    'api_import_last_success_timestamp_seconds': (
+        'gauge', 'Unix time of the last successful fetch_planets run.', None),
+}
+
+# Gauges merge across processes by their maximum, everything else by sum
+GAUGES = frozenset(name for name, (kind, _, _) in METRICS.items() if kind == 'gauge')
+
+HTTP_METHODS = frozenset(['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'])
+
+
+def get_metrics_settings():
+    return {**DEFAULTS, **getattr(settings, 'API_METRICS', {})}
+
+
+def _label_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+class MetricsRegistry:
+    """
+    In-process counters, gauges and histograms.
+
+    Updates take one short lock. With a directory, a daemon thread writes the
+    process's samples to its own file at most every flush_interval seconds, and
+    collect() merges the files of every process that wrote one. A forked child
+    starts from empty samples and its own file.
+    """
+
+    def __init__(self, directory=None, flush_interval=DEFAULTS['FLUSH_INTERVAL']):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._samples = defaultdict(float)
+        self._dirty = False
+        self._flusher = None
+        # Unique per process, so a reused pid never overwrites a dead worker's counts
+        self._filename = f'{self._pid}-{uuid.uuid4().hex}.json'
+
+    def inc(self, name, labels=None, amount=1):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._before_update()
+            self._samples[key] += amount
+
+    def set_max(self, name, value, labels=None):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._before_update()
+            self._samples[key] = max(self._samples.get(key, value), value)
+
+    def observe(self, name, value, labels=None):
+        buckets = METRICS[name][2]
+        labels = _label_key(labels)
+        # Buckets are stored per interval and made cumulative when exposed
+        index = bisect_left(buckets, value)
+        le = _format_value(buckets[index]) if index < len(buckets) else '+Inf'
+        with self._lock:
+            self._before_update()
+            self._samples[(f'{name}_bucket', labels + (('le', le),))] += 1
+            self._samples[(f'{name}_sum', labels)] += value
+            self._samples[(f'{name}_count', labels)] += 1
+
+    def _before_update(self):
+        # Called with the lock held
+        if os.getpid() != self._pid:
+            self._reset()
+        if self.directory:
+            self._dirty = True
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_periodically, name='api-metrics', daemon=True)
+                self._flusher.start()
+
+    def _flush_periodically(self):
+        pid = self._pid
+        while os.getpid() == pid:
+            time.sleep(self.flush_interval)
+            if self._dirty:
+                self.flush()
+
+    def flush(self):
+        """Write this process's samples to the shared directory"""
+        if not self.directory:
+            return
+        with self._lock:
+            if os.getpid() != self._pid:
+                self._reset()
+            rows = [[name, [list(pair) for pair in labels], value] for (name, labels), value in self._samples.items()]
+            self._dirty = False
+            filename = self._filename
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, filename)
+        with open(f'{path}.tmp', 'w') as handle:
+            json.dump(rows, handle)
+        os.replace(f'{path}.tmp', path)
+
+    def collect(self):
+        """Return {(sample name, labels): value} across every process"""
+        if not self.directory:
+            with self._lock:
+                return dict(self._samples)
+
+        self.flush()
+        merged = {}
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                with open(entry.path) as handle:
+                    rows = json.load(handle)
+            except (OSError, ValueError):
+                # Removed or replaced while listing
+                continue
+            for name, labels, value in rows:
+                key = (name, tuple(tuple(pair) for pair in labels))
+                if name in GAUGES:
+                    merged[key] = max(merged.get(key, value), value)
+                else:
+                    merged[key] = merged.get(key, 0) + value
+        return merged
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                options = get_metrics_settings()
+                _registry = MetricsRegistry(options['MULTIPROCESS_DIR'], options['FLUSH_INTERVAL'])
+                atexit.register(_registry.flush)
+    return _registry
+
+
+def _format_value(value):
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_sample(name, labels, value):
+    if labels:
+        name += '{' + ','.join(f'{key}="{_escape(label)}"' for key, label in labels) + '}'
+    return f'{name} {_format_value(value)}'
+
+
+def render_metrics(samples):
+    """Prometheus text exposition of collected samples, plus the response cache counters"""
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        if kind != 'histogram':
+            lines += [_format_sample(name, labels, value)
+                      for (sample, labels), value in sorted(samples.items()) if sample == name]
+            continue
+
+        for (sample, labels), count in sorted(samples.items()):
+            if sample != f'{name}_count':
+                continue
+            cumulative = 0
+            for le in [_format_value(bound) for bound in buckets] + ['+Inf']:
+                cumulative += samples.get((f'{name}_bucket', labels + (('le', le),)), 0)
+                lines.append(_format_sample(f'{name}_bucket', labels + (('le', le),), cumulative))
+            lines.append(_format_sample(f'{name}_sum', labels, samples.get((f'{name}_sum', labels), 0)))
+            lines.append(_format_sample(f'{name}_count', labels, count))
+
+    stats = get_cache_stats()
+    for outcome in ('hits', 'misses'):
+        name = f'api_response_cache_{outcome}_total'
+        lines += [
+            f'# HELP {name} Response cache {outcome}, shared by every worker using the cache.',
+            f'# TYPE {name} counter',
+            _format_sample(name, (), stats[outcome]),
+        ]
+    return '\n'.join(lines) + '\n'
+
+
+def record_request(view, method, status_code, seconds, queries):
+    registry = get_registry()
+    method = method if method in HTTP_METHODS else 'other'
+    labels = {'view': view, 'method': method}
+    registry.inc('api_requests_total', {**labels, 'status': str(status_code)})
+    registry.observe('api_request_duration_seconds', seconds, labels)
+    registry.inc('api_db_queries_total', labels, queries.queries)
+    registry.inc('api_db_duration_seconds_total', labels, queries.db_ms / 1000)
+
+
+def record_import(result=None):
+    """Count a fetch_planets run; pass None for a run that failed before importing"""
+    registry = get_registry()
+    if result is None:
+        registry.inc('api_import_runs_total', {'status': 'failed'})
+    else:
+        registry.inc('api_import_runs_total', {'status': 'succeeded'})
+        for outcome, count in (('created', len(result.created)), ('updated', len(result.updated)),
+                               ('skipped', result.skipped)):
+            registry.inc('api_import_planets_total', {'outcome': outcome}, count)
+        for phase, seconds in result.timings.items():
+            registry.inc('api_import_phase_seconds_total', {'phase': phase}, seconds)
+        registry.set_max('api_import_last_success_timestamp_seconds', time.time())
+    # Management commands exit right away, so do not wait for the flusher
+    registry.flush()
+
+
+class MetricsMiddleware:
+    """Count requests, their latency and their database queries per view and method"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not get_metrics_settings()['ENABLED']:
+            return self.get_response(request)
+
+        queries = RequestMetrics(keep_slowest=0)
+        start = time.perf_counter()
+        with track_queries(queries):
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start, queries)
+        return response
+
+    async def __acall__(self, request):
+        if not get_metrics_settings()['ENABLED']:
+            return await self.get_response(request)
+
+        queries = RequestMetrics(keep_slowest=0)
+        start = time.perf_counter()
+        with track_queries(queries):
+            response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - start, queries)
+        return response
+
+    def record(self, request, response, seconds, queries):
+        match = request.resolver_match
+        record_request(match.view_name if match else 'unmatched', request.method, response.status_code, seconds, queries)
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-17 10:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='climate',
+            index=models.Index(fields=['created_at', 'id'], name='api_climate_created_ec477f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='climate',
+            index=models.Index(fields=['updated_at', 'id'], name='api_climate_updated_ae7761_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='planet',
+            index=models.Index(fields=['created_at', 'id'], name='api_planet_created_ce6032_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='planet',
+            index=models.Index(fields=['updated_at', 'id'], name='api_planet_updated_4947c1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='terrain',
+            index=models.Index(fields=['created_at', 'id'], name='api_terrain_created_a4f0a8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='terrain',
+            index=models.Index(fields=['updated_at', 'id'], name='api_terrain_updated_d5442e_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.1 on 2026-10-17 10:10
+
+from django.db import migrations, models
+
+MAX_POPULATION = 2 ** 63 - 1
+
+
+def parse_population(value):
+    # Frozen copy of api.models.parse_population
+    if value is None:
+        return None
+    digits = str(value).strip().replace(',', '').replace('_', '').replace(' ', '')
+    if not (digits.isascii() and digits.isdigit()):
+        return None
+    count = int(digits)
+    return count if count <= MAX_POPULATION else None
+
+
+def populate_population_count(apps, schema_editor):
+    Planet = apps.get_model('api', 'Planet')
+    batch = []
+    for planet in Planet.objects.exclude(population=None).only('id', 'population').iterator(chunk_size=2000):
+        planet.population_count = parse_population(planet.population)
+        if planet.population_count is not None:
+            batch.append(planet)
+        if len(batch) >= 2000:
+            Planet.objects.bulk_update(batch, ['population_count'])
+            batch = []
+    if batch:
+        Planet.objects.bulk_update(batch, ['population_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='planet',
+            name='population_count',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(populate_population_count, migrations.RunPython.noop),
+    ]
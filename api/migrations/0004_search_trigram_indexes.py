@@ -0,0 +1,39 @@
+from django.db import migrations
+
+# (index name, table, column) for every column used by the search backend
+TRIGRAM_INDEXES = [
+    ('api_planet_name_trgm', 'api_planet', 'name'),
+    ('api_planet_population_trgm', 'api_planet', 'population'),
+    ('api_terrain_name_trgm', 'api_terrain', 'name'),
+    ('api_climate_name_trgm', 'api_climate', 'name'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # pg_trgm only exists on PostgreSQL; other backends use the in-process index
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        # Matches the UPPER(col::text) expression Django emits for icontains
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ((UPPER({column}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_planet_population_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
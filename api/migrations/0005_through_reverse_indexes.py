@@ -0,0 +1,24 @@
+from django.db import migrations
+
+# Auto-created through tables are keyed on (planet_id, target_id); these
+# composite indexes serve lookups that start from the terrain or climate side
+# (relation filters, facets, the planets actions) without touching the heap
+THROUGH_INDEXES = [
+    ('api_planet_terrains_terrain_planet_idx', 'api_planet_terrains', 'terrain_id', 'planet_id'),
+    ('api_planet_climates_climate_planet_idx', 'api_planet_climates', 'climate_id', 'planet_id'),
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({target}, {source})',
+            f'DROP INDEX IF EXISTS {name}',
+        )
+        for name, table, target, source in THROUGH_INDEXES
+    ]
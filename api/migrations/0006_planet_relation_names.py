@@ -0,0 +1,77 @@
+from collections import defaultdict
+
+from django.db import migrations, models
+
+# (index name, column) of the containment indexes created on PostgreSQL
+GIN_INDEXES = [
+    ('api_planet_terrain_names_gin', 'terrain_names'),
+    ('api_planet_climate_names_gin', 'climate_names'),
+]
+
+BATCH_SIZE = 1000
+
+
+def sorted_names(names):
+    # Frozen copy of api.models.sorted_names
+    return sorted(set(names))
+
+
+def backfill_relation_names(apps, schema_editor):
+    Planet = apps.get_model('api', 'Planet')
+    planet_ids = list(Planet.objects.values_list('pk', flat=True))
+
+    for start in range(0, len(planet_ids), BATCH_SIZE):
+        batch = planet_ids[start:start + BATCH_SIZE]
+        names = {pk: defaultdict(list) for pk in batch}
+        for field_name, attname, target in (('terrains', 'terrain_names', 'terrain'),
+                                            ('climates', 'climate_names', 'climate')):
+            through = Planet._meta.get_field(field_name).remote_field.through
+            rows = through.objects.filter(planet_id__in=batch).values_list('planet_id', f'{target}__name')
+            for pk, name in rows.order_by():
+                names[pk][attname].append(name)
+
+        Planet.objects.bulk_update(
+            [Planet(pk=pk, terrain_names=sorted_names(values['terrain_names']),
+                    climate_names=sorted_names(values['climate_names']))
+             for pk, values in names.items()],
+            ['terrain_names', 'climate_names'],
+        )
+
+
+def create_gin_indexes(apps, schema_editor):
+    # jsonb containment (@>) is only indexable on PostgreSQL
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, column in GIN_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON api_planet USING gin ({column} jsonb_path_ops)'
+        )
+
+
+def drop_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _ in GIN_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_through_reverse_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='planet',
+            name='terrain_names',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='planet',
+            name='climate_names',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+        migrations.RunPython(backfill_relation_names, migrations.RunPython.noop),
+        migrations.RunPython(create_gin_indexes, drop_gin_indexes),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-17 11:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_planet_relation_names'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100, unique=True)),
+                ('deleted_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -1,22 +1,70 @@
 from django.db import models
 
+# Largest value a BigIntegerField can hold
+MAX_POPULATION = 2 ** 63 - 1
+
+
+def parse_population(value):
+    """Parse a free-form population string into an integer, or None when it is not a count"""
+    if value is None:
+        return None
+    digits = str(value).strip().replace(',', '').replace('_', '').replace(' ', '')
+    if not (digits.isascii() and digits.isdigit()):
+        return None
+    count = int(digits)
+    return count if count <= MAX_POPULATION else None
+
+# Planet relations and the columns holding their denormalized names
+RELATION_NAME_FIELDS = {
+    'terrains': 'terrain_names',
+    'climates': 'climate_names',
+}
+
+
+def sorted_names(names):
+    """
+    Order related names as the denormalized columns store them.
+
+    Sorted in Python rather than by the database, whose collation depends on
+    the backend and locale, so every write path stores the same list.
+    """
+    return sorted(set(names))
+
 class BaseModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         abstract = True
+        # Back keyset pagination on the timestamp ordering fields
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['updated_at', 'id']),
+        ]
 
 class Planet(BaseModel):
     name = models.CharField(max_length=200, unique=True)
     population = models.CharField(max_length=50, null=True, blank=True)
+    # Numeric copy of population used for range filters and ordering
+    population_count = models.BigIntegerField(null=True, blank=True, db_index=True, editable=False)
     terrains = models.ManyToManyField('Terrain', blank=True)
     climates = models.ManyToManyField('Climate', blank=True)
+    # Sorted copies of the related names, maintained by api.signals and the
+    # bulk write paths, so planets render without touching the relations
+    terrain_names = models.JSONField(default=list, blank=True, editable=False)
+    climate_names = models.JSONField(default=list, blank=True, editable=False)
 
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        self.population_count = parse_population(self.population)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'population' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'population_count'}
+        super().save(*args, **kwargs)
     
-    class Meta:
+    class Meta(BaseModel.Meta):
         ordering = ['name']
 
 class Terrain(BaseModel):
@@ -24,7 +72,7 @@ class Terrain(BaseModel):
 
     def __str__(self):
         return self.name
-    class Meta:
+    class Meta(BaseModel.Meta):
         ordering = ['name']
 class Climate(BaseModel):
     name = models.CharField(max_length=100, unique=True)
@@ -32,5 +80,14 @@ class Climate(BaseModel):
     def __str__(self):
         return self.name
     
-    class Meta:
-        ordering = ['name']
\ No newline at end of file
+    class Meta(BaseModel.Meta):
+        ordering = ['name']
+
+
+class Tombstone(models.Model):
+    """When rows of a model were last deleted, for the list validators in api.conditional"""
+    model = models.CharField(max_length=100, unique=True)
+    deleted_at = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.model} {self.deleted_at}'
@@ -0,0 +1,181 @@
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination on (ordering field, id) with opaque cursors.
+
+    Each page is fetched with a WHERE clause on the last seen key instead of an
+    OFFSET, and no COUNT is run, so the cost of a page does not depend on how
+    deep it is. Any single-field ordering chosen by OrderingFilter is supported.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.field_name, self.descending = self.get_ordering(queryset)
+        self.model_field = self.get_model_field(queryset.model, self.field_name)
+        self.tiebreak = not self.model_field.unique or self.model_field.null
+
+        cursor = self.decode_cursor(request)
+        backwards = cursor is not None and cursor['d'] == 'prev'
+
+        queryset = queryset.order_by(*self.get_order_by(reverse=backwards))
+        if cursor is not None:
+            queryset = queryset.filter(self.get_key_filter(cursor['v'], cursor['id'], reverse=backwards))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if backwards:
+            results.reverse()
+
+        self.next_key = self.previous_key = None
+        if results:
+            if has_more or backwards:
+                self.next_key = self.get_key(results[-1])
+            if cursor is not None and (has_more or not backwards):
+                self.previous_key = self.get_key(results[0])
+
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_link(self.next_key, 'next'),
+            'previous': self.get_link(self.previous_key, 'prev'),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_ordering(self, queryset):
+        ordering = queryset.query.order_by or queryset.model._meta.ordering or ['pk']
+        first = ordering[0]
+        if not isinstance(first, str):
+            raise NotFound('Keyset pagination requires ordering by a model field.')
+        return first.lstrip('-'), first.startswith('-')
+
+    def get_model_field(self, model, field_name):
+        if field_name == 'pk':
+            return model._meta.pk
+        try:
+            return model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            raise NotFound('Keyset pagination requires ordering by a model field.')
+
+    def get_order_by(self, reverse=False):
+        descending = self.descending != reverse
+        # Nulls always sort last in page order; non-null columns keep plain
+        # ORDER BY clauses so the (field, id) indexes can serve them
+        nulls = {}
+        if self.model_field.null:
+            nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+        field = F(self.model_field.attname)
+        order_by = [field.desc(**nulls) if descending else field.asc(**nulls)]
+        if self.tiebreak:
+            order_by.append(F('pk').desc() if descending else F('pk').asc())
+        return order_by
+
+    def get_key_filter(self, value, pk, reverse=False):
+        """Build the WHERE clause selecting rows after (value, pk) in page order"""
+        field = self.model_field.attname
+        after = 'lt' if self.descending != reverse else 'gt'
+        nullable = self.model_field.null
+
+        if value is None:
+            # Nulls sort last, so walking forward only more nulls remain
+            if reverse:
+                return Q(**{f'{field}__isnull': False}) | Q(**{f'{field}__isnull': True, f'pk__{after}': pk})
+            return Q(**{f'{field}__isnull': True, f'pk__{after}': pk})
+
+        condition = Q(**{f'{field}__{after}': value})
+        if self.tiebreak:
+            condition |= Q(**{field: value, f'pk__{after}': pk})
+        if nullable and not reverse:
+            condition |= Q(**{f'{field}__isnull': True})
+        return condition
+
+    def get_key(self, item):
+        if isinstance(item, dict):
+            value, pk = item.get(self.model_field.attname), item.get('id', item.get('pk'))
+        else:
+            value, pk = getattr(item, self.model_field.attname), item.pk
+        if value is None:
+            return None, pk
+        return self.model_field.value_to_string(_KeyHolder(self.model_field.attname, value)), pk
+
+    def get_link(self, key, direction):
+        if key is None:
+            return None
+        value, pk = key
+        payload = {'f': self.field_name, 'o': self.descending, 'v': value, 'id': pk, 'd': direction}
+        encoded = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+        url = remove_query_param(self.request.build_absolute_uri(), 'page')
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            if payload['f'] != self.field_name or payload['o'] != self.descending or payload['d'] not in ('next', 'prev'):
+                raise ValueError
+            raw = payload['v']
+            payload['v'] = None if raw is None else self.model_field.to_python(raw)
+            payload['id'] = int(payload['id'])
+        except (TypeError, ValueError, KeyError, DjangoValidationError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return payload
+
+
+class _KeyHolder:
+    """Minimal object for Field.value_to_string, which reads values by attribute"""
+
+    def __init__(self, attname, value):
+        setattr(self, attname, value)
+
+
+class OptionalKeysetPagination(PageNumberPagination):
+    """
+    Page number pagination by default, switching to keyset pagination when a
+    request passes ?pagination=keyset or follows a keyset cursor.
+    """
+    mode_query_param = 'pagination'
+    keyset_class = KeysetPagination
+
+    def is_keyset_request(self, request):
+        return request.query_params.get(self.mode_query_param) == 'keyset' or \
+            self.keyset_class.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.is_keyset_request(request):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
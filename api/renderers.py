@@ -0,0 +1,100 @@
+import codecs
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+# U+2028/U+2029 are valid JSON but not valid JavaScript; DRF escapes them
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+def fast_json_available():
+    return orjson is not None and getattr(settings, 'API_FAST_JSON', True)
+
+
+def _default(obj):
+    # Everything orjson does not serialize itself goes through DRF's encoder,
+    # so lazy strings, Decimals, UUIDs and datetimes render exactly as before
+    return JSONEncoder().default(obj)
+
+
+def dumps(data):
+    """Serialize to compact UTF-8 JSON bytes, shaped like DRF's compact JSONRenderer output"""
+    # Datetimes are passed through to DRF's encoder because orjson keeps
+    # microseconds where DRF truncates to milliseconds
+    content = orjson.dumps(data, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    for raw, escaped in LINE_SEPARATORS:
+        if raw in content:
+            content = content.replace(raw, escaped)
+    return content
+
+
+def drops_values(data, content):
+    """
+    Whether orjson wrote a value as null that DRF would have rejected.
+
+    orjson writes NaN and Infinity as null where STRICT_JSON raises, and
+    leaves nothing else behind, so output with a null is read back and
+    compared with the data. Values that do not survive the round trip as
+    they are (Decimals, tuples, ...) are sent to the stdlib renderer too.
+    """
+    return b'null' in content and orjson.loads(content) != data
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that uses orjson when it is installed.
+
+    Output matches JSONRenderer with the default COMPACT_JSON, UNICODE_JSON
+    and STRICT_JSON settings, except for floats in exponent notation, which
+    orjson writes in the shorter form (1e16 rather than 1e+16, 1e-7 rather
+    than 1e-07) for the same value. NaN and Infinity go to the stdlib
+    renderer, which rejects them. Indented output, other settings, or a
+    missing orjson fall back to the stdlib renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.use_fast_path(accepted_media_type, renderer_context):
+            try:
+                content = dumps(data)
+            except orjson.JSONEncodeError:
+                # e.g. integers beyond 64 bits or non-string keys
+                content = None
+            if content is not None and not drops_values(data, content):
+                return content
+        return super().render(data, accepted_media_type, renderer_context)
+
+    def use_fast_path(self, accepted_media_type, renderer_context):
+        if not fast_json_available():
+            return False
+        if not (self.compact and not self.ensure_ascii and self.strict):
+            return False
+        return self.get_indent(accepted_media_type or '', renderer_context or {}) is None
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser that uses orjson when it is installed"""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if not fast_json_available():
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        content = stream.read() if stream is not None else b''
+        try:
+            if codecs.lookup(encoding).name != 'utf-8':
+                content = content.decode(encoding).encode('utf-8')
+            return orjson.loads(content)
+        except (ValueError, UnicodeError) as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
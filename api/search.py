@@ -0,0 +1,265 @@
+import threading
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import Case, Exists, FloatField, OuterRef, Q, Value, When
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.utils.module_loading import import_string
+from rest_framework import filters
+
+from .cache import get_cache, version_key
+
+RANK_ANNOTATION = 'search_rank'
+
+
+def trigrams(text):
+    """Return the pg_trgm style trigrams of a string"""
+    grams = set()
+    for word in text.lower().split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def split_field(model, field_path):
+    """Split a search field into (many-to-many field, related column) or (None, column)"""
+    parts = field_path.lstrip('^=@$').split(LOOKUP_SEP)
+    if len(parts) == 1:
+        return None, parts[0]
+    relation = model._meta.get_field(parts[0])
+    if not relation.many_to_many or len(parts) != 2:
+        raise ValueError(f"Unsupported search field '{field_path}'")
+    return relation, parts[1]
+
+
+def related_exists(model, relation, condition):
+    """EXISTS subquery over a many-to-many through table, so matches never duplicate rows"""
+    through = relation.remote_field.through
+    target = relation.m2m_reverse_field_name()
+    return Exists(through.objects.filter(
+        **{relation.m2m_field_name(): OuterRef('pk')},
+        **{f'{target}__{key}': value for key, value in condition.items()}
+    ))
+
+
+class SearchBackend(ABC):
+    """Filter a queryset by search terms and annotate it with a relevance rank"""
+
+    @abstractmethod
+    def search(self, queryset, terms, search_fields):
+        pass
+
+
+class TrigramSearchBackend(SearchBackend):
+    """
+    PostgreSQL search backed by pg_trgm GIN indexes.
+
+    Matching uses icontains, which Django compiles to UPPER(col::text) LIKE;
+    the migrations index exactly that expression with gin_trgm_ops, so each
+    term is answered from the index. Relevance is the best pg_trgm similarity
+    over the model's own columns.
+    """
+
+    def search(self, queryset, terms, search_fields):
+        from django.contrib.postgres.search import TrigramSimilarity
+
+        model = queryset.model
+        fields = [split_field(model, field) for field in search_fields]
+        similarities = []
+
+        for term in terms:
+            condition = Q()
+            for relation, column in fields:
+                if relation is None:
+                    condition |= Q(**{f'{column}__icontains': term})
+                    similarities.append(TrigramSimilarity(column, term))
+                else:
+                    condition |= Q(related_exists(model, relation, {f'{column}__icontains': term}))
+            queryset = queryset.filter(condition)
+
+        if not similarities:
+            rank = Value(0.0)
+        elif len(similarities) == 1:
+            rank = similarities[0]
+        else:
+            rank = Greatest(*similarities)
+        return queryset.annotate(**{RANK_ANNOTATION: rank})
+
+
+class NgramIndex:
+    """In-process trigram index over one text column of a model"""
+
+    def __init__(self, model, column):
+        self.model = model
+        self.column = column
+        self.texts = {}
+        self.postings = defaultdict(set)
+        self.version = None
+        self.stale = True
+
+    def current_version(self):
+        # The response cache version, which api.signals and the bulk write
+        # paths move on for every change to the model
+        return get_cache().get(version_key(self.model))
+
+    def build(self, version):
+        self.texts = {}
+        self.postings = defaultdict(set)
+        for pk, text in self.model.objects.values_list('pk', self.column).iterator(chunk_size=2000):
+            if text is None:
+                continue
+            text = str(text).lower()
+            self.texts[pk] = text
+            for gram in trigrams(text):
+                self.postings[gram].add(pk)
+        self.version = version
+        self.stale = False
+
+    def match(self, term):
+        """Return {pk: similarity} for rows containing term"""
+        term = term.lower()
+        grams = trigrams(term)
+        # Trigrams padded at word edges only prove a match for whole words,
+        # so candidates come from the interior trigrams when there are any
+        interior = [gram for gram in grams if ' ' not in gram]
+
+        if interior:
+            candidates = set.intersection(*(self.postings.get(gram, set()) for gram in interior))
+        else:
+            candidates = self.texts.keys()
+
+        scores = {}
+        for pk in candidates:
+            text = self.texts[pk]
+            if term in text:
+                text_grams = trigrams(text)
+                scores[pk] = len(grams & text_grams) / len(grams | text_grams) if grams else 0.0
+        return scores
+
+
+class NgramSearchBackend(SearchBackend):
+    """
+    Fallback for databases without pg_trgm, answering substring searches from
+    an in-process trigram index instead of LIKE scans.
+
+    Indexes are built lazily per column, dropped when the model is saved or
+    deleted in this process, and rebuilt when the model's response cache
+    version moves on, which catches bulk writes and, with a shared cache,
+    writes from other processes. Checking costs one cache read per search,
+    not a database query.
+    """
+    rank_precision = 3
+
+    def __init__(self):
+        self.indexes = {}
+        self.lock = threading.Lock()
+        self.connected = set()
+
+    def get_index(self, model, column):
+        key = (model._meta.label, column)
+        with self.lock:
+            index = self.indexes.get(key)
+            if index is None:
+                index = self.indexes[key] = NgramIndex(model, column)
+                self.watch(model)
+            version = index.current_version()
+            if index.stale or index.version != version:
+                index.build(version)
+            return index
+
+    def watch(self, model):
+        if model in self.connected:
+            return
+        post_save.connect(self.invalidate, sender=model, weak=False)
+        post_delete.connect(self.invalidate, sender=model, weak=False)
+        self.connected.add(model)
+
+    def invalidate(self, sender, **kwargs):
+        for (label, _), index in self.indexes.items():
+            if label == sender._meta.label:
+                index.stale = True
+
+    def search(self, queryset, terms, search_fields):
+        model = queryset.model
+        fields = [split_field(model, field) for field in search_fields]
+        ranks = defaultdict(float)
+
+        for term in terms:
+            condition = Q()
+            matched = set()
+            for relation, column in fields:
+                if relation is None:
+                    scores = self.get_index(model, column).match(term)
+                    matched.update(scores)
+                    for pk, score in scores.items():
+                        ranks[pk] = max(ranks[pk], score)
+                else:
+                    related_pks = self.get_index(relation.related_model, column).match(term)
+                    if related_pks:
+                        condition |= Q(related_exists(model, relation, {'pk__in': list(related_pks)}))
+            if matched:
+                condition |= Q(pk__in=matched)
+            if not condition:
+                return queryset.none().annotate(**{RANK_ANNOTATION: Value(0.0)})
+            queryset = queryset.filter(condition)
+
+        # Group rows by rounded score to keep the CASE expression small
+        buckets = defaultdict(list)
+        for pk, score in ranks.items():
+            buckets[round(score, self.rank_precision)].append(pk)
+        whens = [When(pk__in=pks, then=Value(score)) for score, pks in buckets.items() if score]
+        rank = Case(*whens, default=Value(0.0), output_field=FloatField()) if whens else Value(0.0)
+        return queryset.annotate(**{RANK_ANNOTATION: rank})
+
+
+_backends = {}
+
+
+def get_search_backend(model):
+    """Return the search backend for the database a model is read from"""
+    alias = router.db_for_read(model)
+    if alias not in _backends:
+        backend_path = getattr(settings, 'API_SEARCH_BACKEND', None)
+        if backend_path:
+            _backends[alias] = import_string(backend_path)()
+        elif connections[alias].vendor == 'postgresql':
+            _backends[alias] = TrigramSearchBackend()
+        else:
+            _backends[alias] = NgramSearchBackend()
+    return _backends[alias]
+
+
+class IndexedSearchFilter(filters.SearchFilter):
+    """SearchFilter that delegates matching and ranking to the configured search backend"""
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+
+        if not search_fields or not search_terms:
+            return queryset
+
+        return get_search_backend(queryset.model).search(queryset, search_terms, search_fields)
+
+
+class RelevanceOrderingFilter(filters.OrderingFilter):
+    """
+    OrderingFilter that orders search results by relevance unless ?ordering= is given.
+
+    Keyset pages are keyed on a model field, which the rank annotation is
+    not, so they keep the view's default ordering.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        params = request.query_params.get(self.ordering_param)
+        if not params and RANK_ANNOTATION in queryset.query.annotations and not self.is_keyset_request(request, view):
+            return [f'-{RANK_ANNOTATION}', *(self.get_default_ordering(view) or ['pk'])]
+        return super().get_ordering(request, queryset, view)
+
+    def is_keyset_request(self, request, view):
+        is_keyset_request = getattr(getattr(view, 'paginator', None), 'is_keyset_request', None)
+        return is_keyset_request is not None and is_keyset_request(request)
@@ -1,9 +1,64 @@
 # serializers.py
+from django.db import transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
 from rest_framework import serializers
-from .models import Climate, Planet, Terrain
+from .importers import BATCH_SIZE, chunked
+from .models import RELATION_NAME_FIELDS, Climate, Planet, Terrain, parse_population, sorted_names
+from .services import match_names, replace_relations, save_new_names, sync_relation
+from .cache import invalidate
+from .fieldsets import SparseFieldsetSerializerMixin, get_requested_fields
+from operator import attrgetter
 import re
 
-class TerrainSerializer(serializers.ModelSerializer):
+# Compiled once; validate_name runs for every terrain and climate in a payload
+TERRAIN_NAME_PATTERN = re.compile(r"^[a-zA-Z0-9\s\-']+$")
+CLIMATE_NAME_PATTERN = re.compile(r"^[a-zA-Z0-9\s\-'&/]+$")
+RESERVED_NAMES = frozenset(['unknown', 'null', 'undefined', 'none'])
+
+
+def parse_id(value):
+    """Return a primary key given as an integer or a string of ASCII digits, or None for anything else"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.isascii() and value.isdigit():
+        return int(value)
+    return None
+
+
+class NameRelatedField(serializers.SlugRelatedField):
+    """SlugRelatedField that accepts instances already resolved by the serializer"""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('slug_field', 'name')
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, self.queryset.model):
+            return data
+        return super().to_internal_value(data)
+
+class RelationNamesField(serializers.ManyRelatedField):
+    """
+    Many related field that renders from a denormalized names column.
+
+    Writes still go through child_relation; reads take the sorted names
+    stored on the instance, so rendering needs no relation queries.
+    """
+
+    def __init__(self, names_attr=None, **kwargs):
+        self.names_attr = names_attr
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return getattr(instance, self.names_attr)
+
+    def to_representation(self, iterable):
+        return list(iterable)
+
+class TerrainSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer for Terrain model"""
 
     name = serializers.CharField(
@@ -23,27 +78,25 @@ class TerrainSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
 
     def validate_name(self, value):
-            """Custom validation for terrain name"""
-            if not value or not value.strip():
-                raise serializers.ValidationError("Terrain name cannot be empty or whitespace only.")
-            
-            # Clean the name
-            cleaned_name = value.strip()
-            
-            # Check for invalid characters (allow letters, numbers, spaces, hyphens, apostrophes)
-            if not re.match(r"^[a-zA-Z0-9\s\-']+$", cleaned_name):
-                raise serializers.ValidationError(
-                    "Terrain name can only contain letters, numbers, spaces, hyphens, and apostrophes."
-                )
-            
-            # Check for reserved words
-            reserved_words = ['unknown', 'null', 'undefined', 'none']
-            if cleaned_name.lower() in reserved_words:
-                raise serializers.ValidationError(f"'{cleaned_name}' is a reserved word and cannot be used.")
-            
-            return cleaned_name
-
-class ClimateSerializer(serializers.ModelSerializer):
+        """Custom validation for terrain name"""
+        # Clean the name
+        cleaned_name = value.strip() if value else ''
+        if not cleaned_name:
+            raise serializers.ValidationError("Terrain name cannot be empty or whitespace only.")
+
+        # Check for invalid characters (allow letters, numbers, spaces, hyphens, apostrophes)
+        if not TERRAIN_NAME_PATTERN.match(cleaned_name):
+            raise serializers.ValidationError(
+                "Terrain name can only contain letters, numbers, spaces, hyphens, and apostrophes."
+            )
+
+        # Check for reserved words
+        if cleaned_name.lower() in RESERVED_NAMES:
+            raise serializers.ValidationError(f"'{cleaned_name}' is a reserved word and cannot be used.")
+
+        return cleaned_name
+
+class ClimateSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer for Climate model"""
 
     name = serializers.CharField(
@@ -64,26 +117,205 @@ class ClimateSerializer(serializers.ModelSerializer):
 
     def validate_name(self, value):
         """Custom validation for climate name"""
-        if not value or not value.strip():
-            raise serializers.ValidationError("Climate name cannot be empty or whitespace only.")
-        
         # Clean the name
-        cleaned_name = value.strip()
+        cleaned_name = value.strip() if value else ''
+        if not cleaned_name:
+            raise serializers.ValidationError("Climate name cannot be empty or whitespace only.")
         
         # Check for invalid characters
-        if not re.match(r"^[a-zA-Z0-9\s\-'&/]+$", cleaned_name):
+        if not CLIMATE_NAME_PATTERN.match(cleaned_name):
             raise serializers.ValidationError(
                 "Climate name can only contain letters, numbers, spaces, hyphens, apostrophes, ampersands, and slashes."
             )
         
         # Check for reserved words
-        reserved_words = ['unknown', 'null', 'undefined', 'none']
-        if cleaned_name.lower() in reserved_words:
+        if cleaned_name.lower() in RESERVED_NAMES:
             raise serializers.ValidationError(f"'{cleaned_name}' is a reserved word and cannot be used.")
         
         return cleaned_name
 
-class PlanetSerializer(serializers.ModelSerializer):
+class PlanetListSerializer(serializers.ListSerializer):
+    """
+    Validate and write many planets with a fixed number of bulk statements.
+
+    Terrain and climate names of the whole payload are resolved in one pass
+    before the items are validated, and names are checked for uniqueness
+    against the database and the rest of the payload. Errors are reported per
+    item, in input order. For updates, pass the target planets as instance and
+    identify each item by its id.
+    """
+    relation_models = (('climates', Climate), ('terrains', Terrain))
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            data = self.resolve_related_names(data)
+
+        self.instances_by_pk = {planet.pk: planet for planet in self.instance or ()}
+        self.validated_items = []
+        self.position = -1
+        errors = None
+        try:
+            validated = super().to_internal_value(data)
+        except serializers.ValidationError as exc:
+            if not isinstance(exc.detail, list):
+                raise
+            errors = exc.detail
+        finally:
+            self.child.instance = None
+
+        conflicts = self.find_name_conflicts()
+        if errors is None and not conflicts:
+            return validated
+
+        errors = errors or [{} for _ in data]
+        for position, message in conflicts.items():
+            errors[position] = {**errors[position], 'name': [message]}
+        raise serializers.ValidationError(errors)
+
+    def run_child_validation(self, data):
+        self.position += 1
+        self.child.instance = self.get_child_instance(data) if self.instance is not None else None
+        validated = super().run_child_validation(data)
+        self.validated_items.append((self.position, self.child.instance, validated))
+        return validated
+
+    def get_child_instance(self, data):
+        pk = data.get('id') if isinstance(data, dict) else None
+        if pk is None:
+            raise serializers.ValidationError({'id': ['This field is required.']})
+        planet = self.instances_by_pk.get(parse_id(pk))
+        if planet is None:
+            raise serializers.ValidationError({'id': [f'Planet with id {pk} does not exist.']})
+        if any(instance is planet for _, instance, _ in self.validated_items):
+            raise serializers.ValidationError({'id': ['Planet is duplicated in this request.']})
+        return planet
+
+    def resolve_related_names(self, data):
+        """
+        Swap terrain/climate names for instances using one lookup per model.
+
+        Names that do not exist yet become unsaved instances; save_related_names()
+        inserts them once every item is valid, so a rejected request writes nothing.
+        """
+        items = list(data)
+        for field_name, model in self.relation_models:
+            names = [
+                name
+                for item in items if isinstance(item, dict) and isinstance(item.get(field_name), list)
+                for name in item[field_name] if isinstance(name, str)
+            ]
+            unique_names = list(dict.fromkeys(names))
+            resolved = dict(zip(unique_names, match_names(model, unique_names)))
+            items = [
+                {**item, field_name: [resolved[name] for name in item[field_name]]}
+                if isinstance(item, dict) and isinstance(item.get(field_name), list)
+                and all(isinstance(name, str) for name in item[field_name])
+                else item
+                for item in items
+            ]
+        return items
+
+    def find_name_conflicts(self):
+        named = [(position, instance, attrs['name']) for position, instance, attrs in self.validated_items if 'name' in attrs]
+        existing = {}
+        for names in chunked({name for _, _, name in named}, BATCH_SIZE):
+            existing.update(Planet.objects.filter(name__in=names).values_list('name', 'pk'))
+
+        conflicts = {}
+        seen = set()
+        for position, instance, name in named:
+            if name in seen:
+                conflicts[position] = 'Planet name is duplicated in this request.'
+            elif name in existing and (instance is None or existing[name] != instance.pk):
+                conflicts[position] = 'An item with this name already exists. Names must be unique.'
+            seen.add(name)
+        return conflicts
+
+    def create(self, validated_data):
+        planets = []
+        for attrs in validated_data:
+            fields = {key: value for key, value in attrs.items() if key not in ('terrains', 'climates')}
+            planet = Planet(**fields)
+            # bulk_create skips Planet.save, so the numeric copy is filled in here
+            planet.population_count = parse_population(planet.population)
+            planets.append(planet)
+
+        for planet, attrs in zip(planets, validated_data):
+            for field_name, attname in RELATION_NAME_FIELDS.items():
+                setattr(planet, attname, sorted_names(obj.name for obj in attrs.get(field_name) or ()))
+
+        with transaction.atomic():
+            self.save_related_names(validated_data)
+            Planet.objects.bulk_create(planets, batch_size=BATCH_SIZE)
+            if not all(planet.pk for planet in planets):
+                # Backends that cannot return inserted ids need one lookup per batch
+                ids = {}
+                for names in chunked([planet.name for planet in planets], BATCH_SIZE):
+                    ids.update(Planet.objects.filter(name__in=names).values_list('name', 'pk'))
+                for planet in planets:
+                    planet.pk = ids[planet.name]
+
+            for field_name, _ in self.relation_models:
+                self.write_links(field_name, [
+                    (planet, attrs.get(field_name) or []) for planet, attrs in zip(planets, validated_data)
+                ])
+
+            # Bulk writes send no model signals, so invalidate cached responses here
+            invalidate(Planet)
+
+        return planets
+
+    def update(self, instances, validated_data):
+        targets = [instance for _, instance, _ in self.validated_items]
+        now = timezone.now()
+        fields = {'updated_at'}
+
+        for planet, attrs in zip(targets, validated_data):
+            for attr, value in attrs.items():
+                if attr not in ('terrains', 'climates'):
+                    setattr(planet, attr, value)
+                    fields.add(attr)
+            for field_name, attname in RELATION_NAME_FIELDS.items():
+                if field_name in attrs:
+                    setattr(planet, attname, sorted_names(obj.name for obj in attrs[field_name]))
+                    fields.add(attname)
+            planet.population_count = parse_population(planet.population)
+            planet.updated_at = now
+        if 'population' in fields:
+            fields.add('population_count')
+
+        with transaction.atomic():
+            self.save_related_names(validated_data)
+            Planet.objects.bulk_update(targets, sorted(fields), batch_size=BATCH_SIZE)
+
+            # Only relations present in an item are rewritten
+            for field_name, _ in self.relation_models:
+                links = [
+                    (planet, attrs[field_name])
+                    for planet, attrs in zip(targets, validated_data) if field_name in attrs
+                ]
+                self.write_links(field_name, links, clear=[planet for planet, _ in links])
+
+            invalidate(Planet)
+
+        return targets
+
+    def save_related_names(self, validated_data):
+        """Insert the terrains and climates first named in this request"""
+        for field_name, model in self.relation_models:
+            save_new_names(model, [obj for attrs in validated_data for obj in attrs.get(field_name) or ()])
+
+    def write_links(self, field_name, links, clear=()):
+        """Link (planet, targets) pairs in bulk"""
+        replace_relations(
+            Planet,
+            field_name,
+            {planet.pk: [obj.pk for obj in targets] for planet, targets in links},
+            clear=[planet.pk for planet in clear],
+            batch_size=BATCH_SIZE,
+        )
+
+class PlanetSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """Serializer for Planet model with validation"""
     name = serializers.CharField(
         max_length=200,
@@ -108,83 +340,131 @@ class PlanetSerializer(serializers.ModelSerializer):
         }
     )
 
-    terrains = serializers.SlugRelatedField(
-        many=True,
-        slug_field='name',
-        queryset=Terrain.objects.all(),
+    terrains = RelationNamesField(
+        names_attr='terrain_names',
+        child_relation=NameRelatedField(queryset=Terrain.objects.all()),
         required=False
     )
 
-    climates = serializers.SlugRelatedField(
-        many=True,
-        slug_field='name',
-        queryset=Climate.objects.all(),
+    climates = RelationNamesField(
+        names_attr='climate_names',
+        child_relation=NameRelatedField(queryset=Climate.objects.all()),
         required=False
     )
     class Meta:
         model = Planet
         fields = ['id', 'name', 'population', 'terrains', 'climates']
         read_only_fields = ['id', 'created_at', 'updated_at']
+        list_serializer_class = PlanetListSerializer
         
     def create(self, validated_data):
         climates_data = validated_data.pop('climates', [])
         terrains_data = validated_data.pop('terrains', [])
-        planet = Planet.objects.create(**validated_data)
-        
-        for climate in climates_data:
-            planet.climates.add(climate)
 
-        for terrain in terrains_data:
-            planet.terrains.add(terrain)
+        with transaction.atomic():
+            save_new_names(Climate, climates_data)
+            save_new_names(Terrain, terrains_data)
+            planet = Planet.objects.create(**validated_data)
+            sync_relation(planet, 'climates', climates_data, existing=())
+            sync_relation(planet, 'terrains', terrains_data, existing=())
         
         return planet
     
     def update(self, instance, validated_data):
         climates_data = validated_data.pop('climates', None)
         terrains_data = validated_data.pop('terrains', None)
-        
-        # Update other fields
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        
-        # Update climates if provided
-        if climates_data is not None:
-            instance.climates.clear()  # Remove existing relationships
-            for climate in climates_data:
-                instance.climates.add(climate)
-
-        if terrains_data is not None:
-            instance.terrains.clear()
-            for terrain in terrains_data:
-                instance.terrains.add(terrain)
+
+        with transaction.atomic():
+            # Update other fields
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+
+            # Only relations present in the payload are rewritten, and only by their difference
+            if climates_data is not None:
+                save_new_names(Climate, climates_data)
+                sync_relation(instance, 'climates', climates_data)
+
+            if terrains_data is not None:
+                save_new_names(Terrain, terrains_data)
+                sync_relation(instance, 'terrains', terrains_data)
         
         return instance
     
     def to_internal_value(self, data):
+        # Look up all related names up front so field validation receives
+        # instances instead of looking each name up again; names that do not
+        # exist yet are inserted by create()/update() once the data is valid
+        resolved = {}
+        for field_name, model in (('climates', Climate), ('terrains', Terrain)):
+            names = data.get(field_name) if hasattr(data, 'get') else None
+            if isinstance(names, list) and all(isinstance(name, str) for name in names):
+                resolved[field_name] = match_names(model, names)
 
-    
-        if 'climates' in data:
-            climate_names = data['climates']
-            climates = []
-            
-            for name in climate_names:
-                climate, created = Climate.objects.get_or_create(name=name)
-                climates.append(climate)
-            
+        if resolved:
             data = data.copy()
-            data['climates'] = climates
+            data.update(resolved)
 
+        return super().to_internal_value(data)
 
-        if 'terrains' in data:
-            terrain_names = data['terrains']
-            terrains = []
-            
-            for name in terrain_names:
-                terrain, created = Terrain.objects.get_or_create(name=name)
-                terrains.append(terrain)
-            
-            data = data.copy()
-            data['terrains'] = terrains       
 
-        return super().to_internal_value(data)
\ No newline at end of file
+class PlanetSummarySerializer(serializers.ModelSerializer):
+    """Planet id and name only, for cheap membership lookups"""
+
+    class Meta:
+        model = Planet
+        fields = ['id', 'name']
+        read_only_fields = fields
+
+
+class PlanetReadSerializer(serializers.BaseSerializer):
+    """
+    Read-only planet serializer for list and retrieve.
+
+    Produces the same output as PlanetSerializer, but builds each dict
+    directly from the planet's columns, including the denormalized relation
+    names, instead of running DRF's per-field machinery. Accepts model
+    instances or .values() dicts, and honours ?fields= and ?omit=.
+    """
+    field_sources = {
+        'id': 'id',
+        'name': 'name',
+        'population': 'population',
+        'terrains': 'terrain_names',
+        'climates': 'climate_names',
+    }
+    sources = tuple(field_sources.values())
+    get_values = attrgetter(*sources)
+
+    @cached_property
+    def selected_fields(self):
+        return get_requested_fields(self.context.get('request'), list(self.field_sources))
+
+    def selected_sources(self):
+        """Model attributes read by the selected fields, or None when the response is not sparse"""
+        if self.selected_fields is None:
+            return None
+        return [self.field_sources[name] for name in self.selected_fields]
+
+    def to_representation(self, instance):
+        if self.selected_fields is not None:
+            return self.sparse_representation(instance)
+        if isinstance(instance, dict):
+            pk, name, population, terrains, climates = (instance[source] for source in self.sources)
+        else:
+            pk, name, population, terrains, climates = self.get_values(instance)
+        return {
+            'id': pk,
+            'name': name,
+            'population': population,
+            'terrains': list(terrains),
+            'climates': list(climates),
+        }
+
+    def sparse_representation(self, instance):
+        data = {}
+        for name in self.selected_fields:
+            source = self.field_sources[name]
+            value = instance[source] if isinstance(instance, dict) else getattr(instance, source)
+            data[name] = list(value) if name in RELATION_NAME_FIELDS else value
+        return data
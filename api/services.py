@@ -0,0 +1,196 @@
+from django.db import router, transaction
+from django.db.models.signals import m2m_changed
+
+from .cache import invalidate
+from .models import RELATION_NAME_FIELDS, Planet, sorted_names
+
+
+def resolve_names(model, names):
+    """
+    Return instances of a name-keyed model for the given names, in order.
+
+    Existing rows are fetched with a single name__in query and missing ones are
+    inserted with one bulk_create. ignore_conflicts plus a second lookup keeps
+    this correct when another request inserts the same new name concurrently.
+    """
+    unique_names = list(dict.fromkeys(names))
+    if not unique_names:
+        return []
+
+    found = {obj.name: obj for obj in model.objects.filter(name__in=unique_names)}
+    missing = [name for name in unique_names if name not in found]
+    if missing:
+        found.update(insert_names(model, missing))
+
+    return [found[name] for name in names]
+
+
+def insert_names(model, names):
+    """Insert rows for names that were not found and return {name: instance} for all of them"""
+    model.objects.bulk_create([model(name=name) for name in names], ignore_conflicts=True)
+    # bulk_create sends no post_save, so cached lists of the model are invalidated here
+    invalidate(model)
+    return {obj.name: obj for obj in model.objects.filter(name__in=names)}
+
+
+def match_names(model, names):
+    """
+    Return instances of a name-keyed model for the given names, in order, without writing.
+
+    Existing rows come from one name__in query. Missing names get an unsaved
+    instance each, shared by repeats, for save_new_names() to insert once the
+    caller has validated the rest of its input.
+    """
+    unique_names = list(dict.fromkeys(names))
+    if not unique_names:
+        return []
+
+    found = {obj.name: obj for obj in model.objects.filter(name__in=unique_names)}
+    found.update((name, model(name=name)) for name in unique_names if name not in found)
+    return [found[name] for name in names]
+
+
+def save_new_names(model, instances):
+    """Insert the unsaved instances from match_names() and fill in their primary keys"""
+    new = {}
+    for obj in instances:
+        if obj.pk is None:
+            new.setdefault(obj.name, []).append(obj)
+    if not new:
+        return
+
+    for name, saved in insert_names(model, list(new)).items():
+        for obj in new[name]:
+            obj.pk = saved.pk
+            obj._state.adding = False
+
+
+def sync_relation(instance, field_name, targets, existing=None):
+    """
+    Make a many-to-many relation on instance link exactly the given targets.
+
+    Only the difference is written: removed links go in one DELETE and added
+    links in one bulk INSERT on the through table. When the current links are
+    not passed in they are taken from the prefetch cache, falling back to one
+    SELECT. m2m_changed is sent as the related manager would, and the return
+    value tells whether anything changed.
+    """
+    field = instance._meta.get_field(field_name)
+    through = field.remote_field.through
+    source_column = field.m2m_column_name()
+    target_column = field.m2m_reverse_name()
+
+    if existing is None:
+        prefetched = getattr(instance, '_prefetched_objects_cache', {}).get(field_name)
+        if prefetched is not None:
+            existing = {obj.pk for obj in prefetched}
+        else:
+            existing = set(
+                through.objects.filter(**{source_column: instance.pk}).values_list(target_column, flat=True)
+            )
+
+    wanted = {obj.pk for obj in targets}
+    removed = set(existing) - wanted
+    added = wanted - set(existing)
+
+    if not removed and not added:
+        return False
+
+    using = router.db_for_write(through, instance=instance)
+    signal_kwargs = {
+        'sender': through,
+        'instance': instance,
+        'reverse': False,
+        'model': field.related_model,
+        'using': using,
+    }
+
+    with transaction.atomic(using=using, savepoint=False):
+        if removed:
+            m2m_changed.send(action='pre_remove', pk_set=removed, **signal_kwargs)
+            through.objects.using(using).filter(
+                **{source_column: instance.pk, f'{target_column}__in': removed}
+            ).delete()
+            m2m_changed.send(action='post_remove', pk_set=removed, **signal_kwargs)
+
+        if added:
+            m2m_changed.send(action='pre_add', pk_set=added, **signal_kwargs)
+            through.objects.using(using).bulk_create([
+                through(**{source_column: instance.pk, target_column: pk}) for pk in added
+            ])
+            m2m_changed.send(action='post_add', pk_set=added, **signal_kwargs)
+
+    # Drop the now stale prefetched rows so the instance re-reads its relation
+    getattr(instance, '_prefetched_objects_cache', {}).pop(field_name, None)
+    return True
+
+
+def replace_relations(model, field_name, links, clear=(), batch_size=1000):
+    """
+    Bulk rewrite a many-to-many relation for many instances at once.
+
+    links maps source pks to the target pks they should be linked to. The
+    stored links of every pk in clear are deleted first, one DELETE per batch,
+    and the wanted links are then inserted with one multi-row INSERT per
+    batch. Links that already exist, such as ones a concurrent request just
+    wrote, are skipped. Like the other bulk paths no m2m_changed signals are
+    sent; callers invalidate caches.
+    """
+    field = model._meta.get_field(field_name)
+    through = field.remote_field.through
+    source_column = field.m2m_column_name()
+    target_column = field.m2m_reverse_name()
+    using = router.db_for_write(through)
+
+    clear = list(clear)
+    rows = [
+        through(**{source_column: source_pk, target_column: target_pk})
+        for source_pk, target_pks in links.items()
+        for target_pk in dict.fromkeys(target_pks)
+    ]
+
+    with transaction.atomic(using=using, savepoint=False):
+        for start in range(0, len(clear), batch_size):
+            through.objects.using(using).filter(**{f'{source_column}__in': clear[start:start + batch_size]}).delete()
+        through.objects.using(using).bulk_create(rows, batch_size=batch_size, ignore_conflicts=True)
+
+
+def relation_names(planet_ids, field_names=RELATION_NAME_FIELDS):
+    """Return {planet pk: {names column: sorted names}} read from the through tables"""
+    names = {pk: {RELATION_NAME_FIELDS[field_name]: [] for field_name in field_names} for pk in planet_ids}
+    for field_name in field_names:
+        field = Planet._meta.get_field(field_name)
+        source = field.m2m_field_name()
+        target = field.m2m_reverse_field_name()
+        rows = (
+            field.remote_field.through.objects
+            .filter(**{f'{source}__in': list(names)})
+            .values_list(f'{source}_id', f'{target}__name')
+            .order_by()
+        )
+        for pk, name in rows:
+            names[pk][RELATION_NAME_FIELDS[field_name]].append(name)
+    for values in names.values():
+        for column, column_names in values.items():
+            values[column] = sorted_names(column_names)
+    return names
+
+
+def refresh_relation_names(planet_ids, field_names=RELATION_NAME_FIELDS, batch_size=1000):
+    """
+    Rewrite the denormalized terrain/climate name columns of the given planets.
+
+    Names are read with one query per relation and batch, and written back
+    with bulk_update(), a single UPDATE per batch, so the round trips of a
+    large import grow with its batches rather than its planets.
+    """
+    planet_ids = list(planet_ids)
+    columns = [RELATION_NAME_FIELDS[field_name] for field_name in field_names]
+    using = router.db_for_write(Planet)
+
+    with transaction.atomic(using=using, savepoint=False):
+        for start in range(0, len(planet_ids), batch_size):
+            names = relation_names(planet_ids[start:start + batch_size], field_names)
+            Planet.objects.using(using).bulk_update(
+                [Planet(pk=pk, **values) for pk, values in names.items()], columns, batch_size=batch_size
+            )
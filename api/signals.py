@@ -0,0 +1,97 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import invalidate
+from .conditional import record_deletion
+from .models import Climate, Planet, Terrain
+from .services import refresh_relation_names, relation_names
+
+
+@receiver([post_save, post_delete], sender=Planet)
+@receiver([post_save, post_delete], sender=Terrain)
+@receiver([post_save, post_delete], sender=Climate)
+def invalidate_model(sender, **kwargs):
+    invalidate(sender)
+
+
+@receiver(m2m_changed, sender=Planet.terrains.through)
+@receiver(m2m_changed, sender=Planet.climates.through)
+def invalidate_planet_relations(sender, action, **kwargs):
+    # Cascaded link deletes are covered by the parent model's post_delete
+    if action.startswith('post_'):
+        invalidate(Planet)
+
+
+@receiver(post_delete, sender=Planet)
+@receiver(post_delete, sender=Terrain)
+@receiver(post_delete, sender=Climate)
+def record_model_deletion(sender, origin=None, **kwargs):
+    # A queryset delete sends post_delete for every row; one tombstone write
+    # per delete() call is enough
+    recorded = vars(origin).setdefault('_recorded_deletions', set()) if origin is not None else set()
+    if sender not in recorded:
+        recorded.add(sender)
+        record_deletion(sender, timezone.now())
+
+
+def relation_field_name(through):
+    return 'terrains' if through is Planet.terrains.through else 'climates'
+
+
+def planet_field_name(model):
+    return 'terrains' if model is Terrain else 'climates'
+
+
+@receiver(m2m_changed, sender=Planet.terrains.through)
+@receiver(m2m_changed, sender=Planet.climates.through)
+def sync_planets(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Relation changes alter how a planet renders, so refresh its denormalized
+    names and move its updated_at on.
+    """
+    field_name = relation_field_name(sender)
+    if reverse and action == 'pre_clear':
+        # pk_set is not sent for clears, so remember the affected planets
+        instance._cleared_planet_ids = list(instance.planet_set.values_list('pk', flat=True))
+        return
+    if not action.startswith('post_'):
+        return
+
+    now = timezone.now()
+    if not reverse:
+        names = relation_names([instance.pk], [field_name])[instance.pk]
+        Planet.objects.filter(pk=instance.pk).update(updated_at=now, **names)
+        instance.updated_at = now
+        for attname, value in names.items():
+            setattr(instance, attname, value)
+        return
+
+    planet_ids = getattr(instance, '_cleared_planet_ids', []) if action == 'post_clear' else pk_set
+    if planet_ids:
+        Planet.objects.filter(pk__in=planet_ids).update(updated_at=now)
+        refresh_relation_names(planet_ids, [field_name])
+
+
+@receiver(post_save, sender=Terrain)
+@receiver(post_save, sender=Climate)
+def refresh_renamed(sender, instance, created, update_fields=None, **kwargs):
+    """Renames have to reach the names stored on linked planets"""
+    if created or (update_fields is not None and 'name' not in update_fields):
+        return
+    refresh_relation_names(instance.planet_set.values_list('pk', flat=True), [planet_field_name(sender)])
+
+
+@receiver(pre_delete, sender=Terrain)
+@receiver(pre_delete, sender=Climate)
+def remember_linked_planets(sender, instance, **kwargs):
+    instance._linked_planet_ids = list(instance.planet_set.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Terrain)
+@receiver(post_delete, sender=Climate)
+def refresh_unlinked(sender, instance, **kwargs):
+    # The delete cascaded to the through table without sending m2m_changed
+    planet_ids = getattr(instance, '_linked_planet_ids', [])
+    if planet_ids:
+        refresh_relation_names(planet_ids, [planet_field_name(sender)])
@@ -0,0 +1,156 @@
+import json
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import include, path, resolve, reverse
+from rest_framework import status
+from rest_framework.routers import DefaultRouter
+from .. import urls as api_urls, views
+from ..models import Climate, Planet, Terrain
+
+
+def async_urlpatterns():
+    """The API routes with the views built as an ASGI deployment builds them"""
+    with override_settings(API_ASYNC_VIEWS={'ENABLED': True}):
+        router = DefaultRouter()
+        for prefix, viewset, basename in api_urls.router.registry:
+            router.register(prefix, viewset, basename)
+        return [path('api/v1/', include([
+            path('health/', views.health_check, name='health_check'),
+            path('metrics/', views.metrics, name='metrics'),
+            *router.urls,
+        ]))]
+
+
+urlpatterns = async_urlpatterns()
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncReadViewTest(TestCase):
+    """Test the async list and retrieve views against the sync ones"""
+
+    @classmethod
+    def setUpTestData(cls):
+        desert = Terrain.objects.create(name="desert")
+        arid = Climate.objects.create(name="arid")
+        for i in range(25):
+            planet = Planet.objects.create(name=f"Planet {i:02}", population=str(i * 1000))
+            if i % 2:
+                planet.terrains.add(desert)
+                planet.climates.add(arid)
+        cls.planet = Planet.objects.get(name="Planet 01")
+
+    def setUp(self):
+        cache.clear()
+
+    async def sync_get(self, url, params=None):
+        """GET url from the sync views"""
+        def get():
+            with self.settings(ROOT_URLCONF='config.urls'):
+                return self.client.get(url, params)
+        return await sync_to_async(get)()
+
+    async def sync_json(self, url, params=None):
+        response = await self.sync_get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_views_are_async(self):
+        self.assertTrue(iscoroutinefunction(resolve(reverse('planet-list')).func))
+        self.assertTrue(iscoroutinefunction(resolve(reverse('terrain-detail', args=[1])).func))
+        with self.settings(ROOT_URLCONF='config.urls'):
+            self.assertFalse(iscoroutinefunction(resolve(reverse('planet-list')).func))
+
+    async def test_list_matches_sync(self):
+        for url, params in [
+            (reverse('planet-list'), {}),
+            (reverse('planet-list'), {'page': 2, 'ordering': '-population_count'}),
+            (reverse('planet-list'), {'terrains': 'desert', 'population_min': 5000}),
+            (reverse('planet-list'), {'search': 'Planet 1', 'fields': 'id,name'}),
+            (reverse('terrain-list'), {}),
+        ]:
+            response = await self.async_client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json(), await self.sync_json(url, params))
+
+    async def test_retrieve(self):
+        url = reverse('planet-detail', args=[self.planet.pk])
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), await self.sync_json(url))
+
+        for pk in (9999, 'abc'):
+            response = await self.async_client.get(reverse('planet-detail', args=[pk]))
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_invalid_page(self):
+        response = await self.async_client.get(reverse('planet-list'), {'page': 50})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_keyset_pagination(self):
+        response = await self.async_client.get(reverse('planet-list'), {'pagination': 'keyset', 'fields': 'id'})
+        first = response.json()
+        self.assertEqual(len(first['results']), 20)
+
+        second = (await self.async_client.get(first['next'])).json()
+        self.assertEqual(len(second['results']), 5)
+        self.assertIsNone(second['next'])
+
+    async def test_conditional_get(self):
+        url = reverse('planet-detail', args=[self.planet.pk])
+        etag = (await self.async_client.get(url))['ETag']
+        self.assertEqual((await self.sync_get(url))['ETag'], etag)
+
+        response = await self.async_client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    @override_settings(API_RESPONSE_CACHE={'ENABLED': True})
+    async def test_response_cache(self):
+        url = reverse('planet-list')
+        miss = await self.async_client.get(url)
+        hit = await self.async_client.get(url)
+
+        self.assertEqual(miss['X-Cache'], 'MISS')
+        self.assertEqual(hit['X-Cache'], 'HIT')
+        self.assertEqual(hit.content, miss.content)
+
+    async def test_facets(self):
+        params = {'facets': 'terrains,climates'}
+        response = await self.async_client.get(reverse('planet-list'), params)
+        self.assertEqual(response.json()['facets'], (await self.sync_json(reverse('planet-list'), params))['facets'])
+        self.assertEqual(response.json()['facets']['terrains'][0]['count'], 12)
+
+    async def test_writes_use_sync_views(self):
+        response = await self.async_client.post(
+            reverse('planet-list'), {'name': 'Hoth', 'terrains': ['tundra']}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(await Planet.objects.filter(name='Hoth').aexists())
+
+    async def test_health_check(self):
+        response = await self.async_client.get(reverse('health_check'))
+        self.assertEqual(response.json(), {'status': 'ok'})
+
+    async def test_export_streams_asynchronously(self):
+        response = await self.async_client.get(reverse('planet-export'), {'terrains': 'desert'})
+        self.assertTrue(response.is_async)
+        lines = b''.join([chunk async for chunk in response.streaming_content]).decode().splitlines()
+        self.assertEqual(len(lines), 12)
+        self.assertEqual(json.loads(lines[0])['terrains'], ['desert'])
+
+
+@override_settings(ROOT_URLCONF=__name__, API_INSTRUMENTATION={'ENABLED': True})
+class AsyncInstrumentationTest(TestCase):
+    """Test instrumentation of the async views, enabled before any request as in a deployment"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Planet.objects.create(name="Tatooine")
+
+    async def test_queries_are_tracked(self):
+        """Test that the middleware counts queries run by the async ORM"""
+        response = await self.async_client.get(reverse('planet-list'))
+        self.assertGreater(response.metrics.queries, 0)
+        self.assertIn(f'desc="{response.metrics.queries} queries"', response['Server-Timing'])
@@ -0,0 +1,205 @@
+from unittest import mock
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from ..models import Planet, Climate, Terrain
+from ..serializers import PlanetListSerializer
+from .test_importers import statement_count
+
+
+class PlanetBulkTest(APITestCase):
+    """Test bulk create, update and delete of planets"""
+
+    def setUp(self):
+        self.url = reverse('planet-bulk')
+        self.arid = Climate.objects.create(name="arid")
+        self.desert = Terrain.objects.create(name="desert")
+        self.tatooine = Planet.objects.create(name="Tatooine", population="200000")
+        self.tatooine.terrains.add(self.desert)
+        self.tatooine.climates.add(self.arid)
+
+    def test_bulk_create(self):
+        """Test creating planets with relations in one request"""
+        data = [
+            {'name': 'Hoth', 'population': '1,000', 'terrains': ['tundra', 'ice caves'], 'climates': ['frozen']},
+            {'name': 'Dagobah', 'terrains': ['swamp', 'desert']},
+            {'name': 'Yavin IV'},
+        ]
+        response = self.client.post(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([planet['name'] for planet in response.data['results']], ['Hoth', 'Dagobah', 'Yavin IV'])
+        self.assertEqual(response.data['results'][0]['terrains'], ['ice caves', 'tundra'])
+
+        hoth = Planet.objects.get(name='Hoth')
+        self.assertEqual(hoth.population_count, 1000)
+        self.assertEqual(sorted(t.name for t in hoth.terrains.all()), ['ice caves', 'tundra'])
+        self.assertEqual(Planet.objects.get(name='Dagobah').terrains.filter(pk=self.desert.pk).count(), 1)
+        self.assertEqual(Terrain.objects.filter(name='desert').count(), 1)
+
+    def test_bulk_create_non_ascii_population(self):
+        """Test that populations written with non-ASCII digits are kept as text without a count"""
+        response = self.client.post(self.url, [{'name': 'Hoth', 'population': '²'}], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIsNone(Planet.objects.get(name='Hoth').population_count)
+
+        response = self.client.post(reverse('planet-list'), {'name': 'Dagobah', 'population': '٣'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIsNone(Planet.objects.get(name='Dagobah').population_count)
+
+    def test_bulk_create_query_count_is_constant(self):
+        """Test that a larger batch costs the same number of queries"""
+        def post(names):
+            data = [{'name': name, 'terrains': [f'{name} terrain', 'desert'], 'climates': ['arid']} for name in names]
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post(self.url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return statement_count(context.captured_queries)
+
+        small = post([f'Small {i}' for i in range(2)])
+        large = post([f'Large {i}' for i in range(50)])
+        self.assertEqual(large, small)
+
+    def test_bulk_create_name_race(self):
+        """Test that a name taken between validation and insert answers 409"""
+        data = [{'name': 'Hoth'}, {'name': 'Tatooine'}]
+        # As if another request inserted Tatooine after the conflict check
+        with mock.patch.object(PlanetListSerializer, 'find_name_conflicts', return_value={}):
+            response = self.client.post(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['code'], 'DUPLICATE_NAME')
+        self.assertFalse(Planet.objects.filter(name='Hoth').exists())
+
+    def test_bulk_update_name_race(self):
+        """Test that a bulk update hitting a taken name answers 409"""
+        hoth = Planet.objects.create(name="Hoth")
+        with mock.patch.object(PlanetListSerializer, 'find_name_conflicts', return_value={}):
+            response = self.client.patch(self.url, [{'id': hoth.pk, 'name': 'Tatooine'}], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        hoth.refresh_from_db()
+        self.assertEqual(hoth.name, 'Hoth')
+
+    def test_bulk_create_reports_errors_per_item(self):
+        """Test that one invalid item rejects the whole batch"""
+        data = [
+            {'name': 'Hoth'},
+            {'name': 'Tatooine'},
+            {'name': 'H'},
+            {'name': 'Hoth'},
+        ]
+        response = self.client.post(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        details = response.data['details']
+        self.assertEqual(details[0], {})
+        self.assertIn('already exists', details[1]['name'][0])
+        self.assertIn('at least 2 characters', details[2]['name'][0])
+        self.assertIn('duplicated', details[3]['name'][0])
+        self.assertFalse(Planet.objects.filter(name='Hoth').exists())
+
+    def test_rejected_batch_creates_no_relations(self):
+        """Test that terrains and climates named by a rejected batch are not created"""
+        data = [
+            {'name': 'Hoth', 'terrains': ['tundra'], 'climates': ['frozen']},
+            {'name': 'H' * 201, 'terrains': ['swamp']},
+        ]
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.patch(self.url, [{'id': self.tatooine.pk, 'name': 'H', 'terrains': ['dunes']}],
+                                     format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.assertEqual(list(Terrain.objects.values_list('name', flat=True)), ['desert'])
+        self.assertEqual(list(Climate.objects.values_list('name', flat=True)), ['arid'])
+
+    def test_bulk_create_requires_list(self):
+        """Test that an object body is rejected"""
+        response = self.client.post(self.url, {'name': 'Hoth'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_update(self):
+        """Test partially updating planets by id"""
+        hoth = Planet.objects.create(name="Hoth", population="0")
+        hoth.terrains.add(self.desert)
+        data = [
+            {'id': self.tatooine.pk, 'population': '300000'},
+            {'id': hoth.pk, 'name': 'Hoth Prime', 'terrains': ['tundra']},
+        ]
+        response = self.client.patch(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][1]['name'], 'Hoth Prime')
+
+        self.tatooine.refresh_from_db()
+        self.assertEqual(self.tatooine.population_count, 300000)
+        # Relations missing from an item are left alone
+        self.assertEqual([t.name for t in self.tatooine.terrains.all()], ['desert'])
+        self.assertEqual([t.name for t in Planet.objects.get(pk=hoth.pk).terrains.all()], ['tundra'])
+
+    def test_bulk_update_errors(self):
+        """Test unknown, missing and duplicated ids"""
+        data = [
+            {'id': self.tatooine.pk, 'population': '1'},
+            {'id': 999, 'population': '1'},
+            {'population': '1'},
+            {'id': self.tatooine.pk, 'population': '2'},
+        ]
+        response = self.client.patch(self.url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        details = response.data['details']
+        self.assertEqual(details[0], {})
+        self.assertIn('does not exist', details[1]['id'][0])
+        self.assertIn('required', details[2]['id'][0])
+        self.assertIn('duplicated', details[3]['id'][0])
+        self.tatooine.refresh_from_db()
+        self.assertEqual(self.tatooine.population, '200000')
+
+    def test_bulk_update_keeps_own_name(self):
+        """Test that an item may repeat its current name"""
+        data = [{'id': self.tatooine.pk, 'name': 'Tatooine', 'population': '5'}]
+        response = self.client.patch(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_bulk_delete(self):
+        """Test deleting planets by id"""
+        hoth = Planet.objects.create(name="Hoth")
+        response = self.client.delete(self.url, [self.tatooine.pk, hoth.pk], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [{'id': self.tatooine.pk}, {'id': hoth.pk}])
+        self.assertFalse(Planet.objects.exists())
+        self.assertTrue(Terrain.objects.filter(pk=self.desert.pk).exists())
+
+    def test_bulk_delete_errors(self):
+        """Test that unknown ids reject the whole batch"""
+        response = self.client.delete(self.url, [self.tatooine.pk, 999, 'abc'], format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['details'][0], {})
+        self.assertIn('does not exist', response.data['details'][1]['id'][0])
+        self.assertIn('not a valid', response.data['details'][2]['id'][0])
+        self.assertTrue(Planet.objects.filter(pk=self.tatooine.pk).exists())
+
+    def test_bulk_delete_rejects_inexact_ids(self):
+        """Test that floats and non-ASCII or padded digit strings are reported rather than coerced"""
+        values = [self.tatooine.pk + 0.9, str(self.tatooine.pk).translate(str.maketrans('0123456789', '٠١٢٣٤٥٦٧٨٩')),
+                  f' {self.tatooine.pk} ']
+        response = self.client.delete(self.url, values, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        for detail in response.data['details']:
+            self.assertIn('not a valid', detail['id'][0])
+        self.assertTrue(Planet.objects.filter(pk=self.tatooine.pk).exists())
+
+        response = self.client.patch(self.url, [{'id': self.tatooine.pk + 0.9, 'name': 'Tatooine II'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Planet.objects.get(pk=self.tatooine.pk).name, 'Tatooine')
@@ -0,0 +1,134 @@
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from ..cache import get_cache_stats
+from ..importers import PlanetImporter
+from ..models import Planet, Climate, Terrain
+
+
+@override_settings(API_RESPONSE_CACHE={'ENABLED': True})
+class ResponseCacheTest(APITestCase):
+    """Test response caching and signal-driven invalidation"""
+
+    def setUp(self):
+        cache.clear()
+        self.desert = Terrain.objects.create(name="Desert")
+        self.arid = Climate.objects.create(name="Arid")
+        self.planet = Planet.objects.create(name="Tatooine", population="200000")
+        self.planet.terrains.add(self.desert)
+
+    def get(self, url, params=None, **extra):
+        return self.client.get(url, params, **extra)
+
+    def test_second_request_is_served_from_cache(self):
+        """Test that a repeated list request is served from the cache"""
+        url = reverse('planet-list')
+        first = self.get(url)
+        self.assertEqual(first['X-Cache'], 'MISS')
+
+        with self.assertNumQueries(0):
+            second = self.get(url)
+
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(get_cache_stats()['hits'], 1)
+        self.assertEqual(get_cache_stats()['misses'], 1)
+
+    def test_hit_answers_conditional_requests(self):
+        """Test that a cached entry keeps its validators and answers 304 without queries"""
+        url = reverse('planet-detail', kwargs={'pk': self.planet.pk})
+        first = self.get(url)
+
+        with self.assertNumQueries(0):
+            response = self.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response['ETag'], first['ETag'])
+
+        response = self.get(url, HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Last-Modified'], first['Last-Modified'])
+        self.assertEqual(response.content, first.content)
+
+    def test_query_params_are_normalized(self):
+        """Test that parameter order does not change the cache key"""
+        url = reverse('planet-list')
+        self.get(url + '?search=tat&ordering=name')
+        response = self.get(url + '?ordering=name&search=tat')
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+        response = self.get(url + '?ordering=-name&search=tat')
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_planet_save_invalidates(self):
+        """Test that saving a planet invalidates planet responses"""
+        url = reverse('planet-detail', kwargs={'pk': self.planet.pk})
+        self.get(url)
+
+        self.planet.population = "300000"
+        self.planet.save()
+
+        response = self.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['population'], "300000")
+
+    def test_relation_change_invalidates(self):
+        """Test that m2m changes invalidate planet responses"""
+        url = reverse('planet-detail', kwargs={'pk': self.planet.pk})
+        self.get(url)
+
+        self.planet.climates.add(self.arid)
+
+        response = self.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['climates'], ["Arid"])
+
+    def test_terrain_rename_invalidates_planets(self):
+        """Test that related model changes invalidate dependent endpoints"""
+        url = reverse('planet-list')
+        climate_url = reverse('climate-list')
+        self.get(url)
+        self.get(climate_url)
+
+        self.desert.name = "Dunes"
+        self.desert.save()
+
+        self.assertEqual(self.get(url)['X-Cache'], 'MISS')
+        self.assertEqual(self.get(climate_url)['X-Cache'], 'HIT')
+
+    def test_import_invalidates(self):
+        """Test that bulk imports invalidate cached responses"""
+        url = reverse('planet-list')
+        self.get(url)
+
+        PlanetImporter().run([{'name': 'Hoth', 'terrains': ['tundra'], 'climates': ['frozen']}])
+
+        response = self.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['count'], 2)
+
+    def test_bypass_header(self):
+        """Test that the bypass header skips the cache"""
+        url = reverse('terrain-list')
+        self.get(url)
+
+        response = self.get(url, HTTP_X_CACHE_BYPASS='1')
+        self.assertEqual(response['X-Cache'], 'BYPASS')
+
+        response = self.get(url, HTTP_CACHE_CONTROL='no-cache')
+        self.assertEqual(response['X-Cache'], 'BYPASS')
+
+    def test_errors_are_not_cached(self):
+        """Test that 404 responses are not stored"""
+        url = reverse('planet-detail', kwargs={'pk': 999})
+        self.get(url)
+
+        self.assertEqual(self.get(url).status_code, 404)
+        self.assertEqual(get_cache_stats()['hits'], 0)
+
+    @override_settings(API_RESPONSE_CACHE={'ENABLED': False})
+    def test_disabled(self):
+        """Test that a disabled cache adds no header"""
+        response = self.get(reverse('planet-list'))
+        self.assertNotIn('X-Cache', response)
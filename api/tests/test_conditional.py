@@ -0,0 +1,127 @@
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.test import APITestCase
+from ..models import Planet, Climate, Terrain
+
+
+class ConditionalGetTest(APITestCase):
+    """Test ETag and Last-Modified validators"""
+
+    def setUp(self):
+        cache.clear()
+        self.desert = Terrain.objects.create(name="Desert")
+        self.arid = Climate.objects.create(name="Arid")
+        self.planet = Planet.objects.create(name="Tatooine", population="200000")
+        self.planet.terrains.add(self.desert)
+        self.list_url = reverse('planet-list')
+        self.detail_url = reverse('planet-detail', kwargs={'pk': self.planet.pk})
+
+    def etag(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response['ETag']
+
+    def test_validators_present(self):
+        """Test that list and detail responses carry validators"""
+        for url in (self.list_url, self.detail_url, reverse('terrain-list')):
+            response = self.client.get(url)
+            self.assertTrue(response['ETag'].startswith('"'))
+            self.assertIn('Last-Modified', response)
+
+    def test_if_none_match(self):
+        """Test that a matching ETag answers 304 without a body"""
+        etag = self.etag(self.detail_url)
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_if_modified_since(self):
+        """Test Last-Modified revalidation"""
+        last_modified = self.client.get(self.list_url)['Last-Modified']
+
+        response = self.client.get(self.list_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(self.list_url, HTTP_IF_MODIFIED_SINCE=http_date(0))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_query_params_change_etag(self):
+        """Test that different filters produce different ETags"""
+        self.assertNotEqual(self.etag(self.list_url), self.etag(self.list_url, {'search': 'tat'}))
+
+    def test_save_changes_etag(self):
+        """Test that editing a planet changes its ETag"""
+        etag = self.etag(self.detail_url)
+        self.planet.population = "300000"
+        self.planet.save()
+        self.assertNotEqual(self.etag(self.detail_url), etag)
+
+    def test_relation_change_changes_etag(self):
+        """Test that m2m changes touch the planet"""
+        etag = self.etag(self.detail_url)
+        self.planet.climates.add(self.arid)
+        self.assertNotEqual(self.etag(self.detail_url), etag)
+
+    def test_reverse_relation_changes_touch_planets(self):
+        """Test that adds and clears from the terrain side touch planets"""
+        hoth = Planet.objects.create(name="Hoth")
+        before = Planet.objects.get(pk=hoth.pk).updated_at
+
+        self.desert.planet_set.add(hoth)
+        after_add = Planet.objects.get(pk=hoth.pk).updated_at
+        self.assertGreater(after_add, before)
+
+        self.desert.planet_set.clear()
+        self.assertGreater(Planet.objects.get(pk=hoth.pk).updated_at, after_add)
+
+    def test_terrain_rename_changes_planet_etag(self):
+        """Test that renaming a related terrain changes planet ETags"""
+        etag = self.etag(self.list_url)
+        self.desert.name = "Dunes"
+        self.desert.save()
+        self.assertNotEqual(self.etag(self.list_url), etag)
+
+    def test_delete_changes_etag(self):
+        """Test that deleting a planet changes the list ETag"""
+        Planet.objects.create(name="Hoth")
+        etag = self.etag(self.list_url, {'pagination': 'keyset'})
+        Planet.objects.filter(name="Hoth").delete()
+        self.assertNotEqual(self.etag(self.list_url, {'pagination': 'keyset'}), etag)
+
+    def test_delete_is_seen_by_every_worker(self):
+        """Test that a delete changes the keyset ETag without the deleting process's cache"""
+        Planet.objects.create(name="Hoth")
+        # Hoth is not the latest change, so MAX(updated_at) stays put
+        self.planet.save()
+        etag = self.etag(self.list_url, {'pagination': 'keyset'})
+        Planet.objects.filter(name="Hoth").delete()
+        # As seen from a worker with its own local memory cache
+        cache.clear()
+        response = self.client.get(self.list_url, {'pagination': 'keyset'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_update_out_of_filter_changes_keyset_etag(self):
+        """Test that a row updated out of a keyset page's filter changes its ETag"""
+        # Hoth stays in the filter and holds the filtered MAX(updated_at)
+        Planet.objects.create(name="Hoth", population="1000")
+        params = {'pagination': 'keyset', 'population_min': 100}
+        etag = self.etag(self.list_url, params)
+        response = self.client.patch(self.detail_url, {'population': '5'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.get(self.list_url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([planet['name'] for planet in response.data['results']], ['Hoth'])
+
+    def test_missing_object(self):
+        """Test that 404 responses carry no validators"""
+        response = self.client.get(reverse('planet-detail', kwargs={'pk': 999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn('ETag', response)
@@ -0,0 +1,63 @@
+import unittest
+from unittest import mock
+
+from django.db import close_old_connections, connection
+from django.test import TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+
+try:
+    import psycopg_pool
+except ImportError:
+    psycopg_pool = None
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', "Needs PostgreSQL, e.g. from docker-compose.yml")
+class ConnectionReuseTest(TransactionTestCase):
+    """Test which server connections successive requests run on"""
+
+    def setUp(self):
+        # Reconnect with the patched settings
+        connection.close()
+        self.addCleanup(connection.close)
+
+    def backend_pids(self, requests=3):
+        """The PostgreSQL backend process serving each request"""
+        pids = []
+        for _ in range(requests):
+            # The test client leaves out the cleanup a server does around each request
+            close_old_connections()
+            response = self.client.get(reverse('planet-list'))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_backend_pid()')
+                pids.append(cursor.fetchone()[0])
+            close_old_connections()
+        return pids
+
+    def test_new_connection_per_request(self):
+        with mock.patch.dict(connection.settings_dict, {'CONN_MAX_AGE': 0}):
+            self.assertEqual(len(set(self.backend_pids())), 3)
+
+    def test_persistent_connection_is_reused(self):
+        with mock.patch.dict(connection.settings_dict, {'CONN_MAX_AGE': 60}):
+            self.assertEqual(len(set(self.backend_pids())), 1)
+
+    def test_broken_connection_is_replaced(self):
+        with mock.patch.dict(connection.settings_dict, {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True}):
+            [first] = self.backend_pids(1)
+            # As if the server had dropped the connection between requests
+            connection.connection.close()
+            [second] = self.backend_pids(1)
+        self.assertNotEqual(first, second)
+
+    @unittest.skipIf(psycopg_pool is None or connection.Database.__name__ != 'psycopg', "Needs psycopg[pool]")
+    def test_pooled_connection_is_reused(self):
+        options = {**connection.settings_dict['OPTIONS'], 'pool': {'min_size': 1, 'max_size': 1}}
+        with mock.patch.dict(connection.settings_dict, {'CONN_MAX_AGE': 0, 'OPTIONS': options}):
+            try:
+                pids = self.backend_pids()
+            finally:
+                connection.close()
+                connection.close_pool()
+        self.assertEqual(len(set(pids)), 1)
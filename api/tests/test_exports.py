@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from ..exports import iter_planet_rows
+from ..models import Planet, Climate, Terrain
+
+
+class PlanetExportTest(APITestCase):
+    """Test the streaming planet export"""
+
+    def setUp(self):
+        self.url = reverse('planet-export')
+        self.desert = Terrain.objects.create(name="desert")
+        self.arid = Climate.objects.create(name="arid")
+        self.tatooine = Planet.objects.create(name="Tatooine", population="200000")
+        self.tatooine.terrains.add(self.desert)
+        self.tatooine.climates.add(self.arid)
+        self.hoth = Planet.objects.create(name="Hoth")
+
+    def content(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_is_default(self):
+        """Test one JSON object per line"""
+        response = self.client.get(self.url)
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+
+        rows = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual(rows, [
+            {'id': self.tatooine.id, 'name': 'Tatooine', 'population': '200000',
+             'terrains': ['desert'], 'climates': ['arid']},
+            {'id': self.hoth.id, 'name': 'Hoth', 'population': None, 'terrains': [], 'climates': []},
+        ])
+
+    def test_csv(self):
+        """Test CSV output with a header and joined relation names"""
+        self.tatooine.terrains.add(Terrain.objects.create(name="dunes"))
+        response = self.client.get(self.url, {'format': 'csv'})
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        self.assertIn('planets.csv', response['Content-Disposition'])
+
+        rows = list(csv.DictReader(io.StringIO(self.content(response))))
+        self.assertEqual(rows[0]['terrains'], 'desert, dunes')
+        self.assertEqual(rows[1]['population'], '')
+
+    def test_accept_header(self):
+        """Test that the format can be negotiated"""
+        response = self.client.get(self.url, HTTP_ACCEPT='text/csv')
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+
+    def test_list_filters_apply(self):
+        """Test that export honours the list filters"""
+        response = self.client.get(self.url, {'search': 'hot'})
+        rows = [json.loads(line) for line in self.content(response).splitlines()]
+        self.assertEqual([row['name'] for row in rows], ['Hoth'])
+
+    def test_single_query(self):
+        """Test that streaming costs a single query"""
+        for i in range(10):
+            Planet.objects.create(name=f"Planet {i}").terrains.add(self.desert)
+
+        queryset = Planet.objects.order_by('id')
+        with CaptureQueriesContext(connection) as context:
+            rows = list(iter_planet_rows(queryset, chunk_size=5))
+
+        self.assertEqual(len(rows), 12)
+        self.assertEqual(rows[-1]['terrains'], ['desert'])
+        # One cursor over planets; names are stored on the rows
+        self.assertEqual(len(context.captured_queries), 1)
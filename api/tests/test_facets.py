@@ -0,0 +1,88 @@
+from unittest import mock
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from ..facets import facet_counts
+from ..filters import PlanetFilter
+from ..models import Planet, Climate, Terrain
+
+
+class FacetCountsTest(APITestCase):
+    """Test planet counts per terrain and climate"""
+
+    def setUp(self):
+        self.desert = Terrain.objects.create(name="desert")
+        self.mountains = Terrain.objects.create(name="mountains")
+        self.tundra = Terrain.objects.create(name="tundra")
+        self.arid = Climate.objects.create(name="arid")
+        self.frozen = Climate.objects.create(name="frozen")
+
+        for name, population, terrains, climates in [
+            ("Tatooine", "200000", [self.desert], [self.arid]),
+            ("Jakku", "6000", [self.desert, self.mountains], [self.arid]),
+            ("Hoth", None, [self.tundra, self.mountains], [self.frozen]),
+        ]:
+            planet = Planet.objects.create(name=name, population=population)
+            planet.terrains.set(terrains)
+            planet.climates.set(climates)
+
+    def test_facet_counts_single_query(self):
+        """Test that counting is one grouped query"""
+        with CaptureQueriesContext(connection) as context:
+            counts = facet_counts(Planet.objects.all(), 'terrains')
+
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertEqual(counts, [
+            {'id': self.desert.pk, 'name': 'desert', 'count': 2},
+            {'id': self.mountains.pk, 'name': 'mountains', 'count': 2},
+            {'id': self.tundra.pk, 'name': 'tundra', 'count': 1},
+        ])
+
+    def test_terrain_facets_endpoint(self):
+        """Test the terrain facets endpoint"""
+        response = self.client.get(reverse('terrain-facets'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(row['name'], row['count']) for row in response.data['results']],
+                         [('desert', 2), ('mountains', 2), ('tundra', 1)])
+
+    def test_facets_honour_planet_filters(self):
+        """Test that the planet list parameters narrow the counts"""
+        response = self.client.get(reverse('climate-facets'), {'population_min': 100000})
+        self.assertEqual([(row['name'], row['count']) for row in response.data['results']], [('arid', 1)])
+
+        response = self.client.get(reverse('terrain-facets'), {'search': 'mountains'})
+        self.assertEqual([(row['name'], row['count']) for row in response.data['results']],
+                         [('mountains', 2), ('desert', 1), ('tundra', 1)])
+
+    def test_planet_list_facets(self):
+        """Test facets attached to a filtered planet list"""
+        response = self.client.get(reverse('planet-list'), {'facets': 'terrains,climates', 'search': 'desert'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([(row['name'], row['count']) for row in response.data['facets']['terrains']],
+                         [('desert', 2), ('mountains', 1)])
+        self.assertEqual([(row['name'], row['count']) for row in response.data['facets']['climates']],
+                         [('arid', 2)])
+
+    def test_planet_list_facets_filter_once(self):
+        """Test that the facet counts reuse the queryset the list was filtered with"""
+        with mock.patch.object(PlanetFilter, 'filter_queryset', autospec=True,
+                               side_effect=PlanetFilter.filter_queryset) as filter_queryset:
+            response = self.client.get(reverse('planet-list'), {'facets': 'terrains,climates', 'search': 'desert'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(filter_queryset.call_count, 1)
+
+    def test_planet_list_without_facets(self):
+        """Test that facets are only computed on request"""
+        response = self.client.get(reverse('planet-list'))
+        self.assertNotIn('facets', response.data)
+
+    def test_unknown_facet(self):
+        """Test that unknown facet names are rejected"""
+        response = self.client.get(reverse('planet-list'), {'facets': 'moons'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('facets', response.data)
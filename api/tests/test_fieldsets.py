@@ -0,0 +1,69 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from ..models import Planet, Climate, Terrain
+
+
+class SparseFieldsetTest(APITestCase):
+    """Test ?fields= and ?omit= on the list and detail endpoints"""
+
+    def setUp(self):
+        self.desert = Terrain.objects.create(name="desert")
+        self.arid = Climate.objects.create(name="arid")
+        self.planet = Planet.objects.create(name="Tatooine", population="200000")
+        self.planet.terrains.add(self.desert)
+        self.planet.climates.add(self.arid)
+
+    def get(self, url, params):
+        response = self.client.get(url, params, HTTP_X_CACHE_BYPASS='1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_fields(self):
+        data = self.get(reverse('planet-list'), {'fields': 'name,id'})
+        self.assertEqual(data['results'], [{'id': self.planet.pk, 'name': 'Tatooine'}])
+
+    def test_omit(self):
+        data = self.get(reverse('planet-detail', args=[self.planet.pk]), {'omit': 'population,terrains'})
+        self.assertEqual(data, {'id': self.planet.pk, 'name': 'Tatooine', 'climates': ['arid']})
+
+    def test_terrains_and_climates(self):
+        self.assertEqual(self.get(reverse('terrain-list'), {'fields': 'name'})['results'], [{'name': 'desert'}])
+        self.assertEqual(
+            self.get(reverse('climate-detail', args=[self.arid.pk]), {'omit': 'created_at,updated_at'}),
+            {'name': 'arid'},
+        )
+
+    def test_related_planets(self):
+        data = self.get(reverse('terrain-planets', args=[self.desert.pk]), {'fields': 'name,terrains'})
+        self.assertEqual(data['results'], [{'name': 'Tatooine', 'terrains': ['desert']}])
+
+    def test_unknown_field(self):
+        response = self.client.get(reverse('planet-list'), {'fields': 'id,mass', 'omit': 'color'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data), {'fields', 'omit'})
+
+    def test_writes_ignore_fields(self):
+        """Test that ?fields= does not hide fields from validation or the write response"""
+        response = self.client.patch(
+            reverse('planet-detail', args=[self.planet.pk]) + '?fields=id',
+            {'population': '1000'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['population'], '1000')
+
+    def test_id_and_name_load_only_those_columns(self):
+        """Test that planet rows come from one query reading only id and name, with no relation tables"""
+        for url in (reverse('planet-list'), reverse('planet-detail', args=[self.planet.pk])):
+            with CaptureQueriesContext(connection) as context:
+                self.get(url, {'fields': 'id,name'})
+
+            queries = [query['sql'] for query in context.captured_queries]
+            row_queries = [sql for sql in queries if 'SELECT "api_planet"."id"' in sql]
+            self.assertEqual(len(row_queries), 1)
+            self.assertTrue(row_queries[0].startswith(
+                'SELECT "api_planet"."id", "api_planet"."name" FROM "api_planet"'
+            ))
+            self.assertFalse([sql for sql in queries if 'api_terrain' in sql or 'api_climate' in sql])
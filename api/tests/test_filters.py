@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from ..models import Planet, Climate, Terrain
+
+
+class PlanetFilterTest(APITestCase):
+    """Test relation and timestamp filters on the planet list"""
+
+    def setUp(self):
+        self.desert = Terrain.objects.create(name="desert")
+        self.mountains = Terrain.objects.create(name="mountains")
+        self.arid = Climate.objects.create(name="arid")
+        self.temperate = Climate.objects.create(name="temperate")
+
+        for name, terrains, climates in [
+            ("Tatooine", [self.desert], [self.arid]),
+            ("Jakku", [self.desert, self.mountains], [self.arid, self.temperate]),
+            ("Alderaan", [self.mountains], [self.temperate]),
+            ("Kamino", [], []),
+        ]:
+            planet = Planet.objects.create(name=name)
+            planet.terrains.set(terrains)
+            planet.climates.set(climates)
+
+    def names(self, params):
+        response = self.client.get(reverse('planet-list'), {**params, 'ordering': 'name'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [planet['name'] for planet in response.data['results']]
+
+    def test_any(self):
+        """Test matching any of several terrains without duplicate rows"""
+        self.assertEqual(self.names({'terrains': 'desert,mountains'}), ['Alderaan', 'Jakku', 'Tatooine'])
+        self.assertEqual(self.names({'terrains': 'desert'}), ['Jakku', 'Tatooine'])
+
+    def test_all(self):
+        """Test matching all of several terrains"""
+        self.assertEqual(self.names({'terrains_all': 'desert,mountains'}), ['Jakku'])
+        self.assertEqual(self.names({'climates_all': 'arid,temperate'}), ['Jakku'])
+        self.assertEqual(self.names({'terrains_all': 'desert,swamp'}), [])
+
+    def test_by_id(self):
+        """Test that numeric values are treated as ids"""
+        self.assertEqual(self.names({'climates': str(self.temperate.pk)}), ['Alderaan', 'Jakku'])
+        self.assertEqual(self.names({'terrains_all': f'{self.desert.pk},mountains'}), ['Jakku'])
+
+    def test_non_ascii_digits(self):
+        """Test that Unicode digits are matched as names rather than ids"""
+        self.assertEqual(self.names({'terrains': '²'}), [])
+        self.assertEqual(self.names({'climates_all': '٣,arid'}), [])
+
+    def test_terrain_and_climate(self):
+        """Test combining terrain and climate filters"""
+        self.assertEqual(self.names({'terrains': 'mountains', 'climates': 'arid'}), ['Jakku'])
+
+    def test_population_range_combines(self):
+        """Test combining relation and population filters"""
+        Planet.objects.filter(name="Jakku").update(population_count=6000)
+        self.assertEqual(self.names({'terrains': 'desert', 'population_min': 1000}), ['Jakku'])
+
+    def test_timestamp_windows(self):
+        """Test created/updated windows"""
+        now = timezone.now()
+        Planet.objects.filter(name="Kamino").update(created_at=now - timedelta(days=10), updated_at=now - timedelta(days=5))
+        cutoff = (now - timedelta(days=1)).isoformat()
+
+        self.assertEqual(self.names({'created_before': cutoff}), ['Kamino'])
+        self.assertEqual(self.names({'updated_after': cutoff}), ['Alderaan', 'Jakku', 'Tatooine'])
+
+    def test_invalid_timestamp(self):
+        """Test that malformed timestamps are rejected"""
+        response = self.client.get(reverse('planet-list'), {'created_after': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_compiles_to_exists(self):
+        """Test that relation filters use EXISTS rather than joins and DISTINCT"""
+        with CaptureQueriesContext(connection) as context:
+            self.names({'terrains_all': 'desert,mountains', 'climates': 'arid'})
+
+        planet_query = next(query['sql'] for query in context.captured_queries
+                            if 'FROM "api_planet"' in query['sql'] and 'LIMIT' in query['sql'])
+        self.assertEqual(planet_query.count('EXISTS'), 3)
+        self.assertNotIn('DISTINCT', planet_query)
@@ -0,0 +1,104 @@
+import re
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from ..importers import PlanetImporter, process_array_field
+from ..models import Planet, Climate, Terrain
+
+
+def statement_count(captured_queries):
+    """Statements sent to the database, where Django logs an executemany() of N rows as one "N times: " entry"""
+    count = 0
+    for query in captured_queries:
+        many = re.match(r'(\d+) times: ', query['sql'])
+        count += int(many.group(1)) if many else 1
+    return count
+
+
+class PlanetImporterTest(TestCase):
+    """Test the bulk planet import pipeline"""
+
+    def setUp(self):
+        self.planets_data = [
+            {'name': 'Tatooine', 'population': '200000', 'terrains': ['desert'], 'climates': ['arid']},
+            {'name': 'Hoth', 'population': 'unknown', 'terrains': 'tundra, ice caves', 'climates': ['frozen']},
+            {'name': 'unknown', 'population': '1', 'terrains': ['desert'], 'climates': ['arid']},
+            {'name': '  ', 'population': '1'},
+        ]
+
+    def test_import_creates_planets_and_relations(self):
+        """Test that a payload is normalized and written"""
+        result = PlanetImporter().run(self.planets_data)
+
+        self.assertEqual(sorted(result.created), ['Hoth', 'Tatooine'])
+        self.assertEqual(result.skipped, 2)
+        self.assertEqual(result.total, 4)
+
+        hoth = Planet.objects.get(name='Hoth')
+        self.assertIsNone(hoth.population)
+        self.assertEqual(
+            sorted(hoth.terrains.values_list('name', flat=True)),
+            ['ice caves', 'tundra']
+        )
+        self.assertEqual(Terrain.objects.count(), 3)
+        self.assertEqual(Climate.objects.count(), 2)
+
+    def test_existing_planets_are_skipped_without_update(self):
+        """Test that existing planets are left alone by default"""
+        PlanetImporter().run(self.planets_data)
+        self.planets_data[0]['population'] = '300000'
+
+        result = PlanetImporter().run(self.planets_data)
+
+        self.assertEqual(result.created, [])
+        self.assertEqual(result.skipped, 4)
+        self.assertEqual(Planet.objects.get(name='Tatooine').population, '200000')
+
+    def test_update_rewrites_fields_and_relations(self):
+        """Test that --update upserts fields and replaces relations"""
+        PlanetImporter().run(self.planets_data)
+        created_at = Planet.objects.get(name='Tatooine').created_at
+        self.planets_data[0].update(population='300000', terrains=['desert', 'canyons'])
+
+        result = PlanetImporter(update=True).run(self.planets_data[:1])
+
+        self.assertEqual(result.updated, ['Tatooine'])
+        tatooine = Planet.objects.get(name='Tatooine')
+        self.assertEqual(tatooine.population, '300000')
+        self.assertEqual(tatooine.created_at, created_at)
+        self.assertEqual(
+            sorted(tatooine.terrains.values_list('name', flat=True)),
+            ['canyons', 'desert']
+        )
+        self.assertEqual(list(tatooine.climates.values_list('name', flat=True)), ['arid'])
+
+    def test_query_count_does_not_grow_with_payload(self):
+        """Test that the number of statements depends on batches, not planets"""
+        planets_data = [
+            {
+                'name': f'Planet {i}',
+                'population': str(i),
+                'terrains': [f'terrain {i % 7}', f'terrain {i % 3}'],
+                'climates': [f'climate {i % 5}'],
+            }
+            for i in range(500)
+        ]
+
+        with CaptureQueriesContext(connection) as context:
+            result = PlanetImporter().run(planets_data)
+
+        self.assertEqual(len(result.created), 500)
+        self.assertLess(statement_count(context.captured_queries), 25)
+        self.assertEqual(
+            Planet.terrains.through.objects.count(),
+            sum(len(set(planet['terrains'])) for planet in planets_data)
+        )
+        self.assertEqual(set(result.timings), {'normalize', 'lookup', 'relations', 'planets', 'links'})
+
+    def test_process_array_field(self):
+        """Test array normalization rules"""
+        self.assertEqual(process_array_field('a; b ;unknown'), ['a', 'b'])
+        self.assertEqual(process_array_field([' a ', '', 'b']), ['a', 'b'])
+        self.assertIsNone(process_array_field('unknown'))
+        self.assertIsNone(process_array_field(None))
@@ -0,0 +1,81 @@
+import re
+from types import SimpleNamespace
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from ..instrumentation import RequestMetrics, add_query_recorder, record_queries, track_queries
+from ..models import Planet
+
+
+@override_settings(API_INSTRUMENTATION={'ENABLED': True})
+class InstrumentationMiddlewareTest(APITestCase):
+    """Test the Server-Timing header and slow request logging"""
+
+    def setUp(self):
+        Planet.objects.create(name="Tatooine")
+
+    def timings(self, response):
+        return {
+            name: (float(duration), desc)
+            for name, duration, desc in re.findall(r'(\w+);dur=([\d.]+)(?:;desc="([^"]*)")?', response['Server-Timing'])
+        }
+
+    def test_server_timing(self):
+        response = self.client.get(reverse('planet-list'))
+        timings = self.timings(response)
+
+        self.assertEqual(list(timings), ['db', 'serialize', 'render', 'total'])
+        self.assertEqual(timings['db'][1], f'{response.metrics.queries} queries')
+        self.assertGreater(response.metrics.queries, 0)
+        self.assertLessEqual(timings['db'][0], timings['total'][0])
+
+    def test_query_budget(self):
+        """Test asserting a query budget from the response"""
+        response = self.client.get(reverse('planet-detail', args=[Planet.objects.get().pk]), {'fields': 'id,name'})
+        self.assertLessEqual(response.metrics.queries, 2)
+
+    @override_settings(API_INSTRUMENTATION={'ENABLED': True, 'MAX_QUERIES': 0, 'SLOWEST_QUERIES': 1})
+    def test_logs_requests_over_budget(self):
+        with self.assertLogs('api.instrumentation', level='WARNING') as logs:
+            self.client.get(reverse('planet-list'))
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('Slow request GET /api/v1/planets/', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+    @override_settings(API_INSTRUMENTATION={'ENABLED': False})
+    def test_disabled(self):
+        response = self.client.get(reverse('planet-list'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertFalse(hasattr(response, 'metrics'))
+
+
+class TrackQueriesTest(TestCase):
+    """Test the query tracking context manager"""
+
+    def test_counts_queries(self):
+        with track_queries() as metrics:
+            Planet.objects.create(name="Hoth")
+            list(Planet.objects.all())
+
+        self.assertEqual(metrics.queries, 2)
+        self.assertGreaterEqual(metrics.db_ms, 0)
+
+    def test_keeps_slowest(self):
+        metrics = RequestMetrics(keep_slowest=2)
+        for duration, sql in [(1.0, 'a'), (5.0, 'b'), (3.0, 'c'), (0.5, 'd')]:
+            metrics.record(sql, duration)
+
+        self.assertEqual(metrics.queries, 4)
+        self.assertEqual(metrics.slowest, [(5.0, 'b'), (3.0, 'c')])
+
+    @override_settings(API_INSTRUMENTATION={'ENABLED': False}, API_METRICS={'ENABLED': False})
+    def test_connections_unwrapped_when_disabled(self):
+        connection = SimpleNamespace(execute_wrappers=[])
+        add_query_recorder(None, connection)
+        self.assertEqual(connection.execute_wrappers, [])
+
+        with track_queries():
+            add_query_recorder(None, connection)
+        self.assertEqual(connection.execute_wrappers, [record_queries])
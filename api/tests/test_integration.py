@@ -61,7 +61,7 @@ class PlanetIntegrationTest(APITestCase):
         climate_planets_url = reverse('climate-planets', kwargs={'pk': climate.pk})
         response = self.client.get(climate_planets_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
         
         # 4. Delete the planet
         response = self.client.delete(update_url)
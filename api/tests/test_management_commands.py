@@ -1,6 +1,8 @@
 # test_fetch_planets_command.py
 from django.test import TestCase
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from unittest.mock import patch, Mock, MagicMock
 from io import StringIO
 import requests
@@ -88,4 +90,94 @@ class FetchPlanetsCommandTest(TestCase):
         self.assertIn('Retrieved 3 planets', output)
         self.assertIn('Created: Tatooine', output)
         self.assertIn('Created: 3', output)
-   
\ No newline at end of file
+
+    @patch('api.management.commands.fetch_planets.record_import')
+    @patch('requests.Session.get')
+    def test_run_is_recorded_once(self, mock_get, record_import):
+        """Test that a failure after the import does not also record the run as failed"""
+        mock_response = Mock()
+        mock_response.json.return_value = self.mock_api_response
+        mock_get.return_value = mock_response
+
+        class FailingSummary(StringIO):
+            def write(self, text):
+                if 'Summary' in text:
+                    raise OSError('stdout closed')
+                return super().write(text)
+
+        with self.assertRaises(OSError):
+            call_command('fetch_planets', stdout=FailingSummary())
+
+        record_import.assert_called_once()
+        self.assertEqual(record_import.call_args.args[0].created, ['Tatooine', 'Alderaan', 'Yavin IV'])
+   
+
+class RebuildRelationNamesCommandTest(TestCase):
+    """Test cases for rebuild_relation_names management command"""
+
+    def test_rebuilds_stale_names(self):
+        """Test that names drifted from the relations are rewritten"""
+        desert = Terrain.objects.create(name='desert')
+        arid = Climate.objects.create(name='arid')
+        planet = Planet.objects.create(name='Tatooine')
+        planet.terrains.add(desert)
+        planet.climates.add(arid)
+        Planet.objects.update(terrain_names=['stale'], climate_names=[])
+
+        out = StringIO()
+        call_command('rebuild_relation_names', batch_size=1, stdout=out)
+
+        planet.refresh_from_db()
+        self.assertEqual(planet.terrain_names, ['desert'])
+        self.assertEqual(planet.climate_names, ['arid'])
+        self.assertIn('Rebuilt relation names for 1 planets', out.getvalue())
+
+
+class GeneratePlanetsCommandTest(TestCase):
+    """Test cases for generate_planets management command"""
+
+    def generate(self, count, **options):
+        out = StringIO()
+        call_command('generate_planets', count, stdout=out, **options)
+        return out.getvalue()
+
+    def snapshot(self, prefix):
+        return [
+            (name.split(' ', 1)[1], population, population_count, terrains, climates)
+            for name, population, population_count, terrains, climates in Planet.objects
+            .filter(name__startswith=f'{prefix} ')
+            .order_by('pk')
+            .values_list('name', 'population', 'population_count', 'terrain_names', 'climate_names')
+        ]
+
+    def test_generates_planets_with_relations(self):
+        output = self.generate(25, chunk_size=10)
+
+        self.assertIn('Generated 25 planets', output)
+        self.assertEqual(Planet.objects.count(), 25)
+        for planet in Planet.objects.prefetch_related('terrains', 'climates'):
+            self.assertTrue(1 <= len(planet.terrain_names) <= 3)
+            self.assertEqual(planet.terrain_names, sorted(terrain.name for terrain in planet.terrains.all()))
+            self.assertEqual(planet.climate_names, sorted(climate.name for climate in planet.climates.all()))
+            if planet.population is not None:
+                self.assertEqual(planet.population_count, int(planet.population))
+
+    def test_seeded_output_is_reproducible(self):
+        """Test that a seed produces the same planets whatever the chunk size"""
+        self.generate(30, seed=7, prefix='A', chunk_size=4)
+        self.generate(30, seed=7, prefix='B')
+        self.generate(30, seed=8, prefix='C')
+
+        self.assertEqual(self.snapshot('A'), self.snapshot('B'))
+        self.assertNotEqual(self.snapshot('A'), self.snapshot('C'))
+
+    def test_rejects_existing_prefix(self):
+        self.generate(2)
+        with self.assertRaises(CommandError):
+            self.generate(2)
+
+    def test_copy_requires_postgresql(self):
+        if connection.vendor == 'postgresql':
+            self.skipTest('COPY is available')
+        with self.assertRaises(CommandError):
+            self.generate(2, method='copy')
@@ -0,0 +1,99 @@
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from ..importers import ImportResult
+from ..metrics import MetricsRegistry, get_registry, record_import, render_metrics
+from ..models import Planet
+
+
+def sample(text, line_start):
+    """Return the value of the first exposition line starting with line_start"""
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(' ', 1)[1])
+    return 0.0
+
+
+@override_settings(API_METRICS={'ENABLED': True})
+class MetricsEndpointTest(APITestCase):
+    """Test the /metrics/ endpoint"""
+
+    def scrape(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return response.content.decode()
+
+    def test_counts_requests(self):
+        Planet.objects.create(name="Tatooine")
+        line = 'api_requests_total{method="GET",status="200",view="planet-list"}'
+        before = sample(self.scrape(), line)
+
+        self.client.get(reverse('planet-list'))
+        self.client.get(reverse('planet-list'))
+        text = self.scrape()
+
+        self.assertEqual(sample(text, line), before + 2)
+        self.assertIn('api_request_duration_seconds_bucket{method="GET",view="planet-list",le="+Inf"}', text)
+        self.assertGreater(sample(text, 'api_db_queries_total{method="GET",view="planet-list"}'), 0)
+        self.assertIn('# TYPE api_response_cache_hits_total counter', text)
+
+    def test_unmatched_routes(self):
+        self.client.get('/api/v1/no-such-thing/')
+        self.assertIn('status="404",view="unmatched"', self.scrape())
+
+    def test_import_statistics(self):
+        before = sample(self.scrape(), 'api_import_planets_total{outcome="created"}')
+        record_import(ImportResult(created=['Hoth', 'Endor'], skipped=1, total=3, timings={'planets': 0.5}))
+        record_import(None)
+        text = self.scrape()
+
+        self.assertEqual(sample(text, 'api_import_planets_total{outcome="created"}'), before + 2)
+        self.assertGreater(sample(text, 'api_import_last_success_timestamp_seconds'), 0)
+        self.assertGreater(sample(text, 'api_import_runs_total{status="failed"}'), 0)
+
+
+class MetricsRegistryTest(SimpleTestCase):
+    """Test histograms and multiprocess aggregation"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_histogram_is_cumulative(self):
+        registry = MetricsRegistry()
+        for seconds in (0.001, 0.02, 0.02, 30):
+            registry.observe('api_request_duration_seconds', seconds, {'view': 'v', 'method': 'GET'})
+        text = render_metrics(registry.collect())
+
+        bucket = 'api_request_duration_seconds_bucket{'
+        self.assertEqual(sample(text, bucket + 'method="GET",view="v",le="0.005"}'), 1)
+        self.assertEqual(sample(text, bucket + 'method="GET",view="v",le="0.025"}'), 3)
+        self.assertEqual(sample(text, bucket + 'method="GET",view="v",le="10.0"}'), 3)
+        self.assertEqual(sample(text, bucket + 'method="GET",view="v",le="+Inf"}'), 4)
+        self.assertEqual(sample(text, 'api_request_duration_seconds_count{method="GET",view="v"}'), 4)
+
+    def test_merges_processes(self):
+        """Test that registries sharing a directory are summed, gauges by maximum"""
+        first, second = MetricsRegistry(self.directory), MetricsRegistry(self.directory)
+        first.inc('api_import_runs_total', {'status': 'succeeded'}, 2)
+        second.inc('api_import_runs_total', {'status': 'succeeded'})
+        first.set_max('api_import_last_success_timestamp_seconds', 100)
+        second.set_max('api_import_last_success_timestamp_seconds', 50)
+        second.flush()
+
+        text = render_metrics(first.collect())
+        self.assertEqual(sample(text, 'api_import_runs_total{status="succeeded"}'), 3)
+        self.assertEqual(sample(text, 'api_import_last_success_timestamp_seconds'), 100)
+
+    def test_label_escaping(self):
+        registry = MetricsRegistry()
+        registry.inc('api_requests_total', {'view': 'a"b\\c'})
+        self.assertIn('api_requests_total{view="a\\"b\\\\c"} 1.0', render_metrics(registry.collect()))
+
+    def test_default_registry(self):
+        self.assertIs(get_registry(), get_registry())
@@ -1,7 +1,7 @@
 from django.test import TestCase
 from django.db import IntegrityError, transaction
 from django.core.exceptions import ValidationError
-from ..models import Planet, Climate, Terrain
+from ..models import Planet, Climate, Terrain, parse_population
 
 
 class BaseModelTest(TestCase):
@@ -175,4 +175,30 @@ class TerrainModelTest(TestCase):
         
         self.assertEqual(terrain.planet_set.count(), 2)
         self.assertIn(planet1, terrain.planet_set.all())
-        self.assertIn(planet2, terrain.planet_set.all())
\ No newline at end of file
+        self.assertIn(planet2, terrain.planet_set.all())
+
+
+class PlanetPopulationCountTest(TestCase):
+    """Test the numeric population column"""
+
+    def test_parse_population(self):
+        """Test parsing free-form population strings"""
+        self.assertEqual(parse_population("200000"), 200000)
+        self.assertEqual(parse_population(" 1,000,000 "), 1000000)
+        self.assertIsNone(parse_population("unknown"))
+        self.assertIsNone(parse_population(""))
+        self.assertIsNone(parse_population(None))
+        self.assertIsNone(parse_population("-5"))
+        self.assertIsNone(parse_population("9" * 30))
+        self.assertIsNone(parse_population("²"))
+        self.assertIsNone(parse_population("٣"))
+
+    def test_population_count_follows_population(self):
+        """Test that saving keeps population_count in sync"""
+        planet = Planet.objects.create(name="Earth", population="7800000000")
+        self.assertEqual(planet.population_count, 7800000000)
+
+        planet.population = "unknown"
+        planet.save(update_fields=['population'])
+        planet.refresh_from_db()
+        self.assertIsNone(planet.population_count)
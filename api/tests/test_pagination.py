@@ -0,0 +1,114 @@
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from ..models import Planet, Terrain
+from ..pagination import KeysetPagination
+
+
+class KeysetPaginationTest(APITestCase):
+    """Test opt-in keyset pagination on the list endpoints"""
+
+    def setUp(self):
+        self.planets = [Planet.objects.create(name=f"Planet {i:02d}") for i in range(45)]
+        # Shuffle timestamps so created_at order differs from id order, with ties,
+        # and give a third of the planets no numeric population
+        for i, planet in enumerate(self.planets):
+            Planet.objects.filter(pk=planet.pk).update(
+                created_at=self.planets[(i * 7) % 45 // 2].created_at,
+                population_count=None if i % 3 == 0 else (i * 11) % 9,
+            )
+
+    def walk(self, url, params):
+        names = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            names.extend(planet['name'] for planet in response.data['results'])
+            if not response.data['next']:
+                return names, response
+            response = self.client.get(response.data['next'])
+
+    def test_keyset_pages_match_full_ordering(self):
+        """Test that walking every cursor yields each planet once, in order"""
+        url = reverse('planet-list')
+        orderings = [
+            'id', '-id', 'name', '-name', 'population_count', '-population_count',
+            'created_at', '-created_at', 'updated_at', '-updated_at',
+        ]
+        for ordering in orderings:
+            with self.subTest(ordering=ordering):
+                field = ordering.lstrip('-')
+                descending = ordering.startswith('-')
+                order_field = F(field).desc(nulls_last=True) if descending else F(field).asc(nulls_last=True)
+                expected = list(Planet.objects.order_by(order_field, '-id' if descending else 'id')
+                                .values_list('name', flat=True))
+
+                names, _ = self.walk(url, {'pagination': 'keyset', 'ordering': ordering})
+
+                self.assertEqual(names, expected, field)
+
+    def test_previous_links_walk_backwards(self):
+        """Test that previous cursors return the preceding pages"""
+        url = reverse('planet-list')
+        first = self.client.get(url, {'pagination': 'keyset', 'ordering': 'created_at'})
+        second = self.client.get(first.data['next'])
+        third = self.client.get(second.data['next'])
+
+        back = self.client.get(third.data['previous'])
+        self.assertEqual(back.data['results'], second.data['results'])
+
+        back = self.client.get(back.data['previous'])
+        self.assertEqual(back.data['results'], first.data['results'])
+
+    def test_previous_links_across_nulls(self):
+        """Test walking backwards from pages of planets without a population"""
+        url = reverse('planet-list')
+        pages = [self.client.get(url, {'pagination': 'keyset', 'ordering': '-population_count'})]
+        while pages[-1].data['next']:
+            pages.append(self.client.get(pages[-1].data['next']))
+
+        for index in range(len(pages) - 1, 0, -1):
+            back = self.client.get(pages[index].data['previous'])
+            self.assertEqual(back.data['results'], pages[index - 1].data['results'])
+
+    def test_keyset_skips_count(self):
+        """Test that keyset pages never run COUNT or OFFSET"""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse('planet-list'), {'pagination': 'keyset'})
+
+        self.assertEqual(len(response.data['results']), KeysetPagination.page_size)
+        for query in context.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'].upper())
+            self.assertNotIn('OFFSET', query['sql'].upper())
+
+    def test_cursor_for_other_ordering_is_rejected(self):
+        """Test that a cursor cannot be reused with a different ordering"""
+        url = reverse('planet-list')
+        response = self.client.get(url, {'pagination': 'keyset', 'ordering': 'name'})
+        cursor = response.data['next'].split('cursor=')[1]
+
+        response = self.client.get(url, {'cursor': cursor, 'ordering': 'created_at'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor returns 404"""
+        response = self.client.get(reverse('planet-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_number_pagination_is_default(self):
+        """Test that page number pagination stays the default"""
+        response = self.client.get(reverse('planet-list'))
+        self.assertEqual(response.data['count'], 45)
+
+    def test_terrain_keyset_pagination(self):
+        """Test that keyset pagination is available on terrains"""
+        for i in range(25):
+            Terrain.objects.create(name=f"Terrain {i:02d}")
+
+        names, _ = self.walk(reverse('terrain-list'), {'pagination': 'keyset', 'ordering': '-name'})
+        self.assertEqual(names, sorted(names, reverse=True))
+        self.assertEqual(len(names), 25)
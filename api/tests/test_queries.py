@@ -0,0 +1,89 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from ..models import Planet, Climate, Terrain
+
+
+class PlanetQueryCountTest(APITestCase):
+    """Test that planet endpoints issue a constant number of queries"""
+
+    def setUp(self):
+        self.terrains = [Terrain.objects.create(name=f"Terrain {i}") for i in range(3)]
+        self.climates = [Climate.objects.create(name=f"Climate {i}") for i in range(3)]
+
+    def create_planets(self, count):
+        for i in range(count):
+            planet = Planet.objects.create(name=f"Planet {Planet.objects.count()}", population=str(i))
+            planet.terrains.set(self.terrains[:1 + i % 3])
+            planet.climates.set(self.climates[:1 + i % 2])
+
+    def count_queries(self, url, params=None):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries), response
+
+    def test_list_query_count_is_constant(self):
+        """Test that a full page costs the same as a small page"""
+        url = reverse('planet-list')
+
+        self.create_planets(2)
+        small_page_queries, response = self.count_queries(url)
+        self.assertEqual(len(response.data['results']), 2)
+
+        self.create_planets(30)
+        full_page_queries, response = self.count_queries(url)
+        self.assertEqual(len(response.data['results']), 20)
+
+        # Validators (planets, terrains, climates, tombstones), COUNT, planets;
+        # relation names come from the planet row itself
+        self.assertEqual(small_page_queries, 6)
+        self.assertEqual(full_page_queries, small_page_queries)
+
+    def test_list_renders_prefetched_relations(self):
+        """Test that prefetched relations render the same names"""
+        self.create_planets(3)
+        _, response = self.count_queries(reverse('planet-list'))
+
+        planet = Planet.objects.get(name=response.data['results'][2]['name'])
+        self.assertEqual(response.data['results'][2]['terrains'], [t.name for t in planet.terrains.all()])
+        self.assertEqual(response.data['results'][2]['climates'], [c.name for c in planet.climates.all()])
+
+    def test_retrieve_query_count(self):
+        """Test retrieving a planet with relations"""
+        self.create_planets(1)
+        planet = Planet.objects.get()
+
+        # Three validator aggregates and the dependency tombstones, then the planet row
+        with self.assertNumQueries(5):
+            response = self.client.get(reverse('planet-detail', kwargs={'pk': planet.pk}))
+
+        self.assertEqual(response.data['terrains'], ['Terrain 0'])
+
+    def test_terrain_planets_action_query_count_is_constant(self):
+        """Test that the terrain planets action prefetches relations"""
+        url = reverse('terrain-planets', kwargs={'pk': self.terrains[0].pk})
+
+        self.create_planets(2)
+        small_queries, _ = self.count_queries(url)
+
+        self.create_planets(10)
+        large_queries, response = self.count_queries(url)
+
+        self.assertEqual(response.data['count'], 12)
+        self.assertEqual(large_queries, small_queries)
+
+    def test_climate_planets_action_query_count_is_constant(self):
+        """Test that the climate planets action prefetches relations"""
+        url = reverse('climate-planets', kwargs={'pk': self.climates[0].pk})
+
+        self.create_planets(2)
+        small_queries, _ = self.count_queries(url)
+
+        self.create_planets(10)
+        large_queries, response = self.count_queries(url)
+
+        self.assertEqual(response.data['count'], 12)
+        self.assertEqual(large_queries, small_queries)
@@ -0,0 +1,88 @@
+import io
+import unittest
+import uuid
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.test import SimpleTestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from ..renderers import FastJSONParser, FastJSONRenderer, orjson
+
+SAMPLE = {
+    'name': 'Tatooine',
+    'population': None,
+    'unicode': 'Ñandú ☃ \u2028\u2029',
+    'numbers': [0, -1, 2 ** 62, 1.5],
+    'nested': {'terrains': ['desert'], 'empty': [], 'flag': True},
+    'decimal': Decimal('1.50'),
+    'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'lazy': gettext_lazy('lazy text'),
+    'created_at': datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+    'day': date(2024, 5, 1),
+}
+
+
+@unittest.skipIf(orjson is None, "orjson is not installed")
+class FastJSONRendererTest(SimpleTestCase):
+    """Test that the fast renderer matches JSONRenderer"""
+
+    def test_matches_stdlib_output(self):
+        self.assertEqual(FastJSONRenderer().render(SAMPLE), JSONRenderer().render(SAMPLE))
+
+    def test_empty(self):
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+        self.assertEqual(FastJSONRenderer().render([]), b'[]')
+
+    def test_indent_falls_back(self):
+        """Test that indented output is left to the stdlib renderer"""
+        media_type = 'application/json; indent=4'
+        self.assertEqual(
+            FastJSONRenderer().render(SAMPLE, media_type),
+            JSONRenderer().render(SAMPLE, media_type),
+        )
+
+    def test_unsupported_values_fall_back(self):
+        """Test values orjson rejects"""
+        data = {'big': 2 ** 70, 1: 'int key'}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_non_finite_floats_are_rejected(self):
+        """Test that NaN and Infinity raise as with STRICT_JSON instead of rendering as null"""
+        for value in (float('nan'), float('inf'), float('-inf')):
+            with self.assertRaises(ValueError):
+                FastJSONRenderer().render({'value': value, 'missing': None})
+
+    def test_exponent_floats(self):
+        """Test that floats in exponent notation keep their value"""
+        data = [1e16, 1e-7, 1.5e300, 0.0001]
+        content = FastJSONRenderer().render(data)
+        self.assertEqual(content, b'[1e16,1e-7,1.5e300,0.0001]')
+        self.assertEqual(orjson.loads(content), orjson.loads(JSONRenderer().render(data)))
+
+    @override_settings(API_FAST_JSON=False)
+    def test_can_be_disabled(self):
+        self.assertEqual(FastJSONRenderer().render(SAMPLE), JSONRenderer().render(SAMPLE))
+
+
+@unittest.skipIf(orjson is None, "orjson is not installed")
+class FastJSONParserTest(SimpleTestCase):
+    """Test the fast parser"""
+
+    def parse(self, parser, content, encoding='utf-8'):
+        return parser.parse(io.BytesIO(content), 'application/json', {'encoding': encoding})
+
+    def test_matches_stdlib_parser(self):
+        content = '{"name": "Ñandú", "terrains": ["desert"], "population": null, "n": 1.5}'.encode()
+        self.assertEqual(self.parse(FastJSONParser(), content), self.parse(JSONParser(), content))
+
+    def test_other_encodings(self):
+        content = '{"name": "Ñandú"}'.encode('latin-1')
+        self.assertEqual(self.parse(FastJSONParser(), content, 'latin-1'), {'name': 'Ñandú'})
+
+    def test_invalid_json(self):
+        for content in (b'{"name": ', b'{"n": NaN}', b'\xff'):
+            with self.assertRaises(ParseError):
+                self.parse(FastJSONParser(), content)
@@ -0,0 +1,139 @@
+import unittest
+
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from ..cache import invalidate
+from ..models import Planet, Climate, Terrain
+from ..search import NgramSearchBackend, TrigramSearchBackend, trigrams
+
+
+class NgramSearchBackendTest(TestCase):
+    """Test the in-process trigram search fallback"""
+
+    def setUp(self):
+        self.backend = NgramSearchBackend()
+        self.tatooine = Planet.objects.create(name="Tatooine", population="200000")
+        self.tatoo = Planet.objects.create(name="Tatoo", population="1000")
+        self.hoth = Planet.objects.create(name="Hoth")
+
+    def search(self, *terms, fields=('name',)):
+        return self.backend.search(Planet.objects.all(), list(terms), list(fields))
+
+    def test_trigrams(self):
+        """Test pg_trgm style padding"""
+        self.assertEqual(trigrams("Hoth"), {'  h', ' ho', 'hot', 'oth', 'th '})
+
+    def test_substring_match(self):
+        """Test that terms match anywhere inside the name"""
+        self.assertEqual(set(self.search("atoo")), {self.tatooine, self.tatoo})
+        self.assertEqual(list(self.search("oth")), [self.hoth])
+        self.assertEqual(list(self.search("xyz")), [])
+
+    def test_short_terms(self):
+        """Test terms shorter than a trigram"""
+        self.assertEqual(list(self.search("h")), [self.hoth])
+
+    def test_relevance_rank(self):
+        """Test that closer matches rank higher"""
+        results = self.search("tatoo").order_by('-search_rank')
+        self.assertEqual(list(results), [self.tatoo, self.tatooine])
+
+    def test_multiple_terms_must_all_match(self):
+        """Test that every term has to match one of the fields"""
+        results = self.search("tatoo", "1000", fields=('name', 'population'))
+        self.assertEqual(list(results), [self.tatoo])
+
+    def test_index_follows_writes(self):
+        """Test that saves and deletes are reflected in results"""
+        self.assertEqual(list(self.search("bespin")), [])
+
+        bespin = Planet.objects.create(name="Bespin")
+        self.assertEqual(list(self.search("bespin")), [bespin])
+
+        bespin.name = "Cloud City"
+        bespin.save()
+        self.assertEqual(list(self.search("bespin")), [])
+
+        Planet.objects.filter(pk=self.hoth.pk).delete()
+        self.assertEqual(list(self.search("hoth")), [])
+
+    def test_index_follows_cache_version(self):
+        """Test that a built index costs no query and is rebuilt once the model's cache version moves on"""
+        list(self.search("hoth"))
+        with self.assertNumQueries(1):
+            self.assertEqual(list(self.search("hoth")), [self.hoth])
+
+        # A bulk write, or a write in another process, sends no signal here
+        Planet.objects.filter(pk=self.hoth.pk).update(name="Echo Base")
+        self.assertEqual(list(self.search("echo")), [])
+        invalidate(Planet)
+        self.assertEqual(list(self.search("echo")), [self.hoth])
+
+    def test_related_search(self):
+        """Test searching planets by terrain name without duplicate rows"""
+        desert = Terrain.objects.create(name="desert")
+        dunes = Terrain.objects.create(name="desert dunes")
+        self.tatooine.terrains.add(desert, dunes)
+
+        results = self.search("desert", fields=('name', 'terrains__name'))
+        self.assertEqual(list(results), [self.tatooine])
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', "pg_trgm requires PostgreSQL")
+class TrigramSearchBackendTest(TestCase):
+    """Test the pg_trgm search backend"""
+
+    def test_substring_match_and_rank(self):
+        tatooine = Planet.objects.create(name="Tatooine")
+        tatoo = Planet.objects.create(name="Tatoo")
+
+        results = TrigramSearchBackend().search(Planet.objects.all(), ["tatoo"], ["name"])
+        self.assertEqual(list(results.order_by('-search_rank')), [tatoo, tatooine])
+
+
+class SearchEndpointTest(APITestCase):
+    """Test search through the API"""
+
+    def setUp(self):
+        self.arid = Climate.objects.create(name="arid")
+        self.desert = Terrain.objects.create(name="desert")
+        self.tatooine = Planet.objects.create(name="Tatooine", population="200000")
+        self.tatooine.terrains.add(self.desert)
+        self.tatooine.climates.add(self.arid)
+        Planet.objects.create(name="Tatoo", population="1000")
+        Planet.objects.create(name="Jakku")
+
+    def names(self, response):
+        return [planet['name'] for planet in response.data['results']]
+
+    def test_search_orders_by_relevance(self):
+        """Test that search results default to relevance order"""
+        response = self.client.get(reverse('planet-list'), {'search': 'tatoo'})
+        self.assertEqual(self.names(response), ['Tatoo', 'Tatooine'])
+
+    def test_explicit_ordering_wins(self):
+        """Test that ?ordering= overrides relevance"""
+        response = self.client.get(reverse('planet-list'), {'search': 'tatoo', 'ordering': '-name'})
+        self.assertEqual(self.names(response), ['Tatooine', 'Tatoo'])
+
+    def test_search_with_keyset_pagination(self):
+        """Test that keyset pages of search results fall back to the default ordering"""
+        response = self.client.get(reverse('planet-list'), {'search': 'tatoo', 'pagination': 'keyset'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.names(response), ['Tatooine', 'Tatoo'])
+
+    def test_search_by_terrain_and_climate(self):
+        """Test that planets can be found by related names"""
+        response = self.client.get(reverse('planet-list'), {'search': 'deser'})
+        self.assertEqual(self.names(response), ['Tatooine'])
+
+        response = self.client.get(reverse('planet-list'), {'search': 'arid'})
+        self.assertEqual(self.names(response), ['Tatooine'])
+
+    def test_search_terrains(self):
+        """Test that terrains use the same backend"""
+        Terrain.objects.create(name="mountains")
+        response = self.client.get(reverse('terrain-list'), {'search': 'ount'})
+        self.assertEqual([t['name'] for t in response.data['results']], ['mountains'])
@@ -1,7 +1,7 @@
 from django.test import TestCase
 from rest_framework.exceptions import ValidationError
 from ..models import Planet, Climate, Terrain
-from ..serializers import PlanetSerializer, ClimateSerializer, TerrainSerializer
+from ..serializers import PlanetReadSerializer, PlanetSerializer, ClimateSerializer, TerrainSerializer
 
 
 class ClimateSerializerTest(TestCase):
@@ -154,4 +154,28 @@ class PlanetSerializerTest(TestCase):
         self.assertEqual(updated_planet.climates.count(), 1)
         self.assertEqual(updated_planet.climates.first().name, "Temperate")
         self.assertEqual(updated_planet.terrains.count(), 1)
-        self.assertEqual(updated_planet.terrains.first().name, "Mountains")
\ No newline at end of file
+        self.assertEqual(updated_planet.terrains.first().name, "Mountains")
+
+
+class PlanetReadSerializerTest(TestCase):
+    """Test that PlanetReadSerializer matches PlanetSerializer output"""
+
+    def setUp(self):
+        self.planet = Planet.objects.create(name="Tatooine", population="200000")
+        self.planet.terrains.add(Terrain.objects.create(name="Desert"))
+        self.planet.climates.add(
+            Climate.objects.create(name="Arid"), Climate.objects.create(name="Hot")
+        )
+        Planet.objects.create(name="Kamino")
+
+    def test_matches_planet_serializer(self):
+        planets = Planet.objects.order_by('id')
+        self.assertEqual(
+            PlanetReadSerializer(planets, many=True).data,
+            PlanetSerializer(planets, many=True).data,
+        )
+
+    def test_values_rows(self):
+        """Test serializing dicts from values() without model instances"""
+        row = Planet.objects.values(*PlanetReadSerializer.sources).get(pk=self.planet.pk)
+        self.assertEqual(PlanetReadSerializer(row).data, PlanetSerializer(self.planet).data)
@@ -0,0 +1,247 @@
+from django.test import TestCase
+from ..models import Climate, Planet, Terrain
+from ..importers import PlanetImporter
+from ..serializers import PlanetSerializer
+from ..services import resolve_names, sync_relation
+
+
+class ResolveNamesTest(TestCase):
+    """Test bulk resolution of terrain and climate names"""
+
+    def test_resolves_existing_and_creates_missing(self):
+        """Test that existing rows are reused and missing rows are created"""
+        desert = Terrain.objects.create(name="Desert")
+
+        terrains = resolve_names(Terrain, ["Desert", "Ocean", "Swamp"])
+
+        self.assertEqual([t.name for t in terrains], ["Desert", "Ocean", "Swamp"])
+        self.assertEqual(terrains[0].pk, desert.pk)
+        self.assertTrue(all(t.pk for t in terrains))
+        self.assertEqual(Terrain.objects.count(), 3)
+
+    def test_query_count_is_constant(self):
+        """Test that resolution costs a fixed number of queries"""
+        Terrain.objects.create(name="Desert")
+        names = ["Desert"] + [f"Terrain {i}" for i in range(25)]
+
+        # SELECT existing, INSERT missing, SELECT inserted
+        with self.assertNumQueries(3):
+            resolve_names(Terrain, names)
+
+        with self.assertNumQueries(1):
+            resolve_names(Terrain, names)
+
+    def test_preserves_duplicates_and_order(self):
+        """Test that duplicate names map to the same instance"""
+        climates = resolve_names(Climate, ["Arid", "Hot", "Arid"])
+
+        self.assertEqual([c.name for c in climates], ["Arid", "Hot", "Arid"])
+        self.assertEqual(climates[0].pk, climates[2].pk)
+        self.assertEqual(Climate.objects.count(), 2)
+
+    def test_empty_names(self):
+        """Test that no queries are issued for empty input"""
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_names(Climate, []), [])
+
+
+class PlanetSerializerResolutionTest(TestCase):
+    """Test that PlanetSerializer validation resolves names in bulk"""
+
+    def test_validation_does_not_requery_names(self):
+        """Test that validating many relations costs a constant number of queries"""
+        data = {
+            'name': 'Kashyyyk',
+            'terrains': [f"Terrain {i}" for i in range(20)],
+            'climates': [f"Climate {i}" for i in range(20)],
+        }
+        serializer = PlanetSerializer(data=data)
+
+        # One SELECT per model; new names are only inserted on save
+        with self.assertNumQueries(2):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+
+        self.assertEqual(len(serializer.validated_data['terrains']), 20)
+        self.assertIsInstance(serializer.validated_data['climates'][0], Climate)
+        self.assertFalse(Terrain.objects.exists())
+
+    def test_invalid_relation_type_is_rejected(self):
+        """Test that a non-list value is left to field validation"""
+        serializer = PlanetSerializer(data={'name': 'Kashyyyk', 'terrains': 'forest'})
+
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('terrains', serializer.errors)
+        self.assertFalse(Terrain.objects.exists())
+
+
+class SyncRelationTest(TestCase):
+    """Test diff-based many-to-many writes"""
+
+    def setUp(self):
+        self.desert = Terrain.objects.create(name="Desert")
+        self.ocean = Terrain.objects.create(name="Ocean")
+        self.swamp = Terrain.objects.create(name="Swamp")
+        self.planet = Planet.objects.create(name="Naboo")
+        self.planet.terrains.set([self.desert, self.ocean])
+
+    def test_writes_only_the_difference(self):
+        """Test that one DELETE and one INSERT apply the change"""
+        # SELECT existing, DELETE removed, INSERT added, and after each the
+        # m2m_changed receiver re-reads the names and updates the planet
+        with self.assertNumQueries(7):
+            changed = sync_relation(self.planet, 'terrains', [self.ocean, self.swamp])
+
+        self.assertTrue(changed)
+        self.assertEqual(
+            sorted(self.planet.terrains.values_list('name', flat=True)),
+            ["Ocean", "Swamp"]
+        )
+
+    def test_unchanged_relation_is_not_written(self):
+        """Test that an identical set issues no writes"""
+        with self.assertNumQueries(1):
+            changed = sync_relation(self.planet, 'terrains', [self.ocean, self.desert])
+
+        self.assertFalse(changed)
+
+    def test_uses_prefetched_links(self):
+        """Test that prefetched links avoid touching the through table"""
+        planet = Planet.objects.prefetch_related('terrains', 'climates').get(pk=self.planet.pk)
+
+        with self.assertNumQueries(0):
+            self.assertFalse(sync_relation(planet, 'terrains', [self.desert, self.ocean]))
+
+    def test_sends_m2m_changed(self):
+        """Test that m2m_changed is sent with the changed primary keys"""
+        from django.db.models.signals import m2m_changed
+
+        received = []
+
+        def receiver(sender, action, pk_set, **kwargs):
+            received.append((action, pk_set))
+
+        m2m_changed.connect(receiver, sender=Planet.terrains.through)
+        try:
+            sync_relation(self.planet, 'terrains', [self.swamp])
+        finally:
+            m2m_changed.disconnect(receiver, sender=Planet.terrains.through)
+
+        self.assertIn(('post_remove', {self.desert.pk, self.ocean.pk}), received)
+        self.assertIn(('post_add', {self.swamp.pk}), received)
+
+
+class PlanetSerializerWriteTest(TestCase):
+    """Test PlanetSerializer relation writes"""
+
+    def setUp(self):
+        self.arid = Climate.objects.create(name="Arid")
+        self.desert = Terrain.objects.create(name="Desert")
+        self.planet = Planet.objects.create(name="Tatooine")
+        self.planet.climates.add(self.arid)
+        self.planet.terrains.add(self.desert)
+
+    def test_update_without_relation_changes(self):
+        """Test that resubmitting the same relations leaves through tables untouched"""
+        planet = Planet.objects.prefetch_related('terrains', 'climates').get(pk=self.planet.pk)
+        serializer = PlanetSerializer(
+            planet,
+            data={'name': 'Tatooine', 'climates': ['Arid'], 'terrains': ['Desert']}
+        )
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+        # Savepoint, UPDATE planet, savepoint release
+        with self.assertNumQueries(3):
+            serializer.save()
+
+    def test_create_inserts_links_in_bulk(self):
+        """Test that creating a planet writes each relation with one INSERT"""
+        serializer = PlanetSerializer(data={
+            'name': 'Hoth',
+            'climates': ['Arid', 'Frozen'],
+            'terrains': ['Desert', 'Tundra', 'Ice caves'],
+        })
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+        # Savepoint, per model INSERT new names and SELECT them, INSERT planet,
+        # per relation INSERT links, SELECT names and UPDATE planet, savepoint release
+        with self.assertNumQueries(13):
+            planet = serializer.save()
+
+        self.assertEqual(planet.climates.count(), 2)
+        self.assertEqual(planet.terrains.count(), 3)
+
+
+class RelationNamesTest(TestCase):
+    """Test that the denormalized relation names follow every write path"""
+
+    def setUp(self):
+        self.desert = Terrain.objects.create(name="desert")
+        self.dunes = Terrain.objects.create(name="dunes")
+        self.planet = Planet.objects.create(name="Tatooine")
+
+    def stored_names(self, planet=None):
+        return Planet.objects.values_list('terrain_names', flat=True).get(pk=(planet or self.planet).pk)
+
+    def test_forward_changes(self):
+        """Test add, remove and clear from the planet side"""
+        self.planet.terrains.add(self.dunes, self.desert)
+        self.assertEqual(self.stored_names(), ['desert', 'dunes'])
+        self.assertEqual(self.planet.terrain_names, ['desert', 'dunes'])
+
+        self.planet.terrains.remove(self.dunes)
+        self.assertEqual(self.stored_names(), ['desert'])
+
+        self.planet.terrains.clear()
+        self.assertEqual(self.stored_names(), [])
+
+    def test_reverse_changes(self):
+        """Test add and clear from the terrain side"""
+        hoth = Planet.objects.create(name="Hoth")
+        self.desert.planet_set.add(self.planet, hoth)
+        self.assertEqual(self.stored_names(hoth), ['desert'])
+
+        self.desert.planet_set.clear()
+        self.assertEqual(self.stored_names(), [])
+        self.assertEqual(self.stored_names(hoth), [])
+
+    def test_rename_and_delete(self):
+        """Test that terrain renames and deletes reach linked planets"""
+        self.planet.terrains.add(self.desert, self.dunes)
+
+        self.desert.name = "sand"
+        self.desert.save()
+        self.assertEqual(self.stored_names(), ['dunes', 'sand'])
+
+        self.dunes.delete()
+        self.assertEqual(self.stored_names(), ['sand'])
+
+    def test_every_path_stores_the_same_order(self):
+        """Test that names are ordered the same way whatever the database collation"""
+        serializer = PlanetSerializer(self.planet, data={'terrains': ['ice', 'Mesa']}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+
+        serializer = PlanetSerializer(data=[{'name': 'Hoth', 'terrains': ['ice', 'Mesa']}], many=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+
+        self.assertEqual(self.stored_names(), ['Mesa', 'ice'])
+        self.assertEqual(self.stored_names(Planet.objects.get(name='Hoth')), ['Mesa', 'ice'])
+
+    def test_serializer_and_bulk_paths(self):
+        """Test the serializer, bulk serializer and importer"""
+        serializer = PlanetSerializer(self.planet, data={'terrains': ['mesa', 'desert']}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+        self.assertEqual(self.stored_names(), ['desert', 'mesa'])
+        self.assertEqual(serializer.data['terrains'], ['desert', 'mesa'])
+
+        serializer = PlanetSerializer(data=[{'name': 'Hoth', 'terrains': ['tundra']}], many=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+        self.assertEqual(self.stored_names(Planet.objects.get(name='Hoth')), ['tundra'])
+
+        PlanetImporter(update=True).run([{'name': 'Hoth', 'terrains': 'ice, tundra', 'climates': 'frozen'}])
+        hoth = Planet.objects.get(name='Hoth')
+        self.assertEqual(hoth.terrain_names, ['ice', 'tundra'])
+        self.assertEqual(hoth.climate_names, ['frozen'])
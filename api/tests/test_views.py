@@ -164,6 +164,30 @@ class PlanetViewSetTest(APITestCase):
         names = [planet['name'] for planet in response.data['results']]
         self.assertEqual(names, ['Tatooine', 'Earth'])
 
+    def test_filter_planets_by_population_range(self):
+        """Test numeric population range filters"""
+        Planet.objects.create(name="Hoth", population="unknown")
+        url = reverse('planet-list')
+
+        response = self.client.get(url, {'population_min': '1000000'})
+        self.assertEqual([p['name'] for p in response.data['results']], ['Earth'])
+
+        response = self.client.get(url, {'population_min': '100', 'population_max': '200000'})
+        self.assertEqual([p['name'] for p in response.data['results']], ['Tatooine'])
+
+    def test_invalid_population_filter(self):
+        """Test that a non-numeric population bound is rejected"""
+        response = self.client.get(reverse('planet-list'), {'population_min': 'lots'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ordering_planets_by_population(self):
+        """Test that population ordering is numeric, not lexicographic"""
+        Planet.objects.create(name="Bespin", population="6000000")
+        response = self.client.get(reverse('planet-list'), {'ordering': 'population_count'})
+
+        names = [planet['name'] for planet in response.data['results']]
+        self.assertEqual(names, ['Tatooine', 'Bespin', 'Earth'])
+
 
 class ClimateViewSetTest(APITestCase):
     """Test ClimateViewSet operations"""
@@ -198,8 +222,8 @@ class ClimateViewSetTest(APITestCase):
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['name'], 'Tropical Planet')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['name'], 'Tropical Planet')
 
 
 class TerrainViewSetTest(APITestCase):
@@ -235,5 +259,62 @@ class TerrainViewSetTest(APITestCase):
         response = self.client.get(url)
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['name'], 'Forest Planet')
\ No newline at end of file
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['name'], 'Forest Planet')
+
+class RelatedPlanetsActionTest(APITestCase):
+    """Test the terrain/climate planets actions"""
+
+    def setUp(self):
+        self.desert = Terrain.objects.create(name="Desert")
+        self.arid = Climate.objects.create(name="Arid")
+        for name, population in [("Tatooine", "200000"), ("Jakku", "6000"), ("Geonosis", "100000000000")]:
+            planet = Planet.objects.create(name=name, population=population)
+            planet.terrains.add(self.desert)
+            planet.climates.add(self.arid)
+        Planet.objects.create(name="Hoth")
+        self.url = reverse('terrain-planets', kwargs={'pk': self.desert.pk})
+
+    def names(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [planet['name'] for planet in response.data['results']]
+
+    def test_paginated(self):
+        """Test that the action uses the planet list pagination"""
+        for i in range(20):
+            Planet.objects.create(name=f"Planet {i}").terrains.add(self.desert)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['count'], 23)
+        self.assertEqual(len(self.names(response)), 20)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_list_parameters(self):
+        """Test filtering, search and ordering like /planets/"""
+        response = self.client.get(self.url, {'ordering': '-population_count'})
+        self.assertEqual(self.names(response), ['Geonosis', 'Tatooine', 'Jakku'])
+
+        response = self.client.get(self.url, {'population_max': 300000, 'ordering': 'name'})
+        self.assertEqual(self.names(response), ['Jakku', 'Tatooine'])
+
+        response = self.client.get(self.url, {'search': 'tatoo'})
+        self.assertEqual(self.names(response), ['Tatooine'])
+
+    def test_keyset(self):
+        """Test keyset pagination on the action"""
+        response = self.client.get(self.url, {'pagination': 'keyset'})
+        self.assertEqual(len(self.names(response)), 3)
+        self.assertNotIn('count', response.data)
+
+    def test_compact(self):
+        """Test that compact mode returns only ids and names"""
+        url = reverse('climate-planets', kwargs={'pk': self.arid.pk})
+        response = self.client.get(url, {'compact': 'true', 'ordering': 'name'})
+        self.assertEqual(response.data['results'][0], {
+            'id': Planet.objects.get(name="Geonosis").pk, 'name': 'Geonosis'
+        })
+
+    def test_missing_terrain(self):
+        """Test that an unknown terrain is a 404"""
+        response = self.client.get(reverse('terrain-planets', kwargs={'pk': 999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -9,5 +9,6 @@ router.register(r'climates', views.ClimateViewSet)
 
 urlpatterns = [
     path('health/', views.health_check, name='health_check'),
+    path('metrics/', views.metrics, name='metrics'),
     path('', include(router.urls))
 ]
\ No newline at end of file
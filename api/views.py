@@ -1,13 +1,28 @@
 from django.shortcuts import render
-from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from rest_framework import viewsets, status, filters
+from rest_framework import permissions, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db import IntegrityError
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET, require_safe
 from .models import Climate, Planet, Terrain
-from .serializers import ClimateSerializer, PlanetSerializer, TerrainSerializer
+from .async_views import AsyncReadViewSetMixin
+from .cache import CachedResponseMixin
+from .conditional import ConditionalGetMixin
+from .exports import CSVRenderer, NDJSONRenderer, aiter_planet_rows, iter_planet_rows
+from .facets import FacetedListMixin, facet_counts
+from .fieldsets import SparseFieldsetMixin, get_requested_fields, only_selected_columns
+from .filters import FilteredListMixin, PlanetFilter
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, get_registry, render_metrics
+from .pagination import OptionalKeysetPagination
+from .search import IndexedSearchFilter, RelevanceOrderingFilter
+from .serializers import (
+    ClimateSerializer, PlanetReadSerializer, PlanetSerializer, PlanetSummarySerializer, TerrainSerializer, parse_id
+)
 from rest_framework.exceptions import ValidationError
 from django.core.exceptions import ValidationError as DjangoValidationError
 import logging
@@ -15,12 +30,20 @@ import logging
 logger = logging.getLogger(__name__)
 
 # Create your views here.
-@api_view(['GET'])
-def health_check(request):
+@require_safe
+async def health_check(request):
     """
     A simple health check endpoint to verify that the API is running.
+    Async, so ASGI servers answer it without a thread.
     """
-    return Response({"status": "ok"}, status=200)
+    return JsonResponse({"status": "ok"})
+
+@require_GET
+def metrics(request):
+    """
+    Prometheus metrics for every worker sharing API_METRICS_DIR.
+    """
+    return HttpResponse(render_metrics(get_registry().collect()), content_type=METRICS_CONTENT_TYPE)
 
 class BaseViewSetMixin:
     """Base mixin with common error handling for all ViewSets"""
@@ -98,17 +121,140 @@ class BaseViewSetMixin:
             'code': 'INTERNAL_ERROR'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class PlanetViewSet(BaseViewSetMixin, viewsets.ModelViewSet):
+class PlanetViewSet(CachedResponseMixin, ConditionalGetMixin, FacetedListMixin, SparseFieldsetMixin, BaseViewSetMixin,
+                    FilteredListMixin, AsyncReadViewSetMixin, viewsets.ModelViewSet):
     """
     ViewSet for Planet CRUD operations
     Provides: list, create, retrieve, update, partial_update, destroy
     """
     queryset = Planet.objects.all()
     serializer_class = PlanetSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ['name', 'population']
-    ordering_fields = ['id', 'name', 'created_at', 'updated_at']
+    pagination_class = OptionalKeysetPagination
+    cache_dependencies = (Planet, Terrain, Climate)
+    validator_dependencies = (Terrain, Climate)
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, RelevanceOrderingFilter]
+    filterset_class = PlanetFilter
+    search_fields = ['name', 'population', 'terrains__name', 'climates__name']
+    ordering_fields = ['id', 'name', 'population_count', 'created_at', 'updated_at']
     ordering = ['id']
+
+    def get_serializer_class(self):
+        # Reads skip DRF's field machinery; writes keep the validating serializer
+        if self.action in ('list', 'retrieve') and self.request.method in permissions.SAFE_METHODS:
+            return PlanetReadSerializer
+        return super().get_serializer_class()
+
+    def get_validator_dependencies(self):
+        # Terrain and climate renames only matter when their names are rendered
+        selected = get_requested_fields(self.request, list(PlanetReadSerializer.field_sources))
+        if selected is None:
+            return super().get_validator_dependencies()
+        return tuple(
+            model for field_name, model in (('terrains', Terrain), ('climates', Climate)) if field_name in selected
+        )
+
+    @action(detail=False, methods=['get'], renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request):
+        """
+        Stream every planet matching the list filters as NDJSON (default) or CSV.
+        Pick the format with ?format=ndjson|csv or the Accept header.
+        """
+        renderer = request.accepted_renderer
+        queryset = self.filter_queryset(self.get_queryset())
+        if isinstance(request._request, ASGIRequest):
+            content = renderer.astream(aiter_planet_rows(queryset))
+        else:
+            content = renderer.stream(iter_planet_rows(queryset))
+        response = StreamingHttpResponse(
+            content,
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
+        )
+        response['Content-Disposition'] = f'attachment; filename="planets.{renderer.format}"'
+        return response
+
+    # Upper bound on items per bulk request
+    bulk_max_items = 10000
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Create many planets from a JSON array in one transaction.
+        Nothing is written unless every item is valid; errors are listed per item.
+        """
+        serializer = self.get_serializer(data=request.data, many=True, max_length=self.bulk_max_items)
+        if not serializer.is_valid():
+            return self.handle_bulk_errors(serializer.errors, "bulk planet creation")
+        try:
+            serializer.save()
+        except IntegrityError as e:
+            # A concurrent request wrote one of the names after validation
+            return self.handle_integrity_error(e, "bulk planet creation")
+        return Response({'results': serializer.data}, status=status.HTTP_201_CREATED)
+
+    @bulk.mapping.patch
+    def bulk_update(self, request):
+        """Partially update many planets, each item identified by its id"""
+        ids = self.get_bulk_ids(request.data, key='id')
+        planets = list(Planet.objects.filter(pk__in=ids))
+        serializer = self.get_serializer(
+            planets, data=request.data, many=True, partial=True, max_length=self.bulk_max_items
+        )
+        if not serializer.is_valid():
+            return self.handle_bulk_errors(serializer.errors, "bulk planet update")
+        try:
+            serializer.save()
+        except IntegrityError as e:
+            return self.handle_integrity_error(e, "bulk planet update")
+        return Response({'results': serializer.data})
+
+    @bulk.mapping.delete
+    def bulk_destroy(self, request):
+        """Delete many planets given a JSON array of ids"""
+        if not isinstance(request.data, list):
+            return self.handle_bulk_errors(['Expected a list of planet ids.'], "bulk planet deletion")
+        if len(request.data) > self.bulk_max_items:
+            return self.handle_bulk_errors(
+                [f'Ensure this field has no more than {self.bulk_max_items} elements.'], "bulk planet deletion"
+            )
+
+        ids = self.get_bulk_ids(request.data)
+        found = set(Planet.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        errors = []
+        seen = set()
+        for value in request.data:
+            pk = self.get_bulk_ids([value])
+            if not pk:
+                errors.append({'id': [f'"{value}" is not a valid planet id.']})
+            elif pk[0] not in found:
+                errors.append({'id': [f'Planet with id {value} does not exist.']})
+            elif pk[0] in seen:
+                errors.append({'id': ['Planet is duplicated in this request.']})
+            else:
+                errors.append({})
+            seen.update(pk)
+        if any(errors):
+            return self.handle_bulk_errors(errors, "bulk planet deletion")
+
+        with transaction.atomic():
+            Planet.objects.filter(pk__in=found).delete()
+        return Response({'results': [{'id': pk} for pk in ids]})
+
+    def get_bulk_ids(self, items, key=None):
+        """Return the ids found in items, skipping anything that is not an integer or a string of digits"""
+        ids = []
+        for item in items if isinstance(items, list) else ():
+            pk = parse_id(item.get(key) if key and isinstance(item, dict) else item)
+            if pk is not None:
+                ids.append(pk)
+        return ids
+
+    def handle_bulk_errors(self, errors, action_name="operation"):
+        """Handle per-item validation errors of a bulk request"""
+        return Response({
+            'error': f'Validation failed for {action_name}',
+            'message': 'No planets were written. Please correct the following errors:',
+            'details': errors
+        }, status=status.HTTP_400_BAD_REQUEST)
     
     def create(self, request, *args, **kwargs):
         """Create a new planet with proper error handling"""
@@ -139,10 +285,60 @@ class PlanetViewSet(BaseViewSetMixin, viewsets.ModelViewSet):
         except Exception as e:
             return self.handle_generic_error(e, "terrain update")
         
-class TerrainViewSet(BaseViewSetMixin, viewsets.ModelViewSet):
+class RelatedPlanetsMixin:
+    """
+    List the planets linked to a terrain or climate the way /planets/ does.
+
+    Filtering, search, ordering and pagination are delegated to a PlanetViewSet
+    bound to the same request, so every list parameter works here too.
+    ?compact=true returns only planet ids and names, as does ?fields=id,name. The
+    facets action counts the planets matching those parameters per terrain
+    or climate, naming the Planet relation in planet_field.
+    """
+    planet_field = None
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Custom action to count planets per terrain or climate.
+        """
+        planets = self.get_planets_view(request).filter_queryset(Planet.objects.all())
+        return Response({'results': facet_counts(planets, self.planet_field)})
+
+    def list_planets(self, request):
+        related = self.get_related_object()
+        planets_view = self.get_planets_view(request)
+        queryset = planets_view.filter_queryset(related.planet_set.all())
+
+        if request.query_params.get('compact', '').lower() in ('1', 'true', 'yes'):
+            queryset, serializer_class = queryset.only('id', 'name'), PlanetSummarySerializer
+        else:
+            serializer_class = PlanetReadSerializer
+            queryset = only_selected_columns(queryset, PlanetReadSerializer(context=self.get_serializer_context()))
+
+        page = planets_view.paginate_queryset(queryset)
+        serializer = serializer_class(page, many=True, context=self.get_serializer_context())
+        return planets_view.get_paginated_response(serializer.data)
+
+    def get_planets_view(self, request):
+        return PlanetViewSet(request=request, format_kwarg=self.format_kwarg, action='list', args=(), kwargs={})
+
+    def get_related_object(self):
+        # The query string holds planet parameters, so unlike get_object()
+        # the terrain or climate itself is looked up without filtering
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        obj = get_object_or_404(self.get_queryset(), **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(request=self.request, obj=obj)
+        return obj
+
+class TerrainViewSet(RelatedPlanetsMixin, CachedResponseMixin, ConditionalGetMixin, SparseFieldsetMixin, BaseViewSetMixin,
+                     FilteredListMixin, AsyncReadViewSetMixin, viewsets.ModelViewSet):
     queryset = Terrain.objects.all()
     serializer_class = TerrainSerializer
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = OptionalKeysetPagination
+    cache_dependencies = (Terrain,)
+    planet_field = 'terrains'
+    filter_backends = [IndexedSearchFilter, RelevanceOrderingFilter]
     search_fields = ['name']
     ordering_fields = ['id', 'name', 'created_at', 'updated_at']
     ordering = ['id']
@@ -152,10 +348,7 @@ class TerrainViewSet(BaseViewSetMixin, viewsets.ModelViewSet):
         """
         Custom action to get all planets with a specific terrain.
         """
-        terrain = self.get_object()
-        planets = terrain.planet_set.all()
-        serializer = PlanetSerializer(planets, many=True)
-        return Response(serializer.data)
+        return self.list_planets(request)
     
     def create(self, request, *args, **kwargs):
         """Create a new terrain with proper error handling"""
@@ -186,10 +379,14 @@ class TerrainViewSet(BaseViewSetMixin, viewsets.ModelViewSet):
         except Exception as e:
             return self.handle_generic_error(e, "terrain update")
     
-class ClimateViewSet(BaseViewSetMixin, viewsets.ModelViewSet):
+class ClimateViewSet(RelatedPlanetsMixin, CachedResponseMixin, ConditionalGetMixin, SparseFieldsetMixin, BaseViewSetMixin,
+                    FilteredListMixin, AsyncReadViewSetMixin, viewsets.ModelViewSet):
     queryset = Climate.objects.all()
     serializer_class = ClimateSerializer
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = OptionalKeysetPagination
+    cache_dependencies = (Climate,)
+    planet_field = 'climates'
+    filter_backends = [IndexedSearchFilter, RelevanceOrderingFilter]
     search_fields = ['name']
     ordering_fields = ['id', 'name', 'created_at', 'updated_at']
     ordering = ['id']
@@ -228,7 +425,4 @@ class ClimateViewSet(BaseViewSetMixin, viewsets.ModelViewSet):
         """
         Custom action to get all planets with a specific climate.
         """
-        climate = self.get_object()
-        planets = climate.planet_set.all()
-        serializer = PlanetSerializer(planets, many=True)
-        return Response(serializer.data)
+        return self.list_planets(request)
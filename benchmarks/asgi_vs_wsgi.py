@@ -0,0 +1,169 @@
+"""
+Compare the WSGI and ASGI deployments under sustained concurrency.
+
+Starts gunicorn (gthread workers, sync views) and uvicorn (async views) in
+turn, with the same settings and database, and drives the read mix from
+loadtest.py at each concurrency level. Throughput and latency percentiles
+are printed side by side. --slow-clients adds clients that download the
+export at a trickle for the whole run. Under gunicorn each of them holds a
+thread for the full download; under uvicorn none of them holds a thread
+between chunks.
+
+    python benchmarks/asgi_vs_wsgi.py --seed-planets 10000 --concurrency 16,64,256 --slow-clients 8
+
+Both servers run with the project settings, so point them at a database with
+planets, or pass --seed-planets as for loadtest.py.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+from loadtest import Client, RunState, fetch_planet_ids, parse_mix, run_phase, seed_planets, summarize
+from utils import ROOT
+
+READ_MIX = 'list=40,search=10,filter=10,retrieve=40'
+SLOW_CHUNK_SIZE = 1024
+
+
+def server_command(name, port, args):
+    if name == 'wsgi':
+        return [
+            'gunicorn', 'config.wsgi:application', '--bind', f'127.0.0.1:{port}', '--workers', str(args.workers),
+            '--worker-class', 'gthread', '--threads', str(args.threads), '--log-level', 'warning',
+        ]
+    return [
+        'uvicorn', 'config.asgi:application', '--host', '127.0.0.1', '--port', str(port),
+        '--workers', str(args.workers), '--log-level', 'warning', '--no-access-log',
+    ]
+
+
+@contextmanager
+def running_server(name, port, args):
+    """Start a server, wait for its health check and stop it afterwards"""
+    env = {**os.environ, 'API_ASYNC_VIEWS_ENABLED': str(name == 'asgi')}
+    process = subprocess.Popen(server_command(name, port, args), cwd=ROOT, env=env)
+    try:
+        deadline = time.perf_counter() + 30
+        while True:
+            try:
+                requests.get(f'http://127.0.0.1:{port}/api/v1/health/', timeout=1).raise_for_status()
+                break
+            except requests.RequestException:
+                if process.poll() is not None or time.perf_counter() > deadline:
+                    raise SystemExit(f'{name} server did not start')
+                time.sleep(0.2)
+        yield f'http://127.0.0.1:{port}/api/v1'
+    finally:
+        process.terminate()
+        process.wait()
+
+
+class SmallWindowAdapter(HTTPAdapter):
+    """Keeps the receive buffer small so the server cannot hand a whole response to the kernel"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_RCVBUF, SLOW_CHUNK_SIZE * 4),
+        ]
+        super().init_poolmanager(*args, **kwargs)
+
+
+def slow_client(base_url, deadline, delay):
+    """Download the export one chunk per delay seconds until deadline"""
+    session = requests.Session()
+    session.mount('http://', SmallWindowAdapter())
+    while time.perf_counter() < deadline:
+        try:
+            with session.get(f'{base_url}/planets/export/', stream=True, timeout=60) as response:
+                for _ in response.iter_content(chunk_size=SLOW_CHUNK_SIZE):
+                    if time.perf_counter() >= deadline:
+                        break
+                    time.sleep(delay)
+        except requests.RequestException:
+            time.sleep(delay)
+
+
+def measure(base_url, concurrency, args):
+    planet_ids = fetch_planet_ids(Client(base_url, bypass_cache=True))
+    if not planet_ids:
+        raise SystemExit('The API has no planets; pass --seed-planets N')
+    state = RunState(planet_ids)
+
+    if args.warmup > 0:
+        run_phase(base_url, args.mix, state, concurrency, args.warmup, args.seed)
+
+    deadline = time.perf_counter() + args.duration
+    slow = [
+        threading.Thread(target=slow_client, args=(base_url, deadline, args.slow_read_delay), daemon=True)
+        for _ in range(args.slow_clients)
+    ]
+    for thread in slow:
+        thread.start()
+    samples, elapsed = run_phase(base_url, args.mix, state, concurrency, args.duration, args.seed)
+    for thread in slow:
+        thread.join()
+    return summarize(samples, elapsed)['total']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', default='16,64,256', help='Comma separated client counts (default: %(default)s)')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds per level (default: %(default)s)')
+    parser.add_argument('--warmup', type=float, default=3, help='Unmeasured seconds per level (default: %(default)s)')
+    parser.add_argument('--mix', type=parse_mix, default=READ_MIX, help='Operation weights (default: %s)' % READ_MIX)
+    parser.add_argument('--workers', type=int, default=2, help='Server processes (default: %(default)s)')
+    parser.add_argument('--threads', type=int, default=8, help='Threads per gunicorn worker (default: %(default)s)')
+    parser.add_argument('--slow-clients', type=int, default=0, help='Clients downloading the export slowly')
+    parser.add_argument('--slow-read-delay', type=float, default=0.5,
+                        help='Seconds a slow client waits between 1 KiB chunks (default: %(default)s)')
+    parser.add_argument('--servers', default='wsgi,asgi', help='Servers to compare (default: %(default)s)')
+    parser.add_argument('--port', type=int, default=8765, help='Port the servers listen on (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for traffic and data (default: 0)')
+    parser.add_argument('--seed-planets', type=int, default=0,
+                        help='Generate this many planets first, unless a previous run did')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+    levels = [int(level) for level in args.concurrency.split(',')]
+    servers = args.servers.split(',')
+    if set(servers) - {'wsgi', 'asgi'}:
+        parser.error('--servers takes wsgi and/or asgi')
+
+    if args.seed_planets:
+        seed_planets(args.seed_planets, args.seed)
+
+    results = {}
+    for name in servers:
+        with running_server(name, args.port, args) as base_url:
+            for concurrency in levels:
+                print(f"{name}: {concurrency} clients for {args.duration:.0f}s...", flush=True)
+                results.setdefault(name, {})[concurrency] = measure(base_url, concurrency, args)
+
+    print(f"\n{args.slow_clients} slow clients, {args.workers} workers"
+          f"{f' x {args.threads} threads' if 'wsgi' in servers else ''}\n")
+    print(f"{'clients':>8} {'server':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for concurrency in levels:
+        for name in servers:
+            result = results[name][concurrency]
+            print(f"{concurrency:>8} {name:<6} {result['throughput']:>8.1f} {result['p50_ms'] or 0:>8.1f} "
+                  f"{result['p95_ms'] or 0:>8.1f} {result['p99_ms'] or 0:>8.1f} {result['errors']:>7}")
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump({'config': {
+                'concurrency': levels, 'duration': args.duration, 'mix': args.mix, 'workers': args.workers,
+                'threads': args.threads, 'slow_clients': args.slow_clients, 'seed': args.seed,
+            }, 'results': results}, handle, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
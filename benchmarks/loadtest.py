@@ -0,0 +1,319 @@
+"""
+Drive a mix of API traffic at fixed concurrency and report latency percentiles,
+throughput and queries per request.
+
+Run the server against a local database, with instrumentation on so responses
+carry the query count in Server-Timing:
+
+    API_INSTRUMENTATION_ENABLED=True python manage.py runserver --noreload
+    python benchmarks/loadtest.py --seed-planets 10000 --duration 30 --output results.json
+    python benchmarks/loadtest.py --duration 30 --baseline results.json
+
+--seed-planets runs generate_planets against the database in the project
+settings, so point both at the same database. Create and update requests write
+to that database. With --baseline, the exit status is 1 when any operation's
+p95 latency or the overall throughput regress by more than --tolerance.
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+import requests
+
+from utils import setup_django
+
+SEED_PREFIX = 'Loadtest'
+DEFAULT_MIX = 'list=35,search=15,filter=15,retrieve=25,create=5,update=5'
+TERRAINS = ['desert', 'mountains', 'grasslands', 'forests', 'jungle', 'oceans', 'swamp', 'tundra']
+CLIMATES = ['temperate', 'arid', 'tropical', 'frozen', 'murky']
+QUERY_COUNT = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation '{name}'. Choose from: {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def seed_planets(count, seed):
+    """Generate count planets with generate_planets unless a previous run already did"""
+    setup_django()
+    from django.core.management import call_command
+    from api.models import Planet
+
+    if Planet.objects.filter(name__startswith=f'{SEED_PREFIX} ').exists():
+        print(f"Reusing the existing '{SEED_PREFIX}' planets")
+        return
+    call_command('generate_planets', count, seed=seed, prefix=SEED_PREFIX)
+
+
+class Client:
+    """One keep-alive session per worker thread"""
+
+    def __init__(self, base_url, bypass_cache):
+        self.base_url = base_url.rstrip('/')
+        self.session = requests.Session()
+        self.session.headers['Accept'] = 'application/json'
+        if bypass_cache:
+            self.session.headers['X-Cache-Bypass'] = '1'
+
+    def request(self, method, path, **kwargs):
+        url = path if path.startswith(('http://', 'https://')) else f'{self.base_url}{path}'
+        return self.session.request(method, url, timeout=30, **kwargs)
+
+
+def op_list(client, rng, state):
+    return client.request('GET', '/planets/', params={'page': rng.randint(1, 10)})
+
+
+def op_search(client, rng, state):
+    return client.request('GET', '/planets/', params={'search': rng.choice(TERRAINS + CLIMATES)})
+
+
+def op_filter(client, rng, state):
+    return client.request('GET', '/planets/', params={
+        'terrains': rng.choice(TERRAINS),
+        'climates': rng.choice(CLIMATES),
+        'population_min': 10 ** rng.randint(3, 9),
+        'ordering': '-population_count',
+    })
+
+
+def op_retrieve(client, rng, state):
+    return client.request('GET', f'/planets/{rng.choice(state.planet_ids)}/')
+
+
+def op_create(client, rng, state):
+    return client.request('POST', '/planets/', json={
+        'name': f'{SEED_PREFIX} {state.run_id} {state.next_number()}',
+        'population': str(rng.randint(1000, 10 ** 9)),
+        'terrains': rng.sample(TERRAINS, rng.randint(1, 3)),
+        'climates': rng.sample(CLIMATES, 1),
+    })
+
+
+def op_update(client, rng, state):
+    return client.request('PATCH', f'/planets/{rng.choice(state.planet_ids)}/', json={
+        'population': str(rng.randint(1000, 10 ** 9)),
+    })
+
+
+OPERATIONS = {
+    'list': op_list,
+    'search': op_search,
+    'filter': op_filter,
+    'retrieve': op_retrieve,
+    'create': op_create,
+    'update': op_update,
+}
+
+
+class RunState:
+    """Shared by the workers: planet ids to read and update, and unique names for creates"""
+
+    def __init__(self, planet_ids):
+        self.planet_ids = planet_ids
+        self.run_id = uuid.uuid4().hex[:8]
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def next_number(self):
+        with self._lock:
+            self._counter += 1
+            return self._counter
+
+
+def fetch_planet_ids(client, limit=1000):
+    """Collect up to limit planet ids with cheap keyset pages"""
+    ids, params = [], {'pagination': 'keyset', 'fields': 'id'}
+    path = '/planets/'
+    while len(ids) < limit:
+        response = client.request('GET', path, params=params)
+        response.raise_for_status()
+        data = response.json()
+        ids += [planet['id'] for planet in data['results']]
+        if not data['next']:
+            break
+        path, params = data['next'], None
+    return ids[:limit]
+
+
+def worker(base_url, mix, state, deadline, seed, samples, bypass_cache):
+    """Send requests until deadline, appending (ms, ok, queries) to samples[operation]"""
+    rng = random.Random(seed)
+    client = Client(base_url, bypass_cache)
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        start = time.perf_counter()
+        try:
+            response = OPERATIONS[name](client, rng, state)
+            ok = response.status_code < 400
+            match = QUERY_COUNT.search(response.headers.get('Server-Timing', ''))
+            queries = int(match.group(1)) if match else None
+        except requests.RequestException:
+            ok, queries = False, None
+        samples[name].append(((time.perf_counter() - start) * 1000, ok, queries))
+
+
+def run_phase(base_url, mix, state, concurrency, seconds, seed, bypass_cache=True):
+    """Run concurrency workers for seconds and return their merged samples and the elapsed time"""
+    # One sample dict per worker, merged once the phase is over
+    per_worker = [defaultdict(list) for _ in range(concurrency)]
+    deadline = time.perf_counter() + seconds
+    threads = [
+        threading.Thread(target=worker, args=(
+            base_url, mix, state, deadline, seed * 1000 + index, samples, bypass_cache,
+        ))
+        for index, samples in enumerate(per_worker)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    samples = defaultdict(list)
+    for worker_samples in per_worker:
+        for name, rows in worker_samples.items():
+            samples[name] += rows
+    return samples, elapsed
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return None
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+def summarize(samples, elapsed):
+    results = {}
+    for name, rows in sorted(samples.items()):
+        latencies = sorted(latency for latency, ok, _ in rows if ok)
+        queries = [count for _, ok, count in rows if ok and count is not None]
+        results[name] = {
+            'requests': len(rows),
+            'errors': sum(1 for _, ok, _ in rows if not ok),
+            'throughput': len(rows) / elapsed,
+            'p50_ms': percentile(latencies, 0.50),
+            'p95_ms': percentile(latencies, 0.95),
+            'p99_ms': percentile(latencies, 0.99),
+            'queries_per_request': sum(queries) / len(queries) if queries else None,
+        }
+
+    total = sum(len(rows) for rows in samples.values())
+    latencies = sorted(latency for rows in samples.values() for latency, ok, _ in rows if ok)
+    queries = [count for rows in samples.values() for _, ok, count in rows if ok and count is not None]
+    results['total'] = {
+        'requests': total,
+        'errors': sum(result['errors'] for result in results.values()),
+        'throughput': total / elapsed,
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'queries_per_request': sum(queries) / len(queries) if queries else None,
+    }
+    return results
+
+
+def print_results(results):
+    def number(value, digits=1):
+        return '-' if value is None else f'{value:.{digits}f}'
+
+    print(f"{'operation':<10} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'queries':>8}")
+    for name, result in results.items():
+        print(f"{name:<10} {result['requests']:>9} {result['errors']:>7} {number(result['throughput']):>8} "
+              f"{number(result['p50_ms']):>8} {number(result['p95_ms']):>8} {number(result['p99_ms']):>8} "
+              f"{number(result['queries_per_request']):>8}")
+
+
+def compare(results, baseline, tolerance):
+    """Print changes against a baseline run and return the regressions"""
+    regressions = []
+    print(f"\nAgainst baseline (tolerance {tolerance:.0%}):")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before or result['p95_ms'] is None or not before.get('p95_ms'):
+            continue
+        change = result['p95_ms'] / before['p95_ms'] - 1
+        print(f"  {name:<10} p95 {before['p95_ms']:.1f} -> {result['p95_ms']:.1f} ms ({change:+.0%})")
+        if change > tolerance:
+            regressions.append(f'{name} p95')
+
+    before, after = baseline['total']['throughput'], results['total']['throughput']
+    change = after / before - 1
+    print(f"  {'total':<10} throughput {before:.1f} -> {after:.1f} req/s ({change:+.0%})")
+    if change < -tolerance:
+        regressions.append('throughput')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://localhost:8000/api/v1', help='API root (default: %(default)s)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients (default: %(default)s)')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds of traffic (default: %(default)s)')
+    parser.add_argument('--warmup', type=float, default=3, help='Unmeasured seconds first (default: %(default)s)')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help='Operation weights (default: %s)' % DEFAULT_MIX)
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for traffic and data (default: 0)')
+    parser.add_argument('--seed-planets', type=int, default=0,
+                        help='Generate this many planets first, unless a previous run did')
+    parser.add_argument('--use-cache', action='store_true', help='Let reads hit the response cache')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--baseline', help='Compare against results JSON from an earlier run')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed p95/throughput regression against the baseline (default: %(default)s)')
+    args = parser.parse_args()
+    if args.duration <= 0 or args.concurrency < 1:
+        parser.error('--duration and --concurrency must be positive')
+
+    if args.seed_planets:
+        seed_planets(args.seed_planets, args.seed)
+
+    planet_ids = fetch_planet_ids(Client(args.base_url, bypass_cache=True))
+    if not planet_ids:
+        parser.error('The API has no planets; pass --seed-planets N')
+    state = RunState(planet_ids)
+
+    if args.warmup > 0:
+        run_phase(args.base_url, args.mix, state, args.concurrency, args.warmup, args.seed, not args.use_cache)
+    samples, elapsed = run_phase(
+        args.base_url, args.mix, state, args.concurrency, args.duration, args.seed, not args.use_cache
+    )
+    results = summarize(samples, elapsed)
+
+    print(f"{args.concurrency} clients for {args.duration:.0f}s against {args.base_url}\n")
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump({'config': {
+                'base_url': args.base_url, 'concurrency': args.concurrency, 'duration': args.duration,
+                'mix': args.mix, 'seed': args.seed, 'use_cache': args.use_cache,
+            }, 'results': results}, handle, indent=2)
+        print(f"\nWrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            regressions = compare(results, json.load(handle)['results'], args.tolerance)
+        if regressions:
+            print(f"\nRegressed: {', '.join(regressions)}")
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
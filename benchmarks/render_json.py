@@ -0,0 +1,39 @@
+"""
+Compare rendering a 1,000-planet page with DRF's JSONRenderer and FastJSONRenderer.
+
+    python benchmarks/render_json.py [--count N]
+"""
+import argparse
+
+from utils import measure, report, sample_planets, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=1000, help='Planets on the page (default: 1000)')
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from api.renderers import FastJSONRenderer, orjson
+    from api.serializers import PlanetSerializer
+
+    page = {
+        'count': args.count,
+        'next': None,
+        'previous': None,
+        'results': PlanetSerializer(sample_planets(args.count), many=True).data,
+    }
+    stdlib, fast = JSONRenderer(), FastJSONRenderer()
+    assert stdlib.render(page) == fast.render(page), "renderers disagree"
+
+    if orjson is None:
+        print("orjson is not installed; FastJSONRenderer falls back to the stdlib renderer")
+    report(f"Render a {args.count}-planet page", [
+        ('JSONRenderer (stdlib json)', measure(lambda: stdlib.render(page))),
+        ('FastJSONRenderer', measure(lambda: fast.render(page))),
+    ])
+
+
+if __name__ == '__main__':
+    main()
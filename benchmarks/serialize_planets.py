@@ -0,0 +1,36 @@
+"""
+Compare serializing a 1,000-planet page with PlanetSerializer and PlanetReadSerializer.
+
+    python benchmarks/serialize_planets.py [--count N]
+"""
+import argparse
+
+from utils import measure, report, sample_planets, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=1000, help='Planets on the page (default: 1000)')
+    args = parser.parse_args()
+
+    setup_django()
+    from api.serializers import PlanetReadSerializer, PlanetSerializer
+
+    planets = sample_planets(args.count)
+
+    def full():
+        return PlanetSerializer(planets, many=True).data
+
+    def read():
+        return PlanetReadSerializer(planets, many=True).data
+
+    assert full() == read(), "serializers disagree"
+
+    report(f"Serialize a {args.count}-planet page", [
+        ('PlanetSerializer', measure(full)),
+        ('PlanetReadSerializer', measure(read)),
+    ])
+
+
+if __name__ == '__main__':
+    main()
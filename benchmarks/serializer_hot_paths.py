@@ -0,0 +1,162 @@
+"""
+Measure per-object validate, serialize and deserialize cost for the terrain,
+climate and planet serializers at several batch sizes, and track the results
+across commits.
+
+    python benchmarks/serializer_hot_paths.py [--batch-sizes 1,100,10000] [--tolerance 0.25]
+
+Deserializing planets resolves terrain and climate names, so the run uses a
+migrated in-memory SQLite database rather than the project database. Each run
+is stored under the current commit in .benchmarks/serializer_hot_paths.json and
+compared with the previous commit's entry there; the exit status is 1 when any
+case is slower than that by more than --tolerance.
+"""
+import argparse
+import json
+import subprocess
+import time
+
+from utils import ROOT, setup_django
+
+HISTORY = ROOT / '.benchmarks' / 'serializer_hot_paths.json'
+TERRAINS = ['desert', 'grasslands', 'mountains', 'jungle', 'rainforests', 'tundra', 'ice caves']
+CLIMATES = ['arid', 'temperate', 'tropical', 'frozen', 'murky', 'artificial temperate']
+
+
+def per_object_us(func, size, budget=0.2):
+    """Best per-object time in microseconds, repeating func until about budget seconds have passed"""
+    best, spent, runs = float('inf'), 0.0, 0
+    while runs < 3 or (spent < budget and runs < 1000):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best, spent, runs = min(best, elapsed), spent + elapsed, runs + 1
+    return best / size * 1e6
+
+
+def payloads(kind, size):
+    if kind == 'terrain':
+        return [{'name': f'{TERRAINS[i % 7]} {i}'} for i in range(size)]
+    if kind == 'climate':
+        return [{'name': f'{CLIMATES[i % 6]} {i}'} for i in range(size)]
+    return [
+        {
+            'name': f'Planet {i}',
+            'population': str(i * 1000),
+            'terrains': TERRAINS[i % 7:i % 7 + 2],
+            'climates': CLIMATES[i % 6:i % 6 + 1],
+        }
+        for i in range(size)
+    ]
+
+
+def instances(kind, size):
+    from django.utils import timezone
+    from api.models import Climate, Terrain
+    from utils import sample_planets
+
+    if kind == 'planet':
+        return sample_planets(size)
+    now = timezone.now()
+    model = Terrain if kind == 'terrain' else Climate
+    return [model(id=i + 1, name=item['name'], created_at=now, updated_at=now)
+            for i, item in enumerate(payloads(kind, size))]
+
+
+def cases(batch_sizes):
+    """Yield (case name, batch size, callable) for every serializer, operation and batch size"""
+    from api.serializers import ClimateSerializer, PlanetSerializer, TerrainSerializer
+
+    serializers = {'terrain': TerrainSerializer, 'climate': ClimateSerializer, 'planet': PlanetSerializer}
+    for kind, serializer_class in serializers.items():
+        for size in batch_sizes:
+            data, objects = payloads(kind, size), instances(kind, size)
+
+            if kind != 'planet':
+                validate_name = serializer_class().validate_name
+                names = [item['name'] for item in data]
+                yield f'{kind}.validate_name', size, lambda names=names, validate=validate_name: [
+                    validate(name) for name in names
+                ]
+
+            yield f'{kind}.serialize', size, lambda cls=serializer_class, objects=objects: (
+                cls(objects, many=True).data
+            )
+
+            def deserialize(cls=serializer_class, data=data):
+                # A batch of one goes through the single object path, like a plain POST
+                serializer = cls(data=data[0]) if len(data) == 1 else cls(data=data, many=True)
+                assert serializer.is_valid(), serializer.errors
+
+            yield f'{kind}.deserialize', size, deserialize
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def load_history():
+    try:
+        with open(HISTORY) as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return []
+
+
+def save_history(history):
+    HISTORY.parent.mkdir(exist_ok=True)
+    with open(HISTORY, 'w') as handle:
+        json.dump(history, handle, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-sizes', default='1,100,10000',
+                        help='Comma separated batch sizes (default: %(default)s)')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed slowdown against the previous commit (default: %(default)s)')
+    parser.add_argument('--no-save', action='store_true', help='Do not record this run in the history')
+    args = parser.parse_args()
+    batch_sizes = [int(size) for size in args.batch_sizes.split(',')]
+
+    setup_django(memory_database=True)
+
+    results = {}
+    print(f"{'case':<24} {'batch':>6} {'us/object':>10}")
+    for name, size, func in cases(batch_sizes):
+        # Once unmeasured, so names resolved on the first pass are already in the database
+        func()
+        results[f'{name}[{size}]'] = microseconds = per_object_us(func, size)
+        print(f"{name:<24} {size:>6} {microseconds:>10.2f}")
+
+    commit = current_commit()
+    history = [entry for entry in load_history() if entry['commit'] != commit]
+    regressions = []
+    if history:
+        previous = history[-1]
+        print(f"\nAgainst {previous['commit']} (tolerance {args.tolerance:.0%}):")
+        for case, microseconds in results.items():
+            before = previous['results'].get(case)
+            if not before:
+                continue
+            change = microseconds / before - 1
+            print(f"  {case:<32} {before:>9.2f} -> {microseconds:>9.2f} us ({change:+.0%})")
+            if change > args.tolerance:
+                regressions.append(case)
+
+    if not args.no_save:
+        save_history(history + [{'commit': commit, 'time': time.time(), 'results': results}])
+        print(f"\nRecorded under {commit} in {HISTORY.relative_to(ROOT)}")
+
+    if regressions:
+        print(f"\nRegressed: {', '.join(regressions)}")
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Shared helpers for the micro-benchmarks in this package"""
+import os
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def setup_django(memory_database=False):
+    """Configure Django; memory_database swaps in a migrated in-memory SQLite database"""
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
+    from django.conf import settings
+
+    if memory_database:
+        # Connections are created lazily, so this takes effect before any is opened
+        settings.DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}}
+    django.setup()
+    if memory_database:
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
+
+
+def sample_planets(count=1000):
+    """Unsaved planets shaped like fetch_planets data; rendering them needs no database"""
+    from django.utils import timezone
+    from api.models import Planet
+
+    now = timezone.now()
+    terrains = ['desert', 'grasslands', 'mountains', 'jungle', 'rainforests', 'tundra', 'ice caves']
+    climates = ['arid', 'temperate', 'tropical', 'frozen', 'murky']
+    return [
+        Planet(
+            id=i + 1,
+            name=f"Planet {i}",
+            population=str(i * 1000),
+            population_count=i * 1000,
+            terrain_names=sorted(terrains[i % 7:i % 7 + 2]),
+            climate_names=climates[i % 5:i % 5 + 1],
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def measure(func, number=20, repeat=5):
+    """Best per-call time in milliseconds"""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1000
+
+
+def report(title, results):
+    """Print per-call times and the speedup over the first entry"""
+    baseline = results[0][1]
+    print(title)
+    for label, milliseconds in results:
+        print(f"  {label:<32} {milliseconds:8.3f} ms  {baseline / milliseconds:5.2f}x")
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
+import sys
 from pathlib import Path
 from decouple import config
 
@@ -28,6 +29,8 @@ DEBUG = True
 
 ALLOWED_HOSTS = []
 
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test' or 'pytest' in sys.modules
+
 
 # Application definition
 
@@ -51,15 +54,58 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    # orjson-backed when installed, stdlib json otherwise; output is identical
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'api.renderers.FastJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'api.renderers.FastJSONParser',
     ],
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='ntd-rest-api'),
+    }
+}
+
+# Rendered list/retrieve responses, invalidated by api.signals. Off under the
+# test runner because test rollbacks do not send the invalidating signals.
+API_RESPONSE_CACHE = {
+    'ENABLED': config('API_RESPONSE_CACHE_ENABLED', default=not TESTING, cast=bool),
+    'ALIAS': 'default',
+    'TIMEOUT': config('API_RESPONSE_CACHE_TIMEOUT', default=300, cast=int),
+}
+
+# Per-request query count and timings in a Server-Timing header; requests
+# over either threshold are logged with their slowest SQL
+API_INSTRUMENTATION = {
+    'ENABLED': config('API_INSTRUMENTATION_ENABLED', default=False, cast=bool),
+    'SLOW_REQUEST_MS': config('API_SLOW_REQUEST_MS', default=500, cast=int),
+    'MAX_QUERIES': config('API_MAX_QUERIES', default=50, cast=int),
+}
+
+# Prometheus metrics served at /api/v1/metrics/. Point API_METRICS_DIR at a
+# directory shared by all workers (and fetch_planets) to aggregate them; clear
+# it when the deployment restarts.
+API_METRICS = {
+    'ENABLED': config('API_METRICS_ENABLED', default=False, cast=bool),
+    'MULTIPROCESS_DIR': config('API_METRICS_DIR', default='') or None,
+}
+
+# Native async list/retrieve views, only used under ASGI. Off by default:
+# they cost more CPU per request and only help when requests wait on clients.
+API_ASYNC_VIEWS = {
+    'ENABLED': config('API_ASYNC_VIEWS_ENABLED', default=False, cast=bool),
+}
+
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -91,6 +137,31 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# https://docs.djangoproject.com/en/5.2/ref/databases/#connection-management
+
+# DB_CONN_MAX_AGE keeps a connection open across requests on the same worker
+# thread, checked before reuse when DB_CONN_HEALTH_CHECKS is on. Under ASGI
+# every request runs on a new thread, so leave it at 0 there and use DB_POOL
+# instead. DB_POOL needs psycopg 3 with psycopg_pool (requirements-pool.txt)
+# and replaces persistent connections.
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+
+DATABASE_OPTIONS = {}
+# 0 keeps the libpq default of waiting indefinitely
+DB_CONNECT_TIMEOUT = config('DB_CONNECT_TIMEOUT', default=0, cast=int)
+if DB_CONNECT_TIMEOUT:
+    DATABASE_OPTIONS['connect_timeout'] = DB_CONNECT_TIMEOUT
+DB_STATEMENT_TIMEOUT_MS = config('DB_STATEMENT_TIMEOUT_MS', default=0, cast=int)
+if DB_STATEMENT_TIMEOUT_MS:
+    # Sent as a startup parameter; PgBouncer rejects it unless listed in
+    # its ignore_startup_parameters, so set it on the role there instead
+    DATABASE_OPTIONS['options'] = f'-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}'
+if DB_POOL:
+    DATABASE_OPTIONS['pool'] = {
+        'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+        'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+        'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+    }
 
 DATABASES = {
     'default': {
@@ -100,6 +171,12 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD', default='database_password'),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': 0 if DB_POOL else config('DB_CONN_MAX_AGE', default=0, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        # The export reads through server-side cursors, which do not survive
+        # PgBouncer in transaction pooling mode
+        'DISABLE_SERVER_SIDE_CURSORS': config('DB_DISABLE_SERVER_SIDE_CURSORS', default=False, cast=bool),
+        'OPTIONS': DATABASE_OPTIONS,
     }
 }
 